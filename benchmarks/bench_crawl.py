@@ -0,0 +1,139 @@
+"""
+Сквозной бенчмарк обхода: поиск, страницы серий и авторов через локальный
+HTTP-сервер, который отдает страницы-образцы из benchmarks/fixtures с заданной
+задержкой.
+
+Обход направляется на локальный сервер через flibusta_http.configure_base_url,
+поэтому измеряется тот же код, что работает с настоящим сайтом, включая
+ограничитель частоты запросов.
+
+    python benchmarks/bench_crawl.py --latency 0.05 --rate 50 --max-pages 5 --details 10
+"""
+import argparse
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import flibusta_http
+import flibusta_metrics
+import flibusta_online_scraper as scraper
+from flibusta_pipeline import get_details_parallel
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Страница-образец для каждого типа пути
+ROUTES = [
+    (re.compile(r'^/booksearch'), 'search_large.html'),
+    (re.compile(r'^/s/\d+'), 'series_paginated.html'),
+    (re.compile(r'^/a/\d+'), 'author_huge.html'),
+]
+
+
+def make_handler(latency):
+    """
+    Создает класс обработчика запросов с заданной задержкой ответа.
+
+    Args:
+        latency (float): Задержка перед ответом в секундах
+
+    Returns:
+        type: Класс обработчика для ThreadingHTTPServer
+    """
+    pages = {}
+    for _, filename in ROUTES:
+        with open(os.path.join(FIXTURES_DIR, filename), 'rb') as f:
+            pages[filename] = f.read()
+
+    class FixtureHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Заголовки и тело пишутся отдельно; без этого ответ задерживается на время отложенного ACK
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            time.sleep(latency)
+
+            for pattern, filename in ROUTES:
+                if pattern.search(self.path):
+                    body = pages[filename]
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/html; charset=utf-8')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+
+            self.send_error(404)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FixtureHandler
+
+
+def start_server(latency):
+    """
+    Запускает локальный сервер в фоновом потоке.
+
+    Args:
+        latency (float): Задержка ответа в секундах
+
+    Returns:
+        ThreadingHTTPServer: Запущенный сервер
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(latency))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сквозной бенчмарк обхода Flibusta на локальном сервере")
+    parser.add_argument('--latency', type=float, default=0.05, help="Задержка ответа сервера в секундах")
+    parser.add_argument('--rate', type=float, default=50, help="Ограничение частоты запросов (в секунду)")
+    parser.add_argument('--max-pages', type=int, default=5, help="Количество страниц результатов поиска")
+    parser.add_argument('--details', type=int, default=10,
+                        help="Количество серий и авторов, для которых собираются подробности")
+    parser.add_argument('--backend', choices=scraper.PARSER_BACKENDS, default=None, help="Движок разбора HTML")
+    parser.add_argument('--parallel', action='store_true',
+                        help="Собирать подробности конвейером get_details_parallel вместо iter_details")
+    args = parser.parse_args()
+
+    server = start_server(args.latency)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    flibusta_http.configure_rate_limit(rate=args.rate, burst=args.rate, jitter=0)
+    flibusta_http.configure_base_url(base_url)
+    if args.backend:
+        scraper.set_default_parser_backend(args.backend)
+
+    start = time.perf_counter()
+    results = scraper.parse_all_pages('бенчмарк', max_pages=args.max_pages)
+    search_time = time.perf_counter() - start
+
+    results['series'] = results['series'][:args.details]
+    results['authors'] = results['authors'][:args.details]
+
+    start = time.perf_counter()
+    if args.parallel:
+        detailed = get_details_parallel(results)
+        details_count = len(detailed['series_details']) + len(detailed['authors_details'])
+    else:
+        details_count = sum(1 for _ in scraper.iter_details(results))
+    details_time = time.perf_counter() - start
+
+    server.shutdown()
+
+    print(f"\nПоиск: {args.max_pages} страниц за {search_time:.2f} с")
+    print(f"Подробности: {details_count} сущностей за {details_time:.2f} с")
+    print(f"Всего: {search_time + details_time:.2f} с")
+    print(f"\nМетрики: {flibusta_metrics.get_metrics().report()}")
+
+
+if __name__ == '__main__':
+    main()
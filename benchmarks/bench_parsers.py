@@ -0,0 +1,151 @@
+"""
+Бенчмарк функций разбора на страницах-образцах из benchmarks/fixtures.
+
+Для каждой функции и каждого движка разбора измеряется время (лучшее и медиана
+по нескольким повторам timeit) и пиковое потребление памяти (tracemalloc).
+Заодно проверяется, что все движки возвращают одинаковый результат.
+
+    python benchmarks/bench_parsers.py
+    python benchmarks/bench_parsers.py --repeat 10 --backend lxml-native --json results.json
+"""
+import argparse
+import functools
+import json
+import os
+import statistics
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import flibusta_online_scraper as scraper
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# (название, функция разбора, страница-образец, поддерживает ли функция выбор движка)
+CASES = [
+    ('parse_series', scraper.parse_series, 'search_small.html', True),
+    ('parse_series', scraper.parse_series, 'search_large.html', True),
+    ('parse_authors', scraper.parse_authors, 'search_small.html', True),
+    ('parse_authors', scraper.parse_authors, 'search_large.html', True),
+    ('parse_books', scraper.parse_books, 'search_small.html', True),
+    ('parse_books', scraper.parse_books, 'search_large.html', True),
+    ('parse_search_page', scraper.parse_search_page, 'search_large.html', True),
+    ('parse_series_books', scraper.parse_series_books, 'series_paginated.html', True),
+    ('parse_author_books', scraper.parse_author_books, 'author_huge.html', True),
+    ('parse_book_page', scraper.parse_book_page, 'book_page.html', True),
+    ('get_max_page_number', scraper.get_max_page_number, 'search_large.html', False),
+    ('get_max_page_number_from_url',
+     functools.partial(scraper.get_max_page_number_from_url, base_url_pattern='/s/101'),
+     'series_paginated.html', False),
+]
+
+
+def load_fixture(filename):
+    """
+    Читает страницу-образец.
+
+    Args:
+        filename (str): Имя файла в каталоге fixtures
+
+    Returns:
+        str: HTML-код страницы
+    """
+    with open(os.path.join(FIXTURES_DIR, filename), encoding='utf-8') as f:
+        return f.read()
+
+
+def measure(func, repeat, number=None):
+    """
+    Измеряет время выполнения и пиковое потребление памяти функции.
+
+    Args:
+        func (callable): Функция без аргументов
+        repeat (int): Количество повторов замера времени
+        number (int, optional): Вызовов в одном повторе. По умолчанию подбирается автоматически.
+
+    Returns:
+        dict: Словарь с ключами 'best', 'median' (секунд на вызов) и 'peak_memory' (байт)
+    """
+    timer = timeit.Timer(func)
+    if number is None:
+        # Подбираем количество вызовов так, чтобы один повтор занимал не меньше 0.2 секунды
+        number, _ = timer.autorange()
+        number = max(1, number // 2)
+
+    timings = [total / number for total in timer.repeat(repeat=repeat, number=number)]
+
+    tracemalloc.start()
+    func()
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'best': min(timings),
+        'median': statistics.median(timings),
+        'peak_memory': peak_memory,
+    }
+
+
+def run(backends, repeat):
+    """
+    Запускает все замеры.
+
+    Args:
+        backends (list): Движки разбора для функций parse_*
+        repeat (int): Количество повторов замера времени
+
+    Returns:
+        list: Список словарей с результатами замеров
+    """
+    results = []
+
+    for name, func, fixture, uses_backend in CASES:
+        html_content = load_fixture(fixture)
+        outputs = {}
+
+        for backend in (backends if uses_backend else [None]):
+            call = functools.partial(func, html_content, backend=backend) if uses_backend \
+                else functools.partial(func, html_content)
+            outputs[backend] = call()
+
+            stats = measure(call, repeat)
+            results.append({'function': name, 'fixture': fixture, 'backend': backend, 'size': len(html_content), **stats})
+            print(f"{name:<30} {fixture:<22} {backend or '-':<12} "
+                  f"{stats['best'] * 1000:>10.3f} мс {stats['median'] * 1000:>10.3f} мс "
+                  f"{stats['peak_memory'] / 1024:>10.1f} КБ")
+
+        # Результат не должен зависеть от движка разбора
+        reference = next(iter(outputs.values()))
+        for backend, output in outputs.items():
+            if output != reference:
+                print(f"ВНИМАНИЕ: {name} на {fixture}: результат движка {backend} отличается")
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк функций разбора страниц Flibusta")
+    parser.add_argument('--backend', action='append', choices=scraper.PARSER_BACKENDS,
+                        help="Движок разбора (можно указать несколько раз). По умолчанию все доступные.")
+    parser.add_argument('--repeat', type=int, default=5, help="Количество повторов замера времени")
+    parser.add_argument('--json', help="Сохранить результаты в JSON-файл")
+    args = parser.parse_args()
+
+    backends = args.backend or list(scraper.PARSER_BACKENDS)
+    if scraper.flibusta_lxml_parser is None:
+        backends = [backend for backend in backends if backend == 'html.parser']
+
+    print(f"{'функция':<30} {'образец':<22} {'движок':<12} {'лучшее':>13} {'медиана':>13} {'память':>13}")
+    results = run(backends, args.repeat)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\nРезультаты сохранены в файл: {args.json}")
+
+
+if __name__ == '__main__':
+    main()
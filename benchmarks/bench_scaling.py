@@ -0,0 +1,96 @@
+"""
+Бенчмарк масштабирования разбора страниц серии и автора по количеству строк книг.
+
+Страницы с заданным количеством книг строятся функциями сервера-заглушки
+flibusta_mock_server. Для каждого размера и движка разбора измеряется время
+разбора и время в пересчете на одну строку: при линейной сложности время на
+строку почти не меняется с ростом страницы, а рост в разы указывает на
+квадратичный проход по соседним узлам.
+
+    python benchmarks/bench_scaling.py
+    python benchmarks/bench_scaling.py --rows 100 --rows 1000 --rows 10000 --backend lxml-native
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import flibusta_online_scraper as scraper
+from bench_parsers import measure
+from flibusta_mock_server import author_page, series_page
+
+
+DEFAULT_ROWS = [100, 1000, 10000]
+
+# (название, функция разбора, построение страницы с заданным количеством книг)
+CASES = [
+    ('parse_series_books', scraper.parse_series_books, lambda rows: series_page(101, rows)),
+    ('parse_author_books', scraper.parse_author_books, lambda rows: author_page(201, rows)),
+]
+
+
+def run(backends, row_counts, repeat):
+    """
+    Запускает все замеры.
+
+    Args:
+        backends (list): Движки разбора
+        row_counts (list): Количества строк книг на странице
+        repeat (int): Количество повторов замера времени
+
+    Returns:
+        list: Список словарей с результатами замеров
+    """
+    results = []
+
+    for name, func, build_page in CASES:
+        for backend in backends:
+            base_per_row = None
+
+            for rows in row_counts:
+                html_content = build_page(rows)
+                parsed = len(func(html_content, backend=backend)['books'])
+                if parsed != rows:
+                    print(f"ВНИМАНИЕ: {name} на {rows} строках нашел {parsed} книг")
+
+                stats = measure(lambda: func(html_content, backend=backend), repeat)
+                per_row = stats['best'] / rows
+                if base_per_row is None:
+                    base_per_row = per_row
+
+                results.append({'function': name, 'backend': backend, 'rows': rows,
+                                'size': len(html_content), 'per_row': per_row, **stats})
+                print(f"{name:<20} {backend:<12} {rows:>8} {stats['best'] * 1000:>12.3f} мс "
+                      f"{per_row * 1e6:>10.2f} мкс {per_row / base_per_row:>8.2f}x")
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк масштабирования разбора страниц серии и автора")
+    parser.add_argument('--rows', action='append', type=int,
+                        help="Количество строк книг на странице (можно указать несколько раз). "
+                             f"По умолчанию {', '.join(map(str, DEFAULT_ROWS))}.")
+    parser.add_argument('--backend', action='append', choices=scraper.PARSER_BACKENDS,
+                        help="Движок разбора (можно указать несколько раз). По умолчанию все доступные.")
+    parser.add_argument('--repeat', type=int, default=3, help="Количество повторов замера времени")
+    parser.add_argument('--json', help="Сохранить результаты в JSON-файл")
+    args = parser.parse_args()
+
+    backends = args.backend or list(scraper.PARSER_BACKENDS)
+    if scraper.flibusta_lxml_parser is None:
+        backends = [backend for backend in backends if backend == 'html.parser']
+
+    print(f"{'функция':<20} {'движок':<12} {'строк':>8} {'время':>15} {'на строку':>14} {'к первому':>9}")
+    results = run(backends, sorted(args.rows or DEFAULT_ROWS), args.repeat)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\nРезультаты сохранены в файл: {args.json}")
+
+
+if __name__ == '__main__':
+    main()
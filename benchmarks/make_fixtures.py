@@ -0,0 +1,42 @@
+"""
+Генерирует крупные страницы-образцы для бенчмарков в разметке Flibusta.
+
+Небольшая страница поиска (search_small.html) записана вручную; остальные
+страницы строятся этим скриптом детерминированно теми же функциями, что и
+в сервере-заглушке flibusta_mock_server, чтобы их можно было пересоздать
+после изменения разметки:
+
+    python benchmarks/make_fixtures.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flibusta_mock_server import author_page, book_page, search_page, series_page
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+# Имя файла -> HTML-код страницы
+FIXTURES = {
+    'search_large.html': lambda: search_page(50, 50, 400, last_page=9),
+    'series_paginated.html': lambda: series_page(101, 50, last_page=4),
+    'author_huge.html': lambda: author_page(201, 3000),
+    'book_page.html': lambda: book_page(201005),
+}
+
+
+def main():
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+
+    for filename, build in FIXTURES.items():
+        path = os.path.join(FIXTURES_DIR, filename)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(build())
+        print(f"Создан файл {path}: {os.path.getsize(path)} байт")
+
+
+if __name__ == '__main__':
+    main()
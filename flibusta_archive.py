@@ -0,0 +1,240 @@
+"""
+Архив загруженных страниц Flibusta и повторный разбор без обращения к сети.
+
+Архив устроен по образцу WARC: каждая страница записывается отдельным
+gzip-блоком с заголовками (URL, дата, длина) и HTML-кодом, блоки дописываются
+в конец файла. Рядом хранится индекс (<архив>.idx) со смещением каждого блока,
+поэтому любую страницу можно прочитать без распаковки всего архива. Страница,
+уже записанная в архив, повторно не дописывается, поэтому архив не растет при
+повторных запусках с тем же запросом.
+
+Функция reparse прогоняет текущие функции parse_* по всем страницам архива
+в пуле процессов, что позволяет применить исправления разбора без повторного
+обхода сайта:
+
+    python flibusta_archive.py pages.warc.gz reparsed.jsonl --workers 8
+"""
+import argparse
+import functools
+import gzip
+import json
+import os
+import re
+import threading
+import zlib
+from datetime import datetime, timezone
+
+from flibusta_online_scraper import (
+    parse_author_books,
+    parse_book_page,
+    parse_search_page,
+    parse_series_books,
+)
+from flibusta_output import open_writer
+from flibusta_pipeline import ParsePipeline
+
+
+# Функции разбора по типам страниц: (шаблон пути URL, функция).
+# Для книг подходит только страница /b/<id>, но не ссылки на файлы /b/<id>/<формат>
+ARCHIVE_PARSERS = [
+    (re.compile(r'^/booksearch'), parse_search_page),
+    (re.compile(r'^/s/\d+'), parse_series_books),
+    (re.compile(r'^/a/\d+'), parse_author_books),
+    (re.compile(r'^/b/\d+$'), parse_book_page),
+]
+
+
+class PageArchive:
+    """
+    Архив страниц со сжатием и индексом по URL.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Путь к файлу архива, например pages.warc.gz
+        """
+        self.path = path
+        self.index_path = path + '.idx'
+        self._lock = threading.Lock()
+        self._index = {}
+
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        url = entry['url']
+                        location = (int(entry['offset']), int(entry['length']))
+                    except (ValueError, KeyError, TypeError):
+                        # Недописанная или поврежденная строка после аварийного завершения
+                        continue
+                    # Более поздняя запись страницы заменяет предыдущую
+                    self._index[url] = location
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, url):
+        return url in self._index
+
+    def add(self, url, html_content):
+        """
+        Дописывает страницу в архив, если ее там еще нет.
+
+        Args:
+            url (str): URL страницы
+            html_content (str): HTML-код страницы
+
+        Returns:
+            bool: True, если страница записана; False, если она уже была в архиве
+        """
+        if url in self._index:
+            return False
+
+        body = html_content.encode('utf-8')
+        header = (
+            'WARC/1.0\r\n'
+            'WARC-Type: response\r\n'
+            f'WARC-Target-URI: {url}\r\n'
+            f'WARC-Date: {datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")}\r\n'
+            'Content-Type: text/html; charset=utf-8\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            '\r\n'
+        ).encode('utf-8')
+        record = gzip.compress(header + body + b'\r\n\r\n')
+
+        with self._lock:
+            if url in self._index:
+                return False
+            with open(self.path, 'ab') as f:
+                offset = f.tell()
+                f.write(record)
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'url': url, 'offset': offset, 'length': len(record)}, ensure_ascii=False))
+                f.write('\n')
+            self._index[url] = (offset, len(record))
+
+        return True
+
+    def get(self, url):
+        """
+        Читает страницу из архива.
+
+        Args:
+            url (str): URL страницы
+
+        Returns:
+            str: HTML-код страницы или None, если страницы нет в архиве или ее запись повреждена
+        """
+        location = self._index.get(url)
+        if location is None:
+            return None
+
+        # Запись может быть недописана после аварийного завершения или не совпадать с индексом
+        try:
+            offset, length = location
+            with open(self.path, 'rb') as f:
+                f.seek(offset)
+                record = gzip.decompress(f.read(length))
+
+            header, _, body = record.partition(b'\r\n\r\n')
+            content_length = int(re.search(rb'Content-Length: (\d+)', header).group(1))
+            return body[:content_length].decode('utf-8')
+        except (OSError, EOFError, zlib.error, ValueError, AttributeError) as e:
+            print(f"Поврежденная запись архива для {url}: {e}")
+            return None
+
+    def urls(self):
+        """
+        Возвращает URL всех страниц архива в порядке их первой записи.
+
+        Returns:
+            list: Список URL
+        """
+        return list(self._index)
+
+
+def parser_for_url(url):
+    """
+    Подбирает функцию разбора по URL страницы.
+
+    Args:
+        url (str): URL страницы
+
+    Returns:
+        callable: Функция parse_* или None, если тип страницы не поддерживается
+    """
+    path = re.sub(r'^[a-z]+://[^/]+', '', url)
+
+    for pattern, parser in ARCHIVE_PARSERS:
+        if pattern.search(path):
+            return parser
+
+    return None
+
+
+def reparse(archive_path, writer=None, workers=None, backend=None):
+    """
+    Разбирает все страницы архива текущими функциями parse_* в пуле процессов.
+
+    Args:
+        archive_path (str): Путь к файлу архива
+        writer (callable, optional): Функция writer(url, result), вызываемая для каждой страницы.
+                                     Если не задана, результаты возвращаются словарем.
+        workers (int, optional): Количество процессов разбора. По умолчанию число ядер.
+        backend (str, optional): Движок разбора HTML для функций parse_*
+
+    Returns:
+        dict: Словарь {URL: результат разбора}, если writer не задан, иначе None
+    """
+    archive = PageArchive(archive_path)
+    collected = {} if writer is None else None
+
+    # Страницы читаются с локального диска, поэтому для загрузки хватает одного потока
+    pipeline = ParsePipeline(fetch=archive.get, fetch_workers=1, parse_workers=workers)
+
+    skipped = 0
+    for url in archive.urls():
+        parser = parser_for_url(url)
+        if parser is None:
+            skipped += 1
+            continue
+        if backend is not None:
+            parser = functools.partial(parser, backend=backend)
+        pipeline.submit(url, url, parser)
+
+    def collect(key, url, result):
+        if result is None:
+            return
+        if writer is None:
+            collected[url] = result
+        else:
+            writer(url, result)
+
+    pipeline.run(collect)
+
+    if skipped:
+        print(f"Пропущено страниц неподдерживаемого типа: {skipped}")
+
+    return collected
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Повторный разбор архива страниц Flibusta без обращения к сети")
+    parser.add_argument('archive', help="Путь к файлу архива")
+    parser.add_argument('output', help="Файл JSONL для результатов")
+    parser.add_argument('--workers', type=int, default=None, help="Количество процессов разбора")
+    parser.add_argument('--backend', default=None, help="Движок разбора HTML")
+    args = parser.parse_args()
+
+    # Результаты записываются по мере разбора и не накапливаются в памяти
+    with open_writer(args.output, 'jsonl') as output:
+        reparse(args.archive, writer=lambda url, result: output.write({'url': url, 'result': result}),
+                workers=args.workers, backend=args.backend)
+
+    print(f"Разобрано страниц: {output.count}, результаты сохранены в файл: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
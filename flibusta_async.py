@@ -0,0 +1,413 @@
+"""
+Асинхронный движок обхода Flibusta на aiohttp.
+
+Страницы пагинации и подробная информация о сериях и авторах загружаются
+параллельно. Общее число одновременных запросов ограничено max_concurrency,
+а к одному хосту - per_host_limit одновременными запросами. Частота запросов
+ограничивается тем же RateLimiter, что и у синхронного клиента, поэтому
+бюджет запросов к сайту остается общим.
+
+Как и синхронный клиент, движок использует кэш ответов и архив страниц из
+flibusta_http (если они включены), контрольную точку обхода и хранилище
+сущностей EntityStore. Разбор страниц выполняется в пуле потоков (или в
+переданном пуле процессов), чтобы не останавливать цикл событий.
+"""
+import asyncio
+import time
+import urllib.parse
+
+import aiohttp
+
+import flibusta_http
+import flibusta_metrics
+import flibusta_records
+from flibusta_entities import EntityStore
+from flibusta_online_scraper import (
+    _unique_entities,
+    build_search_url,
+    paginated_url,
+    parse_search_page,
+    parse_series_books,
+    parse_author_books,
+)
+
+
+# Максимальное число одновременных запросов за весь обход
+DEFAULT_MAX_CONCURRENCY = 8
+
+# Максимальное число одновременных запросов к одному хосту
+DEFAULT_PER_HOST_LIMIT = 2
+
+
+class AsyncCrawler:
+    """
+    Асинхронный обходчик страниц Flibusta с ограничением параллелизма.
+
+    Использование:
+        async with AsyncCrawler() as crawler:
+            results = await crawler.parse_all_pages('стругацкие')
+    """
+
+    def __init__(self, max_concurrency=DEFAULT_MAX_CONCURRENCY, per_host_limit=DEFAULT_PER_HOST_LIMIT,
+                 rate_limiter=None, checkpoint=None, parse_executor=None):
+        """
+        Args:
+            max_concurrency (int, optional): Общее ограничение одновременных запросов
+            per_host_limit (int, optional): Ограничение одновременных запросов к одному хосту
+            rate_limiter (RateLimiter, optional): Ограничитель частоты запросов.
+                                                  По умолчанию общий ограничитель flibusta_http.
+            checkpoint (CrawlCheckpoint, optional): Контрольная точка обхода. Уже обработанные
+                                                    страницы берутся из нее без запроса к сайту.
+            parse_executor (Executor, optional): Пул, в котором разбираются страницы.
+                                                 По умолчанию пул потоков цикла событий.
+        """
+        self.max_concurrency = max_concurrency
+        self.per_host_limit = per_host_limit
+        self.rate_limiter = rate_limiter or flibusta_http.get_rate_limiter()
+        self.checkpoint = checkpoint
+        self.parse_executor = parse_executor
+
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._host_semaphores = {}
+        self._session = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency, limit_per_host=self.per_host_limit)
+        headers = {**flibusta_http.DEFAULT_HEADERS, 'Referer': flibusta_records.FLIBUSTA_URL + '/'}
+        timeout = flibusta_http.get_timeout()
+        if isinstance(timeout, tuple):
+            client_timeout = aiohttp.ClientTimeout(sock_connect=timeout[0], sock_read=timeout[1])
+        else:
+            client_timeout = aiohttp.ClientTimeout(total=timeout)
+        self._session = aiohttp.ClientSession(connector=connector, headers=headers, timeout=client_timeout)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._session.close()
+        self._session = None
+
+    async def fetch(self, url, revalidate=False):
+        """
+        Выполняет GET-запрос с учетом ограничений и повторных попыток и возвращает HTML-код страницы.
+
+        Args:
+            url (str): URL страницы
+            revalidate (bool, optional): Перепроверять запись кэша у сервера, даже если она свежая
+
+        Returns:
+            str: HTML-код страницы или None в случае ошибки
+        """
+        # Кэш, условные заголовки, обработка ответа и решение о повторе общие с flibusta_http.fetch
+        html_content, cached, headers = flibusta_http.prepare_request(url, revalidate)
+        if html_content is not None:
+            return html_content
+
+        metrics = flibusta_metrics.get_metrics()
+        attempt = 0
+
+        while True:
+            request_url, mirror = flibusta_http.mirror_url(url)
+            host = urllib.parse.urlsplit(request_url).netloc
+            host_semaphore = self._host_semaphores.setdefault(host, asyncio.Semaphore(self.per_host_limit))
+
+            async with self._semaphore, host_semaphore:
+                metrics.record_wait(await self.rate_limiter.acquire_async())
+
+                start = time.perf_counter()
+                try:
+                    async with self._session.get(request_url, headers=headers) as response:
+                        ttfb = time.perf_counter() - start
+                        body = await response.read()
+                        metrics.record_fetch(url, response.status, time.perf_counter() - start,
+                                             ttfb=ttfb, size=len(body))
+                        self.rate_limiter.on_response(response.status)
+
+                        delay = flibusta_http.retry_delay(url, attempt, mirror, status_code=response.status,
+                                                          retry_after=response.headers.get('Retry-After'))
+                        if delay is None:
+                            html_content = await response.text() if response.status == 200 else None
+                            return flibusta_http.finish_response(url, response.status, html_content,
+                                                                 response.headers, cached)
+                except Exception as e:
+                    metrics.record_fetch(url, 'error', time.perf_counter() - start)
+                    delay = flibusta_http.retry_delay(url, attempt, mirror, error=e)
+                    if delay is None:
+                        print(f"Ошибка при выполнении запроса: {e}")
+                        return None
+
+            # Ждем повтора, не занимая слоты одновременных запросов
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def parse(self, parser, html_content):
+        """
+        Разбирает страницу в пуле parse_executor, не занимая цикл событий.
+
+        Args:
+            parser (callable): Функция разбора HTML-кода страницы
+            html_content (str): HTML-код страницы
+
+        Returns:
+            dict: Результат разбора
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.parse_executor, parser, html_content)
+
+    async def fetch_and_parse(self, url, parser):
+        """
+        Загружает страницу и разбирает ее. Если задана контрольная точка, уже
+        обработанные страницы берутся из нее, а новые результаты в нее записываются.
+
+        Args:
+            url (str): URL страницы
+            parser (callable): Функция разбора HTML-кода страницы
+
+        Returns:
+            dict: Результат разбора страницы или None в случае ошибки
+        """
+        if self.checkpoint is not None:
+            result = self.checkpoint.get(url)
+            if result is not None:
+                return result
+
+        html_content = await self.fetch(url)
+        if not html_content:
+            return None
+
+        result = await self.parse(parser, html_content)
+
+        if self.checkpoint is not None:
+            self.checkpoint.put(url, result)
+
+        return result
+
+    async def get_search_results_page(self, query, page=0):
+        """
+        Получает HTML-код страницы результатов поиска.
+
+        Args:
+            query (str): Поисковый запрос пользователя
+            page (int, optional): Номер страницы результатов. По умолчанию 0.
+
+        Returns:
+            str: HTML-код страницы или None в случае ошибки
+        """
+        return await self.fetch(build_search_url(query, page))
+
+    async def parse_all_pages(self, query, max_pages=None, store=None):
+        """
+        Загружает все страницы результатов поиска параллельно и собирает информацию.
+
+        Args:
+            query (str): Поисковый запрос пользователя
+            max_pages (int, optional): Максимальное количество страниц для обработки
+                                      Если None, обрабатываются все найденные страницы
+            store (EntityStore, optional): Хранилище, в которое добавляются найденные сущности
+
+        Returns:
+            dict: Словарь с собранной информацией о сериях, авторах и книгах.
+                  Сущности, встретившиеся на нескольких страницах, включаются один раз.
+        """
+        first_page = await self.fetch_and_parse(build_search_url(query), parse_search_page)
+
+        if not first_page:
+            print("Не удалось получить результаты поиска.")
+            return None
+
+        total_pages = first_page['total_pages']
+
+        if max_pages is not None and max_pages < total_pages:
+            total_pages = max_pages
+
+        print(f"Всего страниц с результатами: {total_pages}")
+
+        # Остальные страницы загружаем одновременно, результаты собираем в порядке страниц
+        pages = await asyncio.gather(*(self.fetch_and_parse(build_search_url(query, page), parse_search_page)
+                                       for page in range(1, total_pages)))
+
+        all_series = []
+        all_authors = []
+        all_books = []
+        seen = set()
+
+        for page, page_result in enumerate([first_page, *pages]):
+            if not page_result:
+                print(f"Не удалось получить страницу {page + 1}")
+                continue
+
+            all_series.extend(_unique_entities(page_result['series'], seen))
+            all_authors.extend(_unique_entities(page_result['authors'], seen))
+            all_books.extend(_unique_entities(page_result['books'], seen))
+
+            if store is not None:
+                store.add_search_results(page_result['series'], page_result['authors'], page_result['books'])
+
+        return {
+            'query': query,
+            'total_pages': total_pages,
+            'series': all_series,
+            'authors': all_authors,
+            'books': all_books,
+            'stats': {
+                'series_count': len(all_series),
+                'authors_count': len(all_authors),
+                'books_count': len(all_books)
+            }
+        }
+
+    async def _get_paginated_books(self, url, parser, info_key, entity_name):
+        """
+        Загружает первую страницу сущности, а затем все остальные страницы параллельно.
+
+        Args:
+            url (str): URL страницы серии или автора
+            parser (callable): Функция разбора страницы
+            info_key (str): Ключ словаря с информацией о сущности ('series_info' или 'author_info')
+            entity_name (str): Название сущности для сообщений ('серии' или 'автора')
+
+        Returns:
+            dict: Результат разбора с полным списком книг или None в случае ошибки
+        """
+        result = await self.fetch_and_parse(url, parser)
+
+        if not result:
+            print(f"Не удалось получить страницу {entity_name}: {url}")
+            return None
+
+        total_pages = result[info_key].get('total_pages', 1)
+
+        if total_pages > 1:
+            pages = await asyncio.gather(*(self.fetch_and_parse(paginated_url(url, page), parser)
+                                           for page in range(1, total_pages)))
+
+            for page, page_result in enumerate(pages, start=1):
+                if page_result:
+                    result['books'].extend(page_result['books'])
+                else:
+                    print(f"Не удалось получить страницу {page + 1} {entity_name}")
+
+        return result
+
+    async def get_series_books(self, series_url):
+        """
+        Получает информацию о книгах из серии, включая все страницы пагинации.
+
+        Args:
+            series_url (str): URL страницы серии
+
+        Returns:
+            dict: Словарь с информацией о серии и полный список книг
+        """
+        return await self._get_paginated_books(series_url, parse_series_books, 'series_info', 'серии')
+
+    async def get_author_books(self, author_url):
+        """
+        Получает информацию о книгах автора, включая все страницы пагинации.
+
+        Args:
+            author_url (str): URL страницы автора
+
+        Returns:
+            dict: Словарь с информацией об авторе и полный список книг
+        """
+        return await self._get_paginated_books(author_url, parse_author_books, 'author_info', 'автора')
+
+    async def get_details(self, results, store=None):
+        """
+        Параллельно собирает подробную информацию о сериях и авторах из результатов поиска.
+
+        Args:
+            results (dict): Результаты parse_all_pages
+            store (EntityStore, optional): Хранилище сущностей. Страницы, уже загруженные
+                                           в этом хранилище, пропускаются, а найденные книги
+                                           добавляются в него.
+
+        Returns:
+            dict: Словарь с подробной информацией о сериях и авторах
+        """
+        if store is None:
+            store = EntityStore()
+
+        series_urls = [series['url'] for series in results['series'] if store.claim(series['url'])]
+        author_urls = [author['url'] for author in results['authors'] if store.claim(author['url'])]
+
+        series_details, authors_details = await asyncio.gather(
+            asyncio.gather(*(self.get_series_books(url) for url in series_urls)),
+            asyncio.gather(*(self.get_author_books(url) for url in author_urls))
+        )
+
+        for url, details in zip(series_urls, series_details):
+            if details:
+                store.add_series_details(url, details)
+        for url, details in zip(author_urls, authors_details):
+            if details:
+                store.add_author_details(url, details)
+
+        return {
+            'query': results['query'],
+            'series_details': [details for details in series_details if details],
+            'authors_details': [details for details in authors_details if details]
+        }
+
+
+async def async_parse_all_pages(query, max_pages=None, store=None, **crawler_options):
+    """
+    Асинхронная версия parse_all_pages.
+
+    Args:
+        query (str): Поисковый запрос пользователя
+        max_pages (int, optional): Максимальное количество страниц для обработки
+        store (EntityStore, optional): Хранилище, в которое добавляются найденные сущности
+        **crawler_options: Параметры AsyncCrawler
+
+    Returns:
+        dict: Словарь с собранной информацией о сериях, авторах и книгах
+    """
+    async with AsyncCrawler(**crawler_options) as crawler:
+        return await crawler.parse_all_pages(query, max_pages, store)
+
+
+async def async_get_series_books(series_url, **crawler_options):
+    """
+    Асинхронная версия get_series_books.
+
+    Args:
+        series_url (str): URL страницы серии
+        **crawler_options: Параметры AsyncCrawler
+
+    Returns:
+        dict: Словарь с информацией о серии и полный список книг
+    """
+    async with AsyncCrawler(**crawler_options) as crawler:
+        return await crawler.get_series_books(series_url)
+
+
+async def async_get_author_books(author_url, **crawler_options):
+    """
+    Асинхронная версия get_author_books.
+
+    Args:
+        author_url (str): URL страницы автора
+        **crawler_options: Параметры AsyncCrawler
+
+    Returns:
+        dict: Словарь с информацией об авторе и полный список книг
+    """
+    async with AsyncCrawler(**crawler_options) as crawler:
+        return await crawler.get_author_books(author_url)
+
+
+async def async_get_details(results, store=None, **crawler_options):
+    """
+    Асинхронная версия цикла сбора подробной информации из main().
+
+    Args:
+        results (dict): Результаты parse_all_pages
+        store (EntityStore, optional): Хранилище сущностей, см. AsyncCrawler.get_details
+        **crawler_options: Параметры AsyncCrawler
+
+    Returns:
+        dict: Словарь с подробной информацией о сериях и авторах
+    """
+    async with AsyncCrawler(**crawler_options) as crawler:
+        return await crawler.get_details(results, store)
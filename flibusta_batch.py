@@ -0,0 +1,367 @@
+"""
+Пакетный обход Flibusta: много поисковых запросов за один запуск.
+
+Все запросы выполняются в одном процессе и проходят через общую HTTP-сессию,
+общий ограничитель частоты запросов и общее хранилище сущностей, поэтому
+страница серии или автора, найденная несколькими запросами, загружается
+один раз. Результаты поиска каждого запроса сохраняются в отдельный файл,
+подробности о сериях и авторах - в общий файл details.jsonl (по одной записи
+на сущность), а сводка по всем запросам - в manifest.json.
+
+Запуск не требует ввода с клавиатуры и подходит для cron. Если предыдущий
+запуск с тем же каталогом прервался, уже выполненные запросы пропускаются,
+а обработанные страницы берутся из контрольной точки.
+
+    python flibusta_batch.py queries.txt --output-dir batch_results --max-pages 5
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import flibusta_http
+import flibusta_metrics
+from flibusta_checkpoint import CrawlCheckpoint
+from flibusta_entities import EntityStore
+from flibusta_index import SearchIndex
+from flibusta_online_scraper import (
+    get_author_books,
+    get_series_books,
+    parse_all_pages,
+    query_slug,
+    save_results_to_json,
+)
+
+
+# Количество запросов, обрабатываемых одновременно. Страницы каждого запроса
+# дополнительно загружаются параллельно (DEFAULT_PAGE_WORKERS), а общую частоту
+# запросов ограничивает RateLimiter из flibusta_http.
+DEFAULT_QUERY_WORKERS = 2
+
+MANIFEST_FILENAME = 'manifest.json'
+DETAILS_FILENAME = 'details.jsonl'
+CHECKPOINT_FILENAME = 'checkpoint.sqlite'
+
+
+def read_queries(filename):
+    """
+    Читает поисковые запросы из текстового файла: по одному в строке, пустые
+    строки и строки, начинающиеся с '#', пропускаются. Повторы отбрасываются.
+
+    Args:
+        filename (str): Имя файла или '-' для чтения из стандартного ввода
+
+    Returns:
+        list: Запросы в порядке первого появления
+    """
+    if filename == '-':
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(filename, encoding='utf-8') as f:
+            lines = f.read().splitlines()
+
+    queries = [line.strip() for line in lines if line.strip() and not line.lstrip().startswith('#')]
+    return list(dict.fromkeys(queries))
+
+
+def query_filename(query):
+    """
+    Строит имя файла результатов запроса.
+
+    Args:
+        query (str): Поисковый запрос
+
+    Returns:
+        str: Имя файла вида search_<запрос>_<хэш>.json. Короткий хэш исходного запроса
+             различает запросы, дающие одинаковое имя ("Война и мир" и "война-и-мир").
+    """
+    digest = hashlib.sha1(query.encode('utf-8')).hexdigest()[:8]
+    return f"search_{query_slug(query)}_{digest}.json"
+
+
+class BatchCrawler:
+    """
+    Пакетный обход поисковых запросов с общим хранилищем сущностей и бюджетом запросов.
+
+    Использование:
+        crawler = BatchCrawler('batch_results', max_pages=5)
+        manifest = crawler.run(['стругацкие', 'лем'])
+    """
+
+    def __init__(self, output_dir, max_pages=None, details=True, workers=DEFAULT_QUERY_WORKERS,
+                 max_requests=None, index_path=None):
+        """
+        Args:
+            output_dir (str): Каталог для результатов, манифеста и контрольной точки
+            max_pages (int, optional): Максимальное количество страниц поиска на запрос
+            details (bool, optional): Собирать подробности о найденных сериях и авторах
+            workers (int, optional): Количество одновременно обрабатываемых запросов
+            max_requests (int, optional): Бюджет сетевых запросов на весь запуск.
+                                          После его исчерпания новые запросы не начинаются.
+            index_path (str, optional): Файл локального поискового индекса (flibusta_index),
+                                        в который добавляются найденные сущности
+        """
+        self.output_dir = output_dir
+        self.max_pages = max_pages
+        self.details = details
+        self.workers = workers
+        self.max_requests = max_requests
+        self.index_path = index_path
+
+        self.store = EntityStore()
+        self.manifest_path = os.path.join(output_dir, MANIFEST_FILENAME)
+        self.details_path = os.path.join(output_dir, DETAILS_FILENAME)
+        self.checkpoint_path = os.path.join(output_dir, CHECKPOINT_FILENAME)
+
+        self._lock = threading.Lock()
+        self._manifest = None
+        self._details_file = None
+        self._initial_requests = 0
+
+    def budget_exhausted(self):
+        """
+        Проверяет, исчерпан ли бюджет сетевых запросов.
+
+        Returns:
+            bool: True, если новых запросов к сайту делать не следует
+        """
+        if self.max_requests is None:
+            return False
+        used = flibusta_metrics.get_metrics().request_count() - self._initial_requests
+        return used >= self.max_requests
+
+    def _load_manifest(self):
+        """
+        Загружает манифест прерванного запуска или начинает новый.
+
+        Returns:
+            dict: Манифест
+        """
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding='utf-8') as f:
+                manifest = json.load(f)
+
+            if manifest.get('finished_at') is None:
+                print(f"Продолжаем прерванный пакетный обход: выполнено запросов: "
+                      f"{sum(1 for entry in manifest['queries'].values() if entry['status'] == 'ok')}")
+                return manifest
+
+        # Предыдущий запуск завершен: результаты обновляются заново
+        if os.path.exists(self.details_path):
+            os.remove(self.details_path)
+
+        return {'started_at': time.time(), 'finished_at': None, 'queries': {}}
+
+    def _save_manifest(self):
+        """
+        Сохраняет манифест. Файл заменяется целиком, поэтому его можно читать во время обхода.
+        """
+        temp_path = self.manifest_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._manifest, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.manifest_path)
+
+    def _claim_written_details(self):
+        """
+        Отмечает сущности, подробности о которых уже записаны прерванным запуском,
+        чтобы они не загружались и не записывались повторно.
+        """
+        if not os.path.exists(self.details_path):
+            return
+
+        with open(self.details_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Последняя строка могла оборваться при падении
+                    continue
+                self.store.claim(record['url'])
+
+    def _write_details(self, record):
+        """
+        Дописывает подробности о сущности в общий файл.
+
+        Args:
+            record (dict): Запись с ключами 'type', 'url', 'query' и результатом get_*_books
+        """
+        with self._lock:
+            self._details_file.write(json.dumps(record, ensure_ascii=False))
+            self._details_file.write('\n')
+            self._details_file.flush()
+
+    def _crawl_details(self, query, results, checkpoint):
+        """
+        Собирает подробности о сериях и авторах запроса, которые еще не загружались в этом запуске.
+
+        Returns:
+            tuple: (количество загруженных сущностей, признак остановки по бюджету)
+        """
+        fetched = 0
+        entities = [('series_details', series['url'], get_series_books, self.store.add_series_details)
+                    for series in results['series']]
+        entities += [('author_details', author['url'], get_author_books, self.store.add_author_details)
+                     for author in results['authors']]
+
+        for details_type, url, get_books, add_details in entities:
+            if self.budget_exhausted():
+                return fetched, True
+
+            if not self.store.claim(url):
+                continue
+
+            details = get_books(url, checkpoint)
+            if details:
+                add_details(url, details)
+                self._write_details({'type': details_type, 'url': url, 'query': query, **details})
+                fetched += 1
+
+        return fetched, False
+
+    def _run_query(self, query, checkpoint):
+        """
+        Выполняет один поисковый запрос: поиск, сохранение результатов и подробности.
+
+        Returns:
+            dict: Запись манифеста о запросе
+        """
+        entry = {'status': 'failed', 'output': None}
+
+        if self.budget_exhausted():
+            entry['status'] = 'budget'
+            return entry
+
+        start = time.perf_counter()
+        print(f"\nЗапрос: {query}")
+
+        results = parse_all_pages(query, self.max_pages, checkpoint, self.store)
+        if results:
+            filename = query_filename(query)
+            save_results_to_json(results, os.path.join(self.output_dir, filename))
+
+            entry.update(results['stats'])
+            entry['output'] = filename
+            entry['status'] = 'ok'
+
+            if self.details:
+                fetched, stopped = self._crawl_details(query, results, checkpoint)
+                entry['details_fetched'] = fetched
+                if stopped:
+                    # Запрос будет продолжен при следующем запуске
+                    entry['status'] = 'budget'
+
+        entry['seconds'] = round(time.perf_counter() - start, 3)
+        return entry
+
+    def _finish_query(self, query, future):
+        """
+        Записывает результат запроса в манифест.
+        """
+        try:
+            entry = future.result()
+        except Exception as e:
+            print(f"Ошибка при обработке запроса {query}: {e}")
+            entry = {'status': 'failed', 'output': None, 'error': str(e)}
+
+        with self._lock:
+            self._manifest['queries'][query] = entry
+            self._save_manifest()
+
+    def run(self, queries):
+        """
+        Выполняет все запросы.
+
+        Args:
+            queries (iterable): Поисковые запросы
+
+        Returns:
+            dict: Манифест: время начала и окончания, запись о каждом запросе и сводка
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        self._manifest = self._load_manifest()
+        self._claim_written_details()
+        self._initial_requests = flibusta_metrics.get_metrics().request_count()
+
+        # Записи манифеста о запросах, которых нет в текущем списке, не влияют на завершенность обхода
+        queries = list(dict.fromkeys(queries))
+        done = {query for query, entry in self._manifest['queries'].items() if entry['status'] == 'ok'}
+        pending = [query for query in queries if query not in done]
+        print(f"Запросов к выполнению: {len(pending)}, уже выполнено: {len(queries) - len(pending)}")
+
+        checkpoint = CrawlCheckpoint(self.checkpoint_path)
+        self._details_file = open(self.details_path, 'a', encoding='utf-8')
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                futures = [(query, executor.submit(self._run_query, query, checkpoint)) for query in pending]
+                for query, future in futures:
+                    self._finish_query(query, future)
+        finally:
+            self._details_file.close()
+            checkpoint.close()
+
+        statuses = [self._manifest['queries'][query]['status'] for query in queries]
+        complete = all(status == 'ok' for status in statuses)
+
+        self._manifest['metrics'] = flibusta_metrics.get_metrics().summary()
+        self._manifest['stats'] = {
+            'queries': len(statuses),
+            'ok': statuses.count('ok'),
+            'failed': statuses.count('failed'),
+            'budget': statuses.count('budget'),
+            **self.store.to_dict()['stats']
+        }
+
+        if complete:
+            # Все запросы выполнены: контрольная точка больше не нужна
+            self._manifest['finished_at'] = time.time()
+            os.remove(self.checkpoint_path)
+
+        self._save_manifest()
+
+        if self.index_path:
+            with SearchIndex(self.index_path) as index:
+                index.add_store(self.store)
+                print(f"Локальный индекс обновлен: {self.index_path}, книг в индексе: {len(index)}")
+
+        stats = self._manifest['stats']
+        print(f"\nПакетный обход {'завершен' if complete else 'прерван'}: выполнено {stats['ok']} "
+              f"из {stats['queries']} запросов, ошибок: {stats['failed']}, "
+              f"остановлено по бюджету: {stats['budget']}")
+        print(f"Манифест: {self.manifest_path}")
+        print(f"\nМетрики: {flibusta_metrics.get_metrics().report()}")
+
+        return self._manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакетный обход поисковых запросов Flibusta")
+    parser.add_argument('queries', help="Текстовый файл с запросами, по одному в строке ('-' - стандартный ввод)")
+    parser.add_argument('--output-dir', default='flibusta_batch', help="Каталог для результатов")
+    parser.add_argument('--max-pages', type=int, default=None, help="Максимум страниц поиска на запрос")
+    parser.add_argument('--no-details', action='store_true', help="Не собирать подробности о сериях и авторах")
+    parser.add_argument('--workers', type=int, default=DEFAULT_QUERY_WORKERS,
+                        help="Количество одновременно обрабатываемых запросов")
+    parser.add_argument('--rate', type=float, default=None, help="Ограничение частоты запросов (в секунду)")
+    parser.add_argument('--max-requests', type=int, default=None, help="Бюджет сетевых запросов на запуск")
+    parser.add_argument('--index', default=None, help="Файл локального поискового индекса для пополнения")
+    args = parser.parse_args()
+
+    if args.rate:
+        flibusta_http.configure_rate_limit(rate=args.rate, burst=flibusta_http.burst_for_rate(args.rate))
+
+    crawler = BatchCrawler(args.output_dir, max_pages=args.max_pages, details=not args.no_details,
+                           workers=args.workers, max_requests=args.max_requests, index_path=args.index)
+    manifest = crawler.run(read_queries(args.queries))
+
+    # Ненулевой код возврата, если не все запросы выполнены: cron и обертки увидят сбой
+    sys.exit(0 if manifest['finished_at'] is not None else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,244 @@
+"""
+Постоянный кэш HTTP-ответов Flibusta на диске.
+
+Каждый ответ хранится в двух файлах, имена которых получены из SHA-256 от URL:
+сжатое тело страницы (.zz) и метаданные (.json) с ETag, Last-Modified и временем
+загрузки. Срок свежести зависит от типа страницы: результаты поиска устаревают
+быстро, страницы книг и авторов - медленно. Устаревшие записи не удаляются, а
+используются для условных запросов If-None-Match / If-Modified-Since. Общий
+размер кэша ограничен, при превышении удаляются давно не использовавшиеся записи.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import zlib
+
+
+# Максимальный размер кэша на диске в байтах
+DEFAULT_MAX_SIZE = 512 * 1024 * 1024
+
+# Срок свежести страниц, не подходящих ни под один шаблон, в секундах
+DEFAULT_TTL = 24 * 3600
+
+# Сроки свежести по типам страниц: (шаблон пути URL, срок в секундах)
+DEFAULT_TTLS = [
+    (r'^/booksearch', 3600),
+    (r'^/b/\d+', 30 * 24 * 3600),
+    (r'^/a/\d+', 7 * 24 * 3600),
+    (r'^/s/\d+', 24 * 3600),
+]
+
+
+class ResponseCache:
+    """
+    Кэш ответов на диске с TTL по типам URL и вытеснением по принципу LRU.
+    """
+
+    def __init__(self, directory, max_size=DEFAULT_MAX_SIZE, ttls=None, default_ttl=DEFAULT_TTL):
+        """
+        Args:
+            directory (str): Каталог для хранения кэша
+            max_size (int, optional): Максимальный размер кэша в байтах
+            ttls (list, optional): Список пар (шаблон пути URL, срок свежести в секундах).
+                                   По умолчанию DEFAULT_TTLS.
+            default_ttl (int, optional): Срок свежести для остальных страниц
+        """
+        self.directory = directory
+        self.max_size = max_size
+        self.ttls = [(re.compile(pattern), ttl) for pattern, ttl in (ttls or DEFAULT_TTLS)]
+        self.default_ttl = default_ttl
+
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        self._size = sum(size for _, size, _ in self._scan())
+
+    def _paths(self, url):
+        """
+        Возвращает пути к файлам тела и метаданных записи для URL.
+
+        Args:
+            url (str): URL страницы
+
+        Returns:
+            tuple: (путь к телу, путь к метаданным)
+        """
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.directory, key[:2], key)
+        return base + '.zz', base + '.json'
+
+    def _scan(self):
+        """
+        Перебирает записи кэша на диске.
+
+        Yields:
+            tuple: (путь к метаданным, размер записи в байтах, время последнего использования)
+        """
+        for subdir in os.scandir(self.directory):
+            if not subdir.is_dir():
+                continue
+            for entry in os.scandir(subdir.path):
+                if not entry.name.endswith('.json'):
+                    continue
+                body_path = entry.path[:-len('.json')] + '.zz'
+                try:
+                    size = entry.stat().st_size + os.path.getsize(body_path)
+                except OSError:
+                    continue
+                yield entry.path, size, entry.stat().st_mtime
+
+    def ttl_for(self, url):
+        """
+        Определяет срок свежести страницы по ее URL.
+
+        Args:
+            url (str): URL страницы
+
+        Returns:
+            int: Срок свежести в секундах
+        """
+        path = re.sub(r'^[a-z]+://[^/]+', '', url)
+
+        for pattern, ttl in self.ttls:
+            if pattern.search(path):
+                return ttl
+
+        return self.default_ttl
+
+    def get(self, url):
+        """
+        Возвращает запись кэша для URL.
+
+        Args:
+            url (str): URL страницы
+
+        Returns:
+            dict: Словарь с ключами 'body', 'etag', 'last_modified', 'fetched_at' и 'fresh'
+                  или None, если записи нет
+        """
+        body_path, meta_path = self._paths(url)
+
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = zlib.decompress(f.read()).decode('utf-8')
+        except (OSError, ValueError, zlib.error):
+            return None
+
+        # Обновляем время изменения метаданных - по нему определяется порядок вытеснения
+        try:
+            os.utime(meta_path)
+        except OSError:
+            pass
+
+        return {
+            'body': body,
+            'etag': meta.get('etag'),
+            'last_modified': meta.get('last_modified'),
+            'fetched_at': meta['fetched_at'],
+            'fresh': time.time() - meta['fetched_at'] < self.ttl_for(url)
+        }
+
+    def put(self, url, body, etag=None, last_modified=None):
+        """
+        Сохраняет ответ в кэш.
+
+        Args:
+            url (str): URL страницы
+            body (str): HTML-код страницы
+            etag (str, optional): Значение заголовка ETag
+            last_modified (str, optional): Значение заголовка Last-Modified
+        """
+        body_path, meta_path = self._paths(url)
+        data = zlib.compress(body.encode('utf-8'), 6)
+        meta = json.dumps({
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'fetched_at': time.time()
+        }, ensure_ascii=False)
+
+        with self._lock:
+            old_size = self._entry_size(body_path, meta_path)
+
+            os.makedirs(os.path.dirname(body_path), exist_ok=True)
+            self._write_atomic(body_path, data)
+            self._write_atomic(meta_path, meta.encode('utf-8'))
+
+            self._size += self._entry_size(body_path, meta_path) - old_size
+
+            if self._size > self.max_size:
+                self._evict()
+
+    def refresh(self, url):
+        """
+        Отмечает запись как заново подтвержденную сервером (ответ 304 Not Modified).
+
+        Args:
+            url (str): URL страницы
+        """
+        _, meta_path = self._paths(url)
+
+        with self._lock:
+            try:
+                with open(meta_path, encoding='utf-8') as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                return
+
+            meta['fetched_at'] = time.time()
+            self._write_atomic(meta_path, json.dumps(meta, ensure_ascii=False).encode('utf-8'))
+
+    def _entry_size(self, body_path, meta_path):
+        """
+        Возвращает размер записи на диске.
+
+        Args:
+            body_path (str): Путь к телу
+            meta_path (str): Путь к метаданным
+
+        Returns:
+            int: Размер в байтах или 0, если записи нет
+        """
+        size = 0
+        for path in (body_path, meta_path):
+            try:
+                size += os.path.getsize(path)
+            except OSError:
+                pass
+        return size
+
+    def _write_atomic(self, path, data):
+        """
+        Записывает файл через временный файл, чтобы прерванная запись не испортила кэш.
+
+        Args:
+            path (str): Путь к файлу
+            data (bytes): Содержимое файла
+        """
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _evict(self):
+        """
+        Удаляет давно не использовавшиеся записи, пока размер кэша превышает 90% от max_size.
+        """
+        target = self.max_size * 0.9
+
+        for meta_path, size, _ in sorted(self._scan(), key=lambda entry: entry[2]):
+            if self._size <= target:
+                break
+
+            for path in (meta_path, meta_path[:-len('.json')] + '.zz'):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+            self._size -= size
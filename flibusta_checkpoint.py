@@ -0,0 +1,91 @@
+"""
+Контрольные точки обхода Flibusta в SQLite.
+
+Для каждой обработанной страницы сохраняется ее URL и результат разбора.
+При повторном запуске обхода с той же контрольной точкой уже обработанные
+страницы не загружаются заново, а их результат берется из базы.
+"""
+import json
+import sqlite3
+import threading
+import time
+
+
+class CrawlCheckpoint:
+    """
+    Хранилище обработанных URL и результатов их разбора.
+
+    Использование:
+        with CrawlCheckpoint('crawl.sqlite') as checkpoint:
+            results = parse_all_pages('стругацкие', checkpoint=checkpoint)
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Путь к файлу базы SQLite
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS pages ('
+            'url TEXT PRIMARY KEY, '
+            'result TEXT NOT NULL, '
+            'completed_at REAL NOT NULL)'
+        )
+        self._connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __contains__(self, url):
+        with self._lock:
+            row = self._connection.execute('SELECT 1 FROM pages WHERE url = ?', (url,)).fetchone()
+        return row is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(*) FROM pages').fetchone()[0]
+
+    def get(self, url):
+        """
+        Возвращает сохраненный результат разбора страницы.
+
+        Args:
+            url (str): URL страницы
+
+        Returns:
+            dict: Результат разбора или None, если страница еще не обработана
+        """
+        with self._lock:
+            row = self._connection.execute('SELECT result FROM pages WHERE url = ?', (url,)).fetchone()
+
+        return json.loads(row[0]) if row else None
+
+    def put(self, url, result):
+        """
+        Сохраняет результат разбора страницы. Запись сразу фиксируется на диске.
+
+        Args:
+            url (str): URL страницы
+            result (dict | list): Результат разбора страницы
+        """
+        data = json.dumps(result, ensure_ascii=False)
+
+        with self._lock:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO pages (url, result, completed_at) VALUES (?, ?, ?)',
+                (url, data, time.time())
+            )
+            self._connection.commit()
+
+    def close(self):
+        """
+        Закрывает соединение с базой.
+        """
+        with self._lock:
+            self._connection.close()
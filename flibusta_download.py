@@ -0,0 +1,449 @@
+"""
+Скачивание книг по ссылкам download_links из результатов обхода Flibusta.
+
+Для каждой книги выбирается один формат по порядку предпочтения (по умолчанию
+fb2, затем epub, затем mobi). Файлы загружаются через общую HTTP-сессию и общий
+ограничитель частоты запросов (flibusta_http) несколькими потоками и пишутся на
+диск частями по мере получения, не накапливаясь в памяти.
+
+Файл сначала пишется во временный <имя>.part; прерванная загрузка продолжается
+с места остановки запросом с заголовком Range. Готовый файл проверяется: размер
+должен совпасть с объявленным сервером, а zip-архив (fb2 отдается в zip, epub -
+сам zip) - открыться и пройти проверку контрольных сумм. Только после этого файл
+переименовывается в окончательное имя; уже скачанные книги пропускаются.
+
+    python flibusta_download.py flibusta_entities_мир.json --output-dir books --formats fb2,epub
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import flibusta_http
+import flibusta_metrics
+from flibusta_online_scraper import query_slug
+from flibusta_records import entity_id
+
+
+# Порядок предпочтения форматов: для книги скачивается первый доступный
+FORMAT_PREFERENCE = ('fb2', 'epub', 'mobi')
+
+# Количество одновременно скачиваемых файлов. Общую частоту запросов
+# по-прежнему ограничивает RateLimiter из flibusta_http.
+DEFAULT_DOWNLOAD_WORKERS = 4
+
+# Размер части файла, читаемой из ответа и записываемой на диск за раз
+CHUNK_SIZE = 64 * 1024
+
+# Наибольшая длина названия книги в имени файла
+MAX_TITLE_LENGTH = 80
+
+PART_SUFFIX = '.part'
+
+# Форматы, которые сами являются zip-архивом и не получают суффикс .zip
+ZIP_FORMATS = ('epub', 'zip')
+
+
+class DownloadError(Exception):
+    """
+    Файл не удалось скачать или он не прошел проверку.
+    """
+
+
+def choose_link(book, formats=FORMAT_PREFERENCE):
+    """
+    Выбирает ссылку для скачивания книги по порядку предпочтения форматов.
+
+    Args:
+        book (dict): Словарь книги с ключом 'download_links'
+        formats (tuple, optional): Форматы в порядке предпочтения
+
+    Returns:
+        dict: Ссылка вида {'format': ..., 'url': ...} или None, если подходящего формата нет
+    """
+    links = {link['format']: link for link in book.get('download_links') or []}
+
+    for book_format in formats:
+        if book_format in links:
+            return links[book_format]
+
+    return None
+
+
+def book_filename(book, book_format):
+    """
+    Строит имя файла книги без суффикса .zip.
+
+    Args:
+        book (dict): Словарь книги с ключами 'url' и 'title'
+        book_format (str): Формат файла
+
+    Returns:
+        str: Имя вида <id>_<название>.<формат>
+    """
+    book_id = entity_id(book.get('url'), 'book')
+    title = query_slug(book.get('title') or '')[:MAX_TITLE_LENGTH]
+    return f"{book_id}_{title}.{book_format}"
+
+
+def iter_books(records):
+    """
+    Отдает книги со ссылками для скачивания из результатов обхода. Книга,
+    встретившаяся несколько раз, отдается один раз.
+
+    Args:
+        records (iterable): Записи: книги (словари с 'download_links') или подробности
+                            о сериях и авторах (словари со списком 'books')
+
+    Yields:
+        dict: Словарь книги
+    """
+    seen = set()
+
+    for record in records:
+        books = record.get('books') if 'download_links' not in record else [record]
+        for book in books or []:
+            book_id = entity_id(book.get('url'), 'book')
+            if book_id is None or book_id in seen or not book.get('download_links'):
+                continue
+            seen.add(book_id)
+            yield book
+
+
+def load_records(filename):
+    """
+    Читает результаты обхода из файла.
+
+    Поддерживаются JSONL (запись в строке), JSON-массив записей (flibusta_output),
+    нормализованный список сущностей (EntityStore.to_dict) и подробные результаты
+    со списками 'series_details' и 'authors_details'.
+
+    Args:
+        filename (str): Имя файла
+
+    Returns:
+        list: Записи для iter_books
+    """
+    with open(filename, encoding='utf-8') as f:
+        if filename.endswith('.jsonl'):
+            return [json.loads(line) for line in f if line.strip()]
+        data = json.load(f)
+
+    if isinstance(data, list):
+        return data
+
+    if 'books' in data:
+        return data['books']
+
+    return data.get('series_details', []) + data.get('authors_details', [])
+
+
+def _total_size(response, offset):
+    """
+    Определяет полный размер файла по заголовкам ответа.
+
+    Args:
+        response (requests.Response): Ответ 200 или 206
+        offset (int): Позиция, с которой запрошен файл
+
+    Returns:
+        int: Размер файла в байтах или None, если сервер его не сообщил
+    """
+    content_range = response.headers.get('Content-Range', '')
+    if '/' in content_range and not content_range.endswith('/*'):
+        return int(content_range.rsplit('/', 1)[1])
+
+    length = response.headers.get('Content-Length')
+    if length is not None and length.isdigit():
+        return offset + int(length)
+
+    return None
+
+
+def verify_file(path, expected_size=None):
+    """
+    Проверяет скачанный файл.
+
+    Args:
+        path (str): Путь к файлу
+        expected_size (int, optional): Размер, объявленный сервером
+
+    Returns:
+        bool: True, если файл - zip-архив, иначе False
+
+    Raises:
+        DownloadError: Если размер не совпадает или архив поврежден
+    """
+    size = os.path.getsize(path)
+    if expected_size is not None and size != expected_size:
+        raise DownloadError(f"размер {size} байт вместо {expected_size}")
+
+    with open(path, 'rb') as f:
+        signature = f.read(4)
+
+    if not signature.startswith(b'PK'):
+        return False
+
+    try:
+        with zipfile.ZipFile(path) as archive:
+            broken = archive.testzip()
+    except zipfile.BadZipFile as e:
+        raise DownloadError(f"поврежденный архив: {e}")
+
+    if broken is not None:
+        raise DownloadError(f"поврежденный архив: ошибка в {broken}")
+
+    return True
+
+
+def download_file(url, path):
+    """
+    Скачивает файл во временный path + '.part', продолжая прерванную загрузку.
+
+    Повторы после временных ошибок выполняются по правилам flibusta_http.RetryPolicy;
+    каждый повтор продолжает файл с уже полученного места.
+
+    Args:
+        url (str): URL файла
+        path (str): Путь к окончательному файлу (без суффикса .part)
+
+    Returns:
+        tuple: (путь к временному файлу, размер файла, объявленный сервером, или None)
+
+    Raises:
+        DownloadError: Если файл не удалось скачать
+    """
+    part_path = path + PART_SUFFIX
+    metrics = flibusta_metrics.get_metrics()
+    limiter = flibusta_http.get_rate_limiter()
+    policy = flibusta_http.get_retry_policy()
+    attempt = 0
+
+    while True:
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {'Range': f'bytes={offset}-'} if offset else {}
+
+        request_url, host = flibusta_http.mirror_url(url)
+        metrics.record_wait(limiter.acquire())
+
+        start = time.perf_counter()
+        received = 0
+        try:
+            with flibusta_http.get_session().get(request_url, headers=headers, stream=True,
+                                                 timeout=flibusta_http.get_timeout()) as response:
+                limiter.on_response(response.status_code)
+
+                if policy.should_retry(attempt, status_code=response.status_code):
+                    metrics.record_fetch(url, response.status_code, time.perf_counter() - start,
+                                         ttfb=response.elapsed.total_seconds())
+                    delay = policy.delay(attempt, response.headers.get('Retry-After'))
+                    print(f"Ошибка при скачивании: {response.status_code}; повтор через {delay:.1f} с")
+                    if response.status_code >= 500:
+                        flibusta_http.mark_mirror_failed(host)
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+
+                if response.status_code == 416 and offset:
+                    # Диапазон за концом файла: временный файл уже полный или от другой версии
+                    metrics.record_fetch(url, 416, time.perf_counter() - start,
+                                         ttfb=response.elapsed.total_seconds())
+                    total = _total_size(response, 0)
+                    if total == offset:
+                        return part_path, total
+                    os.remove(part_path)
+                    continue
+
+                if response.status_code not in (200, 206):
+                    metrics.record_fetch(url, response.status_code, time.perf_counter() - start,
+                                         ttfb=response.elapsed.total_seconds())
+                    raise DownloadError(f"ответ {response.status_code}")
+
+                # Вместо файла сайт может вернуть страницу с ошибкой или капчей
+                if response.headers.get('Content-Type', '').startswith('text/html'):
+                    metrics.record_fetch(url, response.status_code, time.perf_counter() - start,
+                                         ttfb=response.elapsed.total_seconds())
+                    raise DownloadError("вместо файла получена HTML-страница")
+
+                if response.status_code == 200:
+                    # Сервер не поддерживает Range: файл скачивается заново
+                    offset = 0
+                total = _total_size(response, offset)
+
+                with open(part_path, 'ab' if offset else 'wb') as f:
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        f.write(chunk)
+                        received += len(chunk)
+
+                metrics.record_fetch(url, response.status_code, time.perf_counter() - start,
+                                     ttfb=response.elapsed.total_seconds(), size=received)
+                return part_path, total
+        except DownloadError:
+            raise
+        except Exception as e:
+            metrics.record_fetch(url, 'error', time.perf_counter() - start, size=received)
+            if not policy.should_retry(attempt, error=e):
+                raise DownloadError(str(e))
+
+            delay = policy.delay(attempt)
+            print(f"Ошибка при скачивании: {e}; повтор через {delay:.1f} с")
+            flibusta_http.mark_mirror_failed(host)
+            time.sleep(delay)
+            attempt += 1
+
+
+class BookDownloader:
+    """
+    Параллельное скачивание книг с докачкой, проверкой файлов и пропуском уже скачанных.
+
+    Использование:
+        downloader = BookDownloader('books', formats=('fb2', 'epub'))
+        summary = downloader.run(iter_books(load_records('flibusta_entities_мир.json')))
+    """
+
+    def __init__(self, output_dir, formats=FORMAT_PREFERENCE, workers=DEFAULT_DOWNLOAD_WORKERS):
+        """
+        Args:
+            output_dir (str): Каталог для файлов книг
+            formats (tuple, optional): Форматы в порядке предпочтения
+            workers (int, optional): Количество одновременно скачиваемых файлов
+        """
+        self.output_dir = output_dir
+        self.formats = tuple(formats)
+        self.workers = workers
+
+    def existing_file(self, path, book_format):
+        """
+        Находит уже скачанный файл книги.
+
+        Args:
+            path (str): Путь к файлу без суффикса .zip
+            book_format (str): Формат файла
+
+        Returns:
+            str: Путь к существующему файлу или None
+        """
+        candidates = [path] if book_format in ZIP_FORMATS else [path, path + '.zip']
+        for candidate in candidates:
+            if os.path.exists(candidate):
+                return candidate
+        return None
+
+    def download_book(self, book):
+        """
+        Скачивает одну книгу в предпочтительном доступном формате.
+
+        Args:
+            book (dict): Словарь книги с ключами 'url', 'title' и 'download_links'
+
+        Returns:
+            dict: Результат с полями 'url', 'status' ('downloaded', 'skipped', 'no_format'
+                  или 'failed'), 'format', 'path' и, при ошибке, 'error'
+        """
+        result = {'url': book.get('url'), 'status': 'no_format', 'format': None, 'path': None}
+
+        link = choose_link(book, self.formats)
+        if link is None:
+            return result
+
+        result['format'] = link['format']
+        path = os.path.join(self.output_dir, book_filename(book, link['format']))
+
+        existing = self.existing_file(path, link['format'])
+        if existing is not None:
+            result.update(status='skipped', path=existing)
+            return result
+
+        # Файл, не прошедший проверку, удаляется, и загрузка один раз начинается заново
+        for attempt in range(2):
+            try:
+                part_path, total = download_file(link['url'], path)
+            except DownloadError as e:
+                result.update(status='failed', error=str(e))
+                print(f"Не удалось скачать {link['url']}: {e}")
+                return result
+
+            try:
+                is_zip = verify_file(part_path, total)
+                break
+            except DownloadError as e:
+                os.remove(part_path)
+                if attempt == 1:
+                    result.update(status='failed', error=str(e))
+                    print(f"Файл {link['url']} не прошел проверку: {e}")
+                    return result
+
+        # fb2 и другие форматы в архиве сохраняются с суффиксом .zip
+        if is_zip and link['format'] not in ZIP_FORMATS:
+            path += '.zip'
+
+        os.replace(part_path, path)
+        result.update(status='downloaded', path=path)
+        return result
+
+    def run(self, books):
+        """
+        Скачивает все книги.
+
+        Args:
+            books (iterable): Словари книг, например из iter_books
+
+        Returns:
+            dict: Сводка: количество книг по статусам и список неудачных загрузок
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        books = list(books)
+        print(f"Книг к скачиванию: {len(books)}, форматы: {', '.join(self.formats)}")
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = list(executor.map(self.download_book, books))
+
+        statuses = [result['status'] for result in results]
+        summary = {
+            'books': len(results),
+            'downloaded': statuses.count('downloaded'),
+            'skipped': statuses.count('skipped'),
+            'no_format': statuses.count('no_format'),
+            'failed': statuses.count('failed'),
+            'failures': [result for result in results if result['status'] == 'failed'],
+        }
+
+        print(f"\nСкачивание завершено: скачано {summary['downloaded']}, уже было {summary['skipped']}, "
+              f"нет нужного формата {summary['no_format']}, ошибок {summary['failed']}")
+        print(f"\nМетрики: {flibusta_metrics.get_metrics().report()}")
+        return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Скачивание книг по результатам обхода Flibusta")
+    parser.add_argument('inputs', nargs='+',
+                        help="Файлы результатов: JSON или JSONL с книгами или подробностями о сериях и авторах")
+    parser.add_argument('--output-dir', default='flibusta_books', help="Каталог для файлов книг")
+    parser.add_argument('--formats', default=','.join(FORMAT_PREFERENCE),
+                        help="Форматы в порядке предпочтения через запятую")
+    parser.add_argument('--workers', type=int, default=DEFAULT_DOWNLOAD_WORKERS,
+                        help="Количество одновременно скачиваемых файлов")
+    parser.add_argument('--rate', type=float, default=None, help="Ограничение частоты запросов (в секунду)")
+    args = parser.parse_args()
+
+    if args.rate:
+        flibusta_http.configure_rate_limit(rate=args.rate, burst=flibusta_http.burst_for_rate(args.rate))
+    flibusta_http.configure_session(pool_size=max(flibusta_http.DEFAULT_POOL_SIZE, args.workers))
+
+    records = []
+    for filename in args.inputs:
+        records.extend(load_records(filename))
+
+    formats = [book_format.strip() for book_format in args.formats.split(',') if book_format.strip()]
+    downloader = BookDownloader(args.output_dir, formats=formats, workers=args.workers)
+    summary = downloader.run(iter_books(records))
+
+    # Ненулевой код возврата, если часть книг скачать не удалось
+    sys.exit(1 if summary['failed'] else 0)
+
+
+if __name__ == '__main__':
+    main()
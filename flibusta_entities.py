@@ -0,0 +1,276 @@
+"""
+Нормализованное хранилище книг, авторов и серий Flibusta.
+
+Сущности хранятся по числовым идентификаторам из ссылок /a/<id>, /b/<id> и
+/s/<id> в виде компактных записей из flibusta_records. Повторные вхождения
+одной сущности (на разных страницах поиска, в нескольких сериях или у
+нескольких авторов) объединяются, книги связываются с авторами и сериями по
+идентификаторам. Хранилище также отмечает, какие страницы сущностей уже
+загружены в текущем запуске, чтобы каждая из них запрашивалась не более
+одного раза.
+"""
+import sys
+import threading
+
+from flibusta_records import (
+    Author,
+    Book,
+    DownloadLink,
+    Genre,
+    Series,
+    entity_id,
+    parse_entity_id,
+)
+
+
+# Поля страницы книги, сохраняемые в записи книги
+BOOK_DETAIL_FIELDS = ('annotation', 'year', 'language', 'size_kb', 'pages')
+
+
+class EntityStore:
+    """
+    Хранилище сущностей с объединением дубликатов и связями по идентификаторам.
+    """
+
+    def __init__(self):
+        self.books = {}
+        self.authors = {}
+        self.series = {}
+
+        self._fetched = set()
+        self._lock = threading.RLock()
+
+    def claim(self, url):
+        """
+        Отмечает страницу сущности как загружаемую в текущем запуске.
+
+        Args:
+            url (str): URL страницы автора, серии или книги
+
+        Returns:
+            bool: True, если страницу нужно загрузить; False, если она уже загружалась
+        """
+        key = parse_entity_id(url) or url
+
+        with self._lock:
+            if key in self._fetched:
+                return False
+            self._fetched.add(key)
+            return True
+
+    def add_series(self, series_info):
+        """
+        Добавляет серию или дополняет уже известную.
+
+        Args:
+            series_info (dict): Словарь серии с ключом 'url'
+
+        Returns:
+            int: Идентификатор серии или None, если URL не распознан
+        """
+        series_id = entity_id(series_info.get('url'), 'series')
+        if series_id is None:
+            return None
+
+        with self._lock:
+            series = self.series.get(series_id)
+            if series is None:
+                series = self.series[series_id] = Series(series_id)
+
+            for key, value in series_info.items():
+                if key == 'name':
+                    series.name = series.name or value
+                elif key == 'books_count':
+                    series.books_count = series.books_count if series.books_count is not None else value
+                elif key not in ('url', 'total_pages'):
+                    # Остальные поля приходят из таблицы на странице серии
+                    if series.extra is None:
+                        series.extra = {}
+                    series.extra.setdefault(sys.intern(key), value)
+
+        return series_id
+
+    def _get_author(self, author_info):
+        """
+        Возвращает запись автора, создавая или дополняя ее.
+
+        Args:
+            author_info (dict): Словарь автора с ключом 'url'
+
+        Returns:
+            Author: Запись автора или None, если URL не распознан
+        """
+        author_id = entity_id(author_info.get('url'), 'author')
+        if author_id is None:
+            return None
+
+        author = self.authors.get(author_id)
+        if author is None:
+            author = self.authors[author_id] = Author(author_id)
+
+        author.name = author.name or author_info.get('name')
+        if author.books_count is None:
+            author.books_count = author_info.get('books_count')
+        if not author.genres and author_info.get('genres'):
+            author.genres = [Genre.from_dict(genre_info) for genre_info in author_info['genres']]
+
+        return author
+
+    def add_author(self, author_info):
+        """
+        Добавляет автора или дополняет уже известного.
+
+        Args:
+            author_info (dict): Словарь автора с ключом 'url'
+
+        Returns:
+            int: Идентификатор автора или None, если URL не распознан
+        """
+        with self._lock:
+            author = self._get_author(author_info)
+
+        return author.id if author is not None else None
+
+    def add_book(self, book_info, author_id=None, series_id=None):
+        """
+        Добавляет книгу и связывает ее с авторами и серией.
+
+        Args:
+            book_info (dict): Словарь книги с ключом 'url' и, возможно, 'authors' и 'download_links'
+            author_id (int, optional): Идентификатор автора, на странице которого найдена книга
+            series_id (int, optional): Идентификатор серии, на странице которой найдена книга
+
+        Returns:
+            int: Идентификатор книги или None, если URL не распознан
+        """
+        book_id = entity_id(book_info.get('url'), 'book')
+        if book_id is None:
+            return None
+
+        with self._lock:
+            book = self.books.get(book_id)
+            if book is None:
+                book = self.books[book_id] = Book(book_id)
+
+            book.title = book.title or book_info.get('title')
+
+            authors = [self._get_author(author_info) for author_info in book_info.get('authors', [])]
+            if author_id is not None:
+                authors.append(self.authors.get(author_id))
+
+            for author in authors:
+                # Связь добавляется в обе стороны только при первом появлении,
+                # поэтому списки книг автора не приходится проверять целиком
+                if author is not None and all(linked.id != author.id for linked in book.authors):
+                    book.authors.append(author)
+                    author.book_ids.append(book_id)
+
+            if series_id is not None and series_id not in book.series_ids:
+                book.series_ids.append(series_id)
+                if series_id in self.series:
+                    self.series[series_id].book_ids.append(book_id)
+
+            known_formats = {link.format for link in book.download_links}
+            for link_info in book_info.get('download_links', []):
+                if link_info['format'] not in known_formats:
+                    book.download_links.append(DownloadLink.from_dict(book_id, link_info))
+                    known_formats.add(link_info['format'])
+
+        return book_id
+
+    def add_search_results(self, series, authors, books):
+        """
+        Добавляет сущности со страницы результатов поиска.
+
+        Args:
+            series (list): Серии, найденные на странице
+            authors (list): Авторы, найденные на странице
+            books (list): Книги, найденные на странице
+        """
+        for series_info in series:
+            self.add_series(series_info)
+        for author_info in authors:
+            self.add_author(author_info)
+        for book_info in books:
+            self.add_book(book_info)
+
+    def add_series_details(self, series_url, details):
+        """
+        Добавляет результат get_series_books: сведения о серии и все ее книги.
+
+        Args:
+            series_url (str): URL страницы серии
+            details (dict): Результат get_series_books
+        """
+        series_id = self.add_series({**details['series_info'], 'url': series_url})
+        for book_info in details['books']:
+            self.add_book(book_info, series_id=series_id)
+
+    def add_author_details(self, author_url, details):
+        """
+        Добавляет результат get_author_books: сведения об авторе и все его книги.
+
+        Args:
+            author_url (str): URL страницы автора
+            details (dict): Результат get_author_books
+        """
+        author_id = self.add_author({**details['author_info'], 'url': author_url})
+        for book_info in details['books']:
+            self.add_book(book_info, author_id=author_id)
+
+    def add_book_details(self, book_url, details):
+        """
+        Добавляет результат get_book_details: книгу, ее авторов, жанры, серии
+        с номерами книги в них и сведения о файле.
+
+        Args:
+            book_url (str): URL страницы книги
+            details (dict): Результат get_book_details
+
+        Returns:
+            int: Идентификатор книги или None, если URL не распознан
+        """
+        book_id = self.add_book({**details, 'url': book_url})
+        if book_id is None:
+            return None
+
+        series_numbers = []
+        for series_info in details.get('series', []):
+            series_id = self.add_series({'name': series_info.get('name'), 'url': series_info.get('url')})
+            if series_id is not None:
+                self.add_book({'url': book_url}, series_id=series_id)
+                series_numbers.append({'series_id': series_id, 'number': series_info.get('number')})
+
+        with self._lock:
+            book = self.books[book_id]
+            if not book.genres and details.get('genres'):
+                book.genres = [Genre.from_dict(genre_info) for genre_info in details['genres']]
+
+            if book.extra is None:
+                book.extra = {}
+            for key in BOOK_DETAIL_FIELDS:
+                if details.get(key) is not None:
+                    book.extra.setdefault(key, details[key])
+            if series_numbers:
+                book.extra.setdefault('series_numbers', series_numbers)
+
+        return book_id
+
+    def to_dict(self):
+        """
+        Возвращает содержимое хранилища в виде, пригодном для сохранения в JSON.
+
+        Returns:
+            dict: Словарь со списками 'series', 'authors', 'books' и статистикой
+        """
+        with self._lock:
+            return {
+                'series': [series.to_dict() for series in self.series.values()],
+                'authors': [author.to_dict() for author in self.authors.values()],
+                'books': [book.to_dict() for book in self.books.values()],
+                'stats': {
+                    'series_count': len(self.series),
+                    'authors_count': len(self.authors),
+                    'books_count': len(self.books)
+                }
+            }
@@ -0,0 +1,751 @@
+"""
+HTTP-клиент для запросов к Flibusta.
+
+Все запросы проходят через один общий requests.Session, поэтому TCP- и
+TLS-соединения с сайтом переиспользуются между страницами, а заголовки
+задаются один раз. Частоту запросов ограничивает общий RateLimiter, а
+при включенном кэше (configure_cache) ответы берутся с диска или
+перепроверяются условными запросами. При включенном архиве
+(configure_archive) каждая загруженная страница сохраняется для повторного
+разбора без сети.
+
+Таймауты, ошибки соединения, ответы 5xx и 429 повторяются с экспоненциальной
+задержкой по RetryPolicy (configure_retries); ответы вроде 404 не повторяются.
+Запросы можно распределять по зеркалам сайта (configure_mirrors).
+"""
+import asyncio
+import email.utils
+import random
+import threading
+import time
+from datetime import datetime, timezone
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp нужен только асинхронному движку
+    aiohttp = None
+
+import flibusta_cache
+import flibusta_metrics
+import flibusta_records
+
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept-Language': 'ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
+    'Connection': 'keep-alive'
+}
+
+# Количество соединений, которые пул держит открытыми для одного хоста
+DEFAULT_POOL_SIZE = 10
+
+# Средняя частота запросов к сайту (запросов в секунду) и допустимый всплеск
+DEFAULT_RATE = 0.5
+DEFAULT_BURST = 2
+
+# Максимальная случайная добавка к ожиданию в секундах
+DEFAULT_JITTER = 0.5
+
+# Коды ответа, при которых сайт просит снизить частоту запросов
+THROTTLE_STATUS_CODES = (429, 503)
+
+# Таймауты запроса в секундах: (установка соединения, ожидание данных)
+DEFAULT_TIMEOUT = (10, 30)
+
+# Параметры повторных попыток
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BACKOFF_BASE = 1.0
+DEFAULT_BACKOFF_MAX = 60.0
+
+# Коды ответа, после которых запрос повторяется
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Временные ошибки, после которых запрос повторяется: таймауты и обрывы соединения
+TRANSIENT_ERRORS = (requests.Timeout, requests.ConnectionError, asyncio.TimeoutError, ConnectionError)
+if aiohttp is not None:
+    TRANSIENT_ERRORS += (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError)
+
+# Стратегии выбора зеркала:
+#   'failover'    - все запросы идут на один адрес, после ошибки - на следующий
+#   'round-robin' - запросы распределяются по всем адресам по очереди
+MIRROR_STRATEGIES = ('failover', 'round-robin')
+
+
+class RateLimiter:
+    """
+    Ограничитель частоты запросов по алгоритму token bucket со случайной добавкой к ожиданию.
+
+    Каждый запрос забирает один токен; токены пополняются со скоростью rate в секунду
+    и накапливаются не больше burst. При включенной адаптации ответы 429/503
+    временно снижают скорость, а успешные ответы постепенно возвращают ее к исходной.
+    Ограничитель потокобезопасен и может использоваться из asyncio.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, jitter=DEFAULT_JITTER, adaptive=True,
+                 backoff_factor=0.5, recovery_factor=1.1, min_rate=None):
+        """
+        Args:
+            rate (float, optional): Скорость пополнения токенов (запросов в секунду)
+            burst (int, optional): Максимальное количество накопленных токенов
+            jitter (float, optional): Максимальная случайная добавка к ожиданию в секундах
+            adaptive (bool, optional): Снижать скорость при ответах 429/503
+            backoff_factor (float, optional): Множитель скорости при ответе 429/503
+            recovery_factor (float, optional): Множитель скорости при успешном ответе
+            min_rate (float, optional): Нижняя граница скорости. По умолчанию rate / 16.
+        """
+        self.base_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.jitter = jitter
+        self.adaptive = adaptive
+        self.backoff_factor = backoff_factor
+        self.recovery_factor = recovery_factor
+        self.min_rate = min_rate if min_rate is not None else rate / 16
+
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Резервирует токен для одного запроса.
+
+        Returns:
+            float: Время в секундах, которое нужно подождать перед запросом
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            # Токен забирается сразу, даже в долг: так одновременные запросы
+            # выстраиваются в очередь и суммарная частота не превышает rate
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+        if wait > 0 and self.jitter:
+            wait += random.random() * self.jitter
+
+        return wait
+
+    def acquire(self):
+        """
+        Блокирует текущий поток до момента, когда можно выполнить запрос.
+
+        Returns:
+            float: Фактическое время ожидания в секундах
+        """
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self):
+        """
+        Асинхронно ожидает момента, когда можно выполнить запрос.
+
+        Returns:
+            float: Фактическое время ожидания в секундах
+        """
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def on_response(self, status_code):
+        """
+        Подстраивает скорость под ответ сервера.
+
+        Args:
+            status_code (int): HTTP-код ответа
+        """
+        if not self.adaptive:
+            return
+
+        with self._lock:
+            if status_code in THROTTLE_STATUS_CODES:
+                self.rate = max(self.min_rate, self.rate * self.backoff_factor)
+            elif status_code < 400:
+                self.rate = min(self.base_rate, self.rate * self.recovery_factor)
+
+
+class RetryPolicy:
+    """
+    Правила повторных попыток: какие ошибки повторять и сколько ждать перед повтором.
+
+    Повторяются таймауты и ошибки соединения, а также ответы с кодами из
+    retry_status_codes. Задержка растет экспоненциально (backoff_base * 2^попытка,
+    но не больше backoff_max) со случайной добавкой; если сервер прислал
+    Retry-After, ждем не меньше указанного времени.
+    """
+
+    def __init__(self, max_retries=DEFAULT_MAX_RETRIES, backoff_base=DEFAULT_BACKOFF_BASE,
+                 backoff_max=DEFAULT_BACKOFF_MAX, retry_status_codes=RETRY_STATUS_CODES):
+        """
+        Args:
+            max_retries (int, optional): Максимальное количество повторов одного запроса
+            backoff_base (float, optional): Задержка перед первым повтором в секундах
+            backoff_max (float, optional): Максимальная задержка в секундах
+            retry_status_codes (tuple, optional): Коды ответа, после которых запрос повторяется
+        """
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_status_codes = tuple(retry_status_codes)
+
+    def should_retry(self, attempt, status_code=None, error=None):
+        """
+        Решает, нужно ли повторить запрос.
+
+        Args:
+            attempt (int): Номер неудачной попытки (с 0)
+            status_code (int, optional): HTTP-код ответа
+            error (Exception, optional): Исключение, если ответ не получен
+
+        Returns:
+            bool: True, если запрос нужно повторить
+        """
+        if attempt >= self.max_retries:
+            return False
+
+        if error is not None:
+            return is_transient_error(error)
+
+        return status_code in self.retry_status_codes
+
+    def delay(self, attempt, retry_after=None):
+        """
+        Вычисляет задержку перед повтором.
+
+        Args:
+            attempt (int): Номер неудачной попытки (с 0)
+            retry_after (str, optional): Значение заголовка Retry-After
+
+        Returns:
+            float: Задержка в секундах
+        """
+        backoff = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        # Случайная половина задержки разводит повторы одновременных запросов
+        backoff = backoff / 2 + random.random() * backoff / 2
+
+        server_delay = parse_retry_after(retry_after)
+        if server_delay is not None:
+            return max(backoff, server_delay)
+
+        return backoff
+
+
+def is_transient_error(error):
+    """
+    Проверяет, является ли ошибка запроса временной (таймаут или обрыв соединения).
+
+    Args:
+        error (Exception): Исключение, возникшее при запросе
+
+    Returns:
+        bool: True для таймаутов и ошибок соединения
+    """
+    return isinstance(error, TRANSIENT_ERRORS)
+
+
+def parse_retry_after(value):
+    """
+    Разбирает заголовок Retry-After.
+
+    Args:
+        value (str): Число секунд или HTTP-дата
+
+    Returns:
+        float: Задержка в секундах или None, если заголовок отсутствует или некорректен
+    """
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+_rate_limiter = RateLimiter()
+_retry_policy = RetryPolicy()
+_timeout = DEFAULT_TIMEOUT
+_cache = None
+_archive = None
+
+_mirrors = []
+_mirror_strategy = 'failover'
+_mirror_index = 0
+_mirror_lock = threading.Lock()
+
+_session = None
+_session_lock = threading.Lock()
+_pool_size = DEFAULT_POOL_SIZE
+_headers = dict(DEFAULT_HEADERS)
+
+
+def configure_session(pool_size=DEFAULT_POOL_SIZE, headers=None):
+    """
+    Задает параметры общей HTTP-сессии. Уже открытая сессия закрывается
+    и будет создана заново при следующем запросе.
+
+    Args:
+        pool_size (int, optional): Размер пула соединений. По умолчанию DEFAULT_POOL_SIZE.
+        headers (dict, optional): Заголовки, добавляемые к DEFAULT_HEADERS
+    """
+    global _pool_size, _headers
+
+    with _session_lock:
+        _pool_size = pool_size
+        _headers = dict(DEFAULT_HEADERS)
+        if headers:
+            _headers.update(headers)
+
+    close_session()
+
+
+def get_session():
+    """
+    Возвращает общую HTTP-сессию, создавая ее при первом обращении.
+
+    Returns:
+        requests.Session: Сессия с настроенным пулом соединений и заголовками
+    """
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=_pool_size, pool_maxsize=_pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            # Referer строится от текущего адреса сайта, если не задан явно
+            session.headers['Referer'] = flibusta_records.FLIBUSTA_URL + '/'
+            session.headers.update(_headers)
+            _session = session
+
+        return _session
+
+
+def close_session():
+    """
+    Закрывает общую HTTP-сессию и все ее соединения.
+    """
+    global _session
+
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def configure_base_url(base_url):
+    """
+    Направляет все запросы и строящиеся URL на другой адрес сайта: зеркало
+    или локальный сервер-заглушку (flibusta_mock_server).
+
+    Args:
+        base_url (str): Адрес сайта, например http://127.0.0.1:8080
+    """
+    flibusta_records.set_base_url(base_url)
+
+    # Сессия будет создана заново с новым заголовком Referer
+    close_session()
+
+
+def configure_rate_limit(rate=DEFAULT_RATE, burst=DEFAULT_BURST, jitter=DEFAULT_JITTER, adaptive=True):
+    """
+    Заменяет общий ограничитель частоты запросов.
+
+    Args:
+        rate (float, optional): Запросов в секунду. По умолчанию DEFAULT_RATE.
+        burst (int, optional): Допустимый всплеск запросов. По умолчанию DEFAULT_BURST.
+        jitter (float, optional): Случайная добавка к ожиданию в секундах. По умолчанию DEFAULT_JITTER.
+        adaptive (bool, optional): Снижать скорость при ответах 429/503. По умолчанию True.
+    """
+    global _rate_limiter
+    _rate_limiter = RateLimiter(rate=rate, burst=burst, jitter=jitter, adaptive=adaptive)
+
+
+def burst_for_rate(rate):
+    """
+    Допустимый всплеск запросов для частоты, заданной в командной строке: не меньше
+    DEFAULT_BURST и не меньше числа запросов за секунду. Используется всеми сценариями,
+    чтобы при одинаковом --rate они ограничивали запросы одинаково.
+
+    Args:
+        rate (float): Запросов в секунду
+
+    Returns:
+        int: Допустимый всплеск запросов
+    """
+    return max(DEFAULT_BURST, int(rate))
+
+
+def get_rate_limiter():
+    """
+    Возвращает общий ограничитель частоты запросов.
+
+    Returns:
+        RateLimiter: Ограничитель, через который проходят все запросы к сайту
+    """
+    return _rate_limiter
+
+
+def configure_retries(max_retries=DEFAULT_MAX_RETRIES, backoff_base=DEFAULT_BACKOFF_BASE,
+                      backoff_max=DEFAULT_BACKOFF_MAX, retry_status_codes=RETRY_STATUS_CODES,
+                      timeout=DEFAULT_TIMEOUT):
+    """
+    Задает правила повторных попыток и таймауты запросов.
+
+    Args:
+        max_retries (int, optional): Максимальное количество повторов. 0 - без повторов.
+        backoff_base (float, optional): Задержка перед первым повтором в секундах
+        backoff_max (float, optional): Максимальная задержка в секундах
+        retry_status_codes (tuple, optional): Коды ответа, после которых запрос повторяется
+        timeout (float | tuple, optional): Таймаут в секундах или пара (соединение, чтение)
+    """
+    global _retry_policy, _timeout
+
+    _retry_policy = RetryPolicy(max_retries=max_retries, backoff_base=backoff_base,
+                                backoff_max=backoff_max, retry_status_codes=retry_status_codes)
+    _timeout = timeout
+
+
+def get_retry_policy():
+    """
+    Возвращает текущие правила повторных попыток.
+
+    Returns:
+        RetryPolicy: Правила, по которым fetch и AsyncCrawler повторяют запросы
+    """
+    return _retry_policy
+
+
+def get_timeout():
+    """
+    Возвращает таймаут запросов.
+
+    Returns:
+        float | tuple: Таймаут в секундах или пара (соединение, чтение)
+    """
+    return _timeout
+
+
+def configure_mirrors(mirrors=None, strategy='failover'):
+    """
+    Задает зеркала сайта, на которые можно направлять запросы.
+
+    Основной адрес (flibusta_records.FLIBUSTA_URL) всегда стоит первым; URL в
+    результатах разбора, кэше и архиве строятся от него независимо от того,
+    с какого зеркала получена страница.
+
+    Args:
+        mirrors (list, optional): Адреса зеркал, например ['http://flibusta.site'].
+                                  None или пустой список отключают зеркала.
+        strategy (str, optional): 'failover' или 'round-robin', см. MIRROR_STRATEGIES
+
+    Raises:
+        ValueError: Если стратегия неизвестна
+    """
+    global _mirrors, _mirror_strategy, _mirror_index
+
+    if strategy not in MIRROR_STRATEGIES:
+        raise ValueError(f"Неизвестная стратегия выбора зеркала: {strategy}")
+
+    with _mirror_lock:
+        _mirrors = [mirror.rstrip('/') for mirror in (mirrors or [])]
+        _mirror_strategy = strategy
+        _mirror_index = 0
+
+
+def _hosts():
+    """
+    Возвращает основной адрес сайта и адреса зеркал.
+
+    Returns:
+        list: Список адресов без завершающего '/'
+    """
+    base_url = flibusta_records.FLIBUSTA_URL
+    return [base_url] + [mirror for mirror in _mirrors if mirror != base_url]
+
+
+def mirror_url(url):
+    """
+    Выбирает адрес для очередного запроса и подставляет его в URL.
+
+    Args:
+        url (str): URL страницы на основном адресе сайта
+
+    Returns:
+        tuple: (URL для запроса, выбранный адрес сайта)
+    """
+    global _mirror_index
+
+    base_url = flibusta_records.FLIBUSTA_URL
+    if not _mirrors or not url.startswith(base_url):
+        return url, base_url
+
+    with _mirror_lock:
+        hosts = _hosts()
+        host = hosts[_mirror_index % len(hosts)]
+        if _mirror_strategy == 'round-robin':
+            _mirror_index += 1
+
+    return host + url[len(base_url):], host
+
+
+def mark_mirror_failed(host):
+    """
+    Отмечает неудачный запрос к адресу сайта: в режиме 'failover' следующие
+    запросы пойдут на следующий адрес.
+
+    Args:
+        host (str): Адрес сайта, вернувший ошибку
+    """
+    global _mirror_index
+
+    if not _mirrors or _mirror_strategy != 'failover':
+        return
+
+    with _mirror_lock:
+        hosts = _hosts()
+        if hosts[_mirror_index % len(hosts)] == host:
+            _mirror_index += 1
+            print(f"Адрес {host} недоступен, переключаемся на {hosts[_mirror_index % len(hosts)]}")
+
+
+def configure_cache(directory=None, max_size=flibusta_cache.DEFAULT_MAX_SIZE, ttls=None):
+    """
+    Включает или отключает кэш ответов на диске.
+
+    Args:
+        directory (str, optional): Каталог кэша. Если None, кэш отключается.
+        max_size (int, optional): Максимальный размер кэша в байтах
+        ttls (list, optional): Сроки свежести по типам страниц, см. flibusta_cache.DEFAULT_TTLS
+    """
+    global _cache
+
+    if directory is None:
+        _cache = None
+    else:
+        _cache = flibusta_cache.ResponseCache(directory, max_size=max_size, ttls=ttls)
+
+
+def get_cache():
+    """
+    Возвращает текущий кэш ответов.
+
+    Returns:
+        ResponseCache: Кэш или None, если кэш отключен
+    """
+    return _cache
+
+
+def configure_archive(path=None):
+    """
+    Включает или отключает архивирование загруженных страниц.
+
+    Args:
+        path (str, optional): Путь к файлу архива. Если None, архивирование отключается.
+    """
+    global _archive
+
+    if path is None:
+        _archive = None
+    else:
+        # Импорт внутри функции: flibusta_archive сам зависит от модулей, использующих fetch
+        from flibusta_archive import PageArchive
+        _archive = PageArchive(path)
+
+
+def get_archive():
+    """
+    Возвращает текущий архив страниц.
+
+    Returns:
+        PageArchive: Архив или None, если архивирование отключено
+    """
+    return _archive
+
+
+def archive_page(url, html_content):
+    """
+    Записывает страницу в архив, если архивирование включено и страницы там еще нет.
+    Вызывается для каждой полученной страницы, в том числе взятой из кэша, чтобы
+    архив содержал все страницы обхода независимо от состояния кэша.
+
+    Args:
+        url (str): URL страницы
+        html_content (str): HTML-код страницы
+    """
+    archive = get_archive()
+    if archive is not None and url not in archive:
+        archive.add(url, html_content)
+
+
+def prepare_request(url, revalidate=False):
+    """
+    Проверяет кэш перед запросом страницы. Общая часть синхронного fetch
+    и асинхронного AsyncCrawler.fetch.
+
+    Args:
+        url (str): URL страницы
+        revalidate (bool, optional): Перепроверять запись кэша у сервера, даже если она свежая
+
+    Returns:
+        tuple: (html_content, cached, headers): html_content - свежая страница из кэша,
+               для которой запрос не нужен, иначе None; cached - запись кэша для
+               перепроверки или None; headers - условные заголовки запроса
+    """
+    cache = get_cache()
+    cached = cache.get(url) if cache is not None else None
+
+    if cached and cached['fresh'] and not revalidate:
+        flibusta_metrics.get_metrics().record_cache('hit')
+        archive_page(url, cached['body'])
+        return cached['body'], cached, {}
+
+    # Для устаревшей записи просим сервер вернуть 304, если страница не изменилась
+    headers = {}
+    if cached:
+        if cached['etag']:
+            headers['If-None-Match'] = cached['etag']
+        if cached['last_modified']:
+            headers['If-Modified-Since'] = cached['last_modified']
+
+    return None, cached, headers
+
+
+def retry_delay(url, attempt, host, status_code=None, error=None, retry_after=None):
+    """
+    Решает, повторять ли запрос после ошибки или ответа status_code, и готовит повтор:
+    сообщает об ошибке и при сетевой ошибке или ответе 5xx помечает зеркало недоступным.
+
+    Args:
+        url (str): URL страницы
+        attempt (int): Номер попытки, начиная с 0
+        host (str): Зеркало, к которому выполнялся запрос
+        status_code (int, optional): Код ответа сервера
+        error (Exception, optional): Ошибка запроса
+        retry_after (str, optional): Значение заголовка Retry-After
+
+    Returns:
+        float: Задержка перед повтором в секундах или None, если повторять запрос не нужно
+    """
+    policy = get_retry_policy()
+    if not policy.should_retry(attempt, status_code=status_code, error=error):
+        return None
+
+    delay = policy.delay(attempt, retry_after)
+    print(f"Ошибка при запросе {url}: {error if error is not None else status_code}; "
+          f"повтор через {delay:.1f} с")
+    if error is not None or status_code >= 500:
+        mark_mirror_failed(host)
+    return delay
+
+
+def finish_response(url, status_code, html_content, response_headers, cached):
+    """
+    Обрабатывает окончательный ответ сервера: на 304 обновляет запись кэша и возвращает
+    ее страницу, на 200 сохраняет страницу в кэш и архив.
+
+    Args:
+        url (str): URL страницы
+        status_code (int): Код ответа сервера
+        html_content (str): HTML-код из ответа (используется только для ответа 200)
+        response_headers (Mapping): Заголовки ответа
+        cached (dict): Запись кэша, полученная от prepare_request, или None
+
+    Returns:
+        str: HTML-код страницы или None, если сервер вернул ошибку
+    """
+    metrics = flibusta_metrics.get_metrics()
+    cache = get_cache()
+
+    if status_code == 304 and cached:
+        metrics.record_cache('revalidated')
+        cache.refresh(url)
+        archive_page(url, cached['body'])
+        return cached['body']
+
+    if status_code == 200:
+        if cache is not None:
+            # Промах засчитывается только для ответа, который попал в кэш
+            metrics.record_cache('miss')
+            cache.put(url, html_content,
+                      etag=response_headers.get('ETag'),
+                      last_modified=response_headers.get('Last-Modified'))
+        archive_page(url, html_content)
+        return html_content
+
+    print(f"Ошибка при запросе: {status_code}")
+    return None
+
+
+def fetch(url, revalidate=False):
+    """
+    Выполняет GET-запрос через общую сессию и возвращает HTML-код страницы.
+
+    Args:
+        url (str): URL страницы
+        revalidate (bool, optional): Перепроверять запись кэша у сервера, даже если она свежая
+
+    Returns:
+        str: HTML-код страницы или None в случае ошибки
+    """
+    html_content, cached, headers = prepare_request(url, revalidate)
+    if html_content is not None:
+        return html_content
+
+    metrics = flibusta_metrics.get_metrics()
+    limiter = get_rate_limiter()
+    attempt = 0
+
+    while True:
+        request_url, host = mirror_url(url)
+        metrics.record_wait(limiter.acquire())
+
+        start = time.perf_counter()
+        try:
+            response = get_session().get(request_url, headers=headers, timeout=get_timeout())
+        except Exception as e:
+            metrics.record_fetch(url, 'error', time.perf_counter() - start)
+            delay = retry_delay(url, attempt, host, error=e)
+            if delay is None:
+                print(f"Ошибка при выполнении запроса: {e}")
+                return None
+            time.sleep(delay)
+            attempt += 1
+            continue
+
+        metrics.record_fetch(url, response.status_code, time.perf_counter() - start,
+                             ttfb=response.elapsed.total_seconds(), size=len(response.content))
+        limiter.on_response(response.status_code)
+
+        delay = retry_delay(url, attempt, host, status_code=response.status_code,
+                            retry_after=response.headers.get('Retry-After'))
+        if delay is None:
+            break
+        time.sleep(delay)
+        attempt += 1
+
+    try:
+        html_content = response.text if response.status_code == 200 else None
+        return finish_response(url, response.status_code, html_content, response.headers, cached)
+    except Exception as e:
+        print(f"Ошибка при обработке ответа: {e}")
+        return None
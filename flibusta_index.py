@@ -0,0 +1,543 @@
+"""
+Локальный поисковый индекс по собранным книгам, авторам и сериям Flibusta.
+
+Индекс хранится в SQLite: сущности и их связи (книга - авторы, книга - серии,
+форматы скачивания, жанры) лежат в обычных таблицах, а названия книг, серий
+и имена авторов - в полнотекстовых таблицах FTS5. Повторные и
+отфильтрованные запросы ("только fb2", "жанр X", "автор Y") выполняются
+за миллисекунды без обращения к сайту. Результат SearchIndex.search имеет
+тот же вид, что и результат parse_all_pages.
+
+Если SQLite собран без FTS5, поиск выполняется через LIKE по названиям
+в нижнем регистре: медленнее, но с тем же результатом.
+
+    python flibusta_index.py flibusta_index.sqlite add flibusta_entities_мир.json
+    python flibusta_index.py flibusta_index.sqlite search "мир" --format fb2 --author Лукьяненко
+"""
+import argparse
+import json
+import re
+import sqlite3
+import threading
+import time
+
+import flibusta_records
+from flibusta_entities import EntityStore
+from flibusta_records import DownloadLink, Genre
+
+
+SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS books ('
+    'id INTEGER PRIMARY KEY, title TEXT, search_text TEXT)',
+    'CREATE TABLE IF NOT EXISTS authors ('
+    'id INTEGER PRIMARY KEY, name TEXT, books_count INTEGER, search_text TEXT)',
+    'CREATE TABLE IF NOT EXISTS series ('
+    'id INTEGER PRIMARY KEY, name TEXT, books_count INTEGER, search_text TEXT)',
+    'CREATE TABLE IF NOT EXISTS genres ('
+    'code TEXT PRIMARY KEY, name TEXT, search_text TEXT)',
+    'CREATE TABLE IF NOT EXISTS book_authors ('
+    'book_id INTEGER NOT NULL, author_id INTEGER NOT NULL, position INTEGER NOT NULL, '
+    'PRIMARY KEY (book_id, author_id))',
+    'CREATE INDEX IF NOT EXISTS book_authors_author ON book_authors (author_id)',
+    'CREATE TABLE IF NOT EXISTS book_series ('
+    'book_id INTEGER NOT NULL, series_id INTEGER NOT NULL, '
+    'PRIMARY KEY (book_id, series_id))',
+    'CREATE INDEX IF NOT EXISTS book_series_series ON book_series (series_id)',
+    'CREATE TABLE IF NOT EXISTS book_formats ('
+    'book_id INTEGER NOT NULL, format TEXT NOT NULL, position INTEGER NOT NULL, path TEXT, '
+    'PRIMARY KEY (book_id, format))',
+    'CREATE INDEX IF NOT EXISTS book_formats_format ON book_formats (format)',
+    'CREATE TABLE IF NOT EXISTS book_genres ('
+    'book_id INTEGER NOT NULL, code TEXT NOT NULL, PRIMARY KEY (book_id, code))',
+    'CREATE TABLE IF NOT EXISTS author_genres ('
+    'author_id INTEGER NOT NULL, code TEXT NOT NULL, PRIMARY KEY (author_id, code))',
+]
+
+# Полнотекстовые таблицы: имя таблицы сущностей -> (таблица FTS, индексируемый столбец)
+FTS_TABLES = {
+    'books': ('books_fts', 'title'),
+    'authors': ('authors_fts', 'name'),
+    'series': ('series_fts', 'name'),
+}
+
+
+def _normalize(text):
+    """
+    Приводит текст к виду для поиска через LIKE: нижний регистр, ё заменяется на е.
+
+    Args:
+        text (str): Исходный текст
+
+    Returns:
+        str: Нормализованный текст или None
+    """
+    if text is None:
+        return None
+    return text.lower().replace('ё', 'е')
+
+
+def _query_terms(query):
+    """
+    Разбивает поисковый запрос на слова.
+
+    Args:
+        query (str): Поисковый запрос
+
+    Returns:
+        list: Слова запроса в нижнем регистре
+    """
+    return re.findall(r'\w+', _normalize(query or ''))
+
+
+class SearchIndex:
+    """
+    Поисковый индекс в SQLite.
+
+    Использование:
+        with SearchIndex('flibusta_index.sqlite') as index:
+            index.add_store(store)
+            results = index.search('мир', formats=['fb2'], genre='sf')
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Путь к файлу базы SQLite
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+
+        for statement in SCHEMA:
+            self._connection.execute(statement)
+
+        try:
+            for fts_table, column in FTS_TABLES.values():
+                self._connection.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} "
+                    f"USING fts5({column}, tokenize='unicode61 remove_diacritics 2')"
+                )
+            self.fts = True
+        except sqlite3.OperationalError:
+            # SQLite собран без FTS5
+            self.fts = False
+
+        self._connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(*) FROM books').fetchone()[0]
+
+    def close(self):
+        """
+        Закрывает соединение с базой.
+        """
+        with self._lock:
+            self._connection.close()
+
+    def _refresh_fts(self, table, ids):
+        """
+        Обновляет полнотекстовые строки сущностей после изменения их названий.
+
+        Args:
+            table (str): Таблица сущностей ('books', 'authors' или 'series')
+            ids (iterable): Идентификаторы измененных сущностей
+        """
+        if not self.fts:
+            return
+
+        fts_table, column = FTS_TABLES[table]
+        rows = [(entity_id,) for entity_id in ids]
+        self._connection.executemany(f"DELETE FROM {fts_table} WHERE rowid = ?", rows)
+        self._connection.executemany(
+            f"INSERT INTO {fts_table} (rowid, {column}) SELECT id, {column} FROM {table} "
+            f"WHERE id = ? AND {column} IS NOT NULL",
+            rows
+        )
+
+    def _add_genres(self, link_table, key_column, entity_id, genres):
+        """
+        Добавляет жанры сущности.
+
+        Args:
+            link_table (str): Таблица связи ('book_genres' или 'author_genres')
+            key_column (str): Столбец идентификатора сущности в таблице связи
+            entity_id (int): Идентификатор книги или автора
+            genres (list): Словари жанров с ключами 'name' и 'url'
+        """
+        for genre_info in genres:
+            genre = Genre.from_dict(genre_info)
+            self._connection.execute(
+                'INSERT INTO genres (code, name, search_text) VALUES (?, ?, ?) '
+                'ON CONFLICT(code) DO UPDATE SET name = COALESCE(name, excluded.name), '
+                'search_text = COALESCE(search_text, excluded.search_text)',
+                (genre.code, genre.name, _normalize(genre.name))
+            )
+            self._connection.execute(
+                f"INSERT OR IGNORE INTO {link_table} ({key_column}, code) VALUES (?, ?)",
+                (entity_id, genre.code)
+            )
+
+    def add_entities(self, entities):
+        """
+        Добавляет сущности в индекс или дополняет уже известные. Известные названия
+        не перезаписываются, как и в EntityStore.
+
+        Args:
+            entities (dict): Результат EntityStore.to_dict() (или загруженный файл
+                             flibusta_entities_*.json) со списками 'series', 'authors' и 'books'
+
+        Returns:
+            dict: Количество добавленных или обновленных серий, авторов и книг
+        """
+        with self._lock:
+            for series_info in entities.get('series', []):
+                self._connection.execute(
+                    'INSERT INTO series (id, name, books_count, search_text) VALUES (?, ?, ?, ?) '
+                    'ON CONFLICT(id) DO UPDATE SET name = COALESCE(name, excluded.name), '
+                    'books_count = COALESCE(books_count, excluded.books_count), '
+                    'search_text = COALESCE(search_text, excluded.search_text)',
+                    (series_info['id'], series_info.get('name'), series_info.get('books_count'),
+                     _normalize(series_info.get('name')))
+                )
+                self._connection.executemany(
+                    'INSERT OR IGNORE INTO book_series (book_id, series_id) VALUES (?, ?)',
+                    [(book_id, series_info['id']) for book_id in series_info.get('book_ids', [])]
+                )
+
+            for author_info in entities.get('authors', []):
+                self._connection.execute(
+                    'INSERT INTO authors (id, name, books_count, search_text) VALUES (?, ?, ?, ?) '
+                    'ON CONFLICT(id) DO UPDATE SET name = COALESCE(name, excluded.name), '
+                    'books_count = COALESCE(books_count, excluded.books_count), '
+                    'search_text = COALESCE(search_text, excluded.search_text)',
+                    (author_info['id'], author_info.get('name'), author_info.get('books_count'),
+                     _normalize(author_info.get('name')))
+                )
+                self._add_genres('author_genres', 'author_id', author_info['id'], author_info.get('genres', []))
+
+            for book_info in entities.get('books', []):
+                book_id = book_info['id']
+                self._connection.execute(
+                    'INSERT INTO books (id, title, search_text) VALUES (?, ?, ?) '
+                    'ON CONFLICT(id) DO UPDATE SET title = COALESCE(title, excluded.title), '
+                    'search_text = COALESCE(search_text, excluded.search_text)',
+                    (book_id, book_info.get('title'), _normalize(book_info.get('title')))
+                )
+
+                for position, author_info in enumerate(book_info.get('authors', [])):
+                    # Авторы книги могли не попасть в список 'authors', если их страницы не загружались
+                    self._connection.execute(
+                        'INSERT INTO authors (id, name, search_text) VALUES (?, ?, ?) '
+                        'ON CONFLICT(id) DO UPDATE SET name = COALESCE(name, excluded.name), '
+                        'search_text = COALESCE(search_text, excluded.search_text)',
+                        (author_info['id'], author_info.get('name'), _normalize(author_info.get('name')))
+                    )
+                    self._connection.execute(
+                        'INSERT OR IGNORE INTO book_authors (book_id, author_id, position) VALUES (?, ?, ?)',
+                        (book_id, author_info['id'], position)
+                    )
+
+                self._connection.executemany(
+                    'INSERT OR IGNORE INTO book_series (book_id, series_id) VALUES (?, ?)',
+                    [(book_id, series_id) for series_id in book_info.get('series_ids', [])]
+                )
+
+                for position, link_info in enumerate(book_info.get('download_links', [])):
+                    link = DownloadLink.from_dict(book_id, link_info)
+                    self._connection.execute(
+                        'INSERT OR IGNORE INTO book_formats (book_id, format, position, path) VALUES (?, ?, ?, ?)',
+                        (book_id, link.format, position, link.path)
+                    )
+
+                self._add_genres('book_genres', 'book_id', book_id, book_info.get('genres', []))
+
+            author_ids = {author_info['id'] for author_info in entities.get('authors', [])}
+            author_ids.update(author_info['id'] for book_info in entities.get('books', [])
+                              for author_info in book_info.get('authors', []))
+
+            self._refresh_fts('series', [series_info['id'] for series_info in entities.get('series', [])])
+            self._refresh_fts('authors', author_ids)
+            self._refresh_fts('books', [book_info['id'] for book_info in entities.get('books', [])])
+            self._connection.commit()
+
+        return {
+            'series_count': len(entities.get('series', [])),
+            'authors_count': len(author_ids),
+            'books_count': len(entities.get('books', []))
+        }
+
+    def add_store(self, store):
+        """
+        Добавляет в индекс содержимое хранилища сущностей.
+
+        Args:
+            store (EntityStore): Хранилище сущностей обхода
+
+        Returns:
+            dict: Количество добавленных или обновленных серий, авторов и книг
+        """
+        return self.add_entities(store.to_dict())
+
+    def add_search_results(self, results):
+        """
+        Добавляет в индекс результат parse_all_pages.
+
+        Args:
+            results (dict): Результат parse_all_pages
+
+        Returns:
+            dict: Количество добавленных или обновленных серий, авторов и книг
+        """
+        store = EntityStore()
+        store.add_search_results(results['series'], results['authors'], results['books'])
+        return self.add_store(store)
+
+    def _text_condition(self, table, column, terms):
+        """
+        Строит условие совпадения названия сущности со словами запроса.
+        Каждое слово запроса ищется как начало слова в названии.
+
+        Args:
+            table (str): Таблица сущностей ('books', 'authors' или 'series')
+            column (str): Столбец идентификатора в запросе, например 'b.id'
+            terms (list): Слова запроса
+
+        Returns:
+            tuple: (условие SQL, список параметров)
+        """
+        if self.fts:
+            fts_table = FTS_TABLES[table][0]
+            expression = ' '.join(f'"{term}"*' for term in terms)
+            return f"{column} IN (SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH ?)", [expression]
+
+        alias = column.split('.')[0]
+        conditions = [f"({alias}.search_text LIKE ? OR {alias}.search_text LIKE ?)" for _ in terms]
+        params = [pattern for term in terms for pattern in (f"{term}%", f"% {term}%")]
+        return ' AND '.join(conditions), params
+
+    def _books_filter(self, query, formats=None, genre=None, author=None):
+        """
+        Строит подзапрос идентификаторов книг, удовлетворяющих запросу и фильтрам.
+
+        Returns:
+            tuple: (текст подзапроса SQL, список параметров)
+        """
+        conditions = []
+        params = []
+
+        terms = _query_terms(query)
+        if terms:
+            condition, condition_params = self._text_condition('books', 'b.id', terms)
+            conditions.append(condition)
+            params.extend(condition_params)
+
+        if formats:
+            formats = [formats] if isinstance(formats, str) else list(formats)
+            placeholders = ', '.join('?' for _ in formats)
+            conditions.append(f"b.id IN (SELECT book_id FROM book_formats WHERE format IN ({placeholders}))")
+            params.extend(link_format.lower() for link_format in formats)
+
+        if genre:
+            # Жанр книги берется со страницы книги, а если его нет - из жанров ее авторов
+            genre_codes = 'SELECT code FROM genres WHERE code = ? OR search_text = ?'
+            conditions.append(
+                f"(b.id IN (SELECT book_id FROM book_genres WHERE code IN ({genre_codes})) "
+                f"OR b.id IN (SELECT ba.book_id FROM book_authors ba JOIN author_genres ag "
+                f"ON ag.author_id = ba.author_id WHERE ag.code IN ({genre_codes})))"
+            )
+            params.extend([genre, _normalize(genre), genre, _normalize(genre)])
+
+        if author is not None:
+            if isinstance(author, int):
+                conditions.append('b.id IN (SELECT book_id FROM book_authors WHERE author_id = ?)')
+                params.append(author)
+            else:
+                condition, condition_params = self._text_condition('authors', 'a.id', _query_terms(author))
+                conditions.append(
+                    f"b.id IN (SELECT book_id FROM book_authors WHERE author_id IN "
+                    f"(SELECT a.id FROM authors a WHERE {condition}))"
+                )
+                params.extend(condition_params)
+
+        where = ' AND '.join(conditions) if conditions else '1'
+        return f"SELECT b.id FROM books b WHERE {where}", params
+
+    def search(self, query='', formats=None, genre=None, author=None, limit=None):
+        """
+        Ищет книги, авторов и серии в индексе.
+
+        Слова запроса ищутся как начала слов в названиях книг и серий и в именах
+        авторов. Фильтры сужают список книг; если задан хотя бы один фильтр, в
+        списки серий и авторов попадают только те, у которых есть подходящие книги.
+
+        Args:
+            query (str, optional): Поисковый запрос. Пустой запрос подходит ко всем сущностям.
+            formats (str | list, optional): Форматы скачивания, например 'fb2' или ['fb2', 'epub']
+            genre (str, optional): Код жанра (sf_social) или его название
+            author (int | str, optional): Идентификатор автора или слова из его имени
+            limit (int, optional): Максимальное количество книг, серий и авторов в ответе
+
+        Returns:
+            dict: Словарь того же вида, что и результат parse_all_pages
+        """
+        books_query, books_params = self._books_filter(query, formats, genre, author)
+        filtered = bool(formats or genre or author is not None)
+        terms = _query_terms(query)
+        limit_clause = f" LIMIT {int(limit)}" if limit else ''
+
+        with self._lock:
+            books = self._fetch_books(books_query, books_params, limit_clause)
+            series = self._fetch_entities('series', 's', 'book_series', 'series_id', terms,
+                                          books_query, books_params, filtered, limit_clause)
+            authors = self._fetch_entities('authors', 'a', 'book_authors', 'author_id', terms,
+                                           books_query, books_params, filtered, limit_clause)
+
+        return {
+            'query': query,
+            'total_pages': 1,
+            'series': series,
+            'authors': authors,
+            'books': books,
+            'stats': {
+                'series_count': len(series),
+                'authors_count': len(authors),
+                'books_count': len(books)
+            }
+        }
+
+    def _fetch_books(self, books_query, books_params, limit_clause):
+        """
+        Загружает найденные книги с авторами и ссылками на скачивание.
+
+        Returns:
+            list: Словари книг в виде parse_search_page
+        """
+        base_url = flibusta_records.FLIBUSTA_URL
+        matched = f"SELECT id FROM books WHERE id IN ({books_query}) ORDER BY title, id{limit_clause}"
+
+        rows = self._connection.execute(
+            f"SELECT id, title FROM books WHERE id IN ({matched}) ORDER BY title, id", books_params
+        ).fetchall()
+
+        books = {}
+        for book_id, title in rows:
+            books[book_id] = {'title': title, 'url': f"{base_url}/b/{book_id}", 'authors': []}
+
+        for book_id, author_id, name in self._connection.execute(
+            f"SELECT ba.book_id, a.id, a.name FROM book_authors ba JOIN authors a ON a.id = ba.author_id "
+            f"WHERE ba.book_id IN ({matched}) ORDER BY ba.book_id, ba.position", books_params
+        ):
+            books[book_id]['authors'].append({'name': name, 'url': f"{base_url}/a/{author_id}"})
+
+        for book_id, link_format, path in self._connection.execute(
+            f"SELECT book_id, format, path FROM book_formats WHERE book_id IN ({matched}) "
+            f"ORDER BY book_id, position", books_params
+        ):
+            books[book_id].setdefault('download_links', []).append(
+                DownloadLink(book_id, link_format, path).to_dict()
+            )
+
+        return list(books.values())
+
+    def _fetch_entities(self, table, alias, link_table, link_column, terms, books_query, books_params,
+                        filtered, limit_clause):
+        """
+        Загружает найденные серии или авторов.
+
+        Returns:
+            list: Словари серий или авторов в виде parse_search_page
+        """
+        conditions = []
+        params = []
+
+        if terms:
+            condition, condition_params = self._text_condition(table, f"{alias}.id", terms)
+            conditions.append(condition)
+            params.extend(condition_params)
+
+        if filtered:
+            conditions.append(f"{alias}.id IN (SELECT {link_column} FROM {link_table} "
+                              f"WHERE book_id IN ({books_query}))")
+            params.extend(books_params)
+
+        where = ' AND '.join(conditions) if conditions else '1'
+        path = 's' if table == 'series' else 'a'
+        base_url = flibusta_records.FLIBUSTA_URL
+
+        entities = []
+        for entity_id, name, books_count in self._connection.execute(
+            f"SELECT {alias}.id, {alias}.name, {alias}.books_count FROM {table} {alias} "
+            f"WHERE {where} ORDER BY {alias}.name, {alias}.id{limit_clause}", params
+        ):
+            entity_info = {'url': f"{base_url}/{path}/{entity_id}", 'name': name}
+            if books_count is not None:
+                entity_info['books_count'] = books_count
+            entities.append(entity_info)
+
+        return entities
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальный поисковый индекс по результатам обхода Flibusta")
+    parser.add_argument('index', help="Файл SQLite с индексом")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    add_parser = commands.add_parser('add', help="Добавить в индекс сохраненные результаты обхода")
+    add_parser.add_argument('files', nargs='+',
+                            help="Файлы flibusta_entities_*.json или flibusta_search_*.json")
+
+    search_parser = commands.add_parser('search', help="Найти книги, авторов и серии в индексе")
+    search_parser.add_argument('query', nargs='?', default='', help="Поисковый запрос")
+    search_parser.add_argument('--format', action='append', dest='formats', help="Формат скачивания (можно повторять)")
+    search_parser.add_argument('--genre', help="Код или название жанра")
+    search_parser.add_argument('--author', help="Идентификатор автора или слова из его имени")
+    search_parser.add_argument('--limit', type=int, default=None, help="Максимальное количество результатов")
+    search_parser.add_argument('--output', help="Файл JSON для результатов")
+    args = parser.parse_args()
+
+    with SearchIndex(args.index) as index:
+        if args.command == 'add':
+            for filename in args.files:
+                with open(filename, encoding='utf-8') as f:
+                    data = json.load(f)
+
+                # Результаты поиска содержат словари без идентификаторов, сущности - с ними
+                if 'query' in data:
+                    counts = index.add_search_results(data)
+                else:
+                    counts = index.add_entities(data)
+
+                print(f"{filename}: серий: {counts['series_count']}, авторов: {counts['authors_count']}, "
+                      f"книг: {counts['books_count']}")
+
+            print(f"Книг в индексе: {len(index)}")
+            return
+
+        author = int(args.author) if args.author and args.author.isdigit() else args.author
+
+        start = time.perf_counter()
+        results = index.search(args.query, formats=args.formats, genre=args.genre, author=author, limit=args.limit)
+        elapsed = time.perf_counter() - start
+
+        print(f"Найдено серий: {results['stats']['series_count']}, авторов: {results['stats']['authors_count']}, "
+              f"книг: {results['stats']['books_count']} за {elapsed * 1000:.1f} мс")
+
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(results, f, ensure_ascii=False, indent=2)
+            print(f"Результаты сохранены в файл: {args.output}")
+        else:
+            for book in results['books']:
+                authors = ', '.join(author_info['name'] or '' for author_info in book['authors'])
+                print(f"{book['url']}  {book['title']} - {authors}")
+
+
+if __name__ == '__main__':
+    main()
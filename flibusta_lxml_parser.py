@@ -0,0 +1,559 @@
+"""
+Нативный парсер страниц Flibusta на lxml, работающий без BeautifulSoup.
+
+Функции модуля повторяют логику одноименных функций из flibusta_online_scraper
+и возвращают точно такие же словари, но строят дерево средствами libxml2,
+что значительно быстрее чистого Python-парсера.
+"""
+import re
+
+import lxml.html
+
+import flibusta_records
+from flibusta_markup import (
+    BOOK_DOWNLOAD_PATTERN,
+    BOOK_TEXT_FIELDS,
+    BOOK_TITLE_FORMAT_PATTERN,
+    SEARCH_SECTION_HEADERS,
+    SERIES_NUMBER_PATTERN,
+)
+from flibusta_pagination import get_total_pages
+
+
+def _make_tree(html_content):
+    """
+    Строит дерево документа средствами lxml.
+
+    Args:
+        html_content (str): HTML-код страницы
+
+    Returns:
+        HtmlElement: Корневой элемент документа
+    """
+    return lxml.html.document_fromstring(html_content)
+
+
+def _find_by_class(element, tag, class_name):
+    """
+    Находит первый потомок с заданным тегом и классом (аналог soup.find(tag, class_=...)).
+
+    Args:
+        element (HtmlElement): Элемент, внутри которого выполняется поиск
+        tag (str): Имя тега
+        class_name (str): Имя класса
+
+    Returns:
+        HtmlElement: Найденный элемент или None
+    """
+    found = element.xpath(
+        f'descendant::{tag}[contains(concat(" ", normalize-space(@class), " "), " {class_name} ")][1]'
+    )
+    return found[0] if found else None
+
+
+def _text(element):
+    """
+    Возвращает текст элемента вместе с текстом всех потомков (аналог get_text()).
+
+    Args:
+        element (HtmlElement): Элемент документа
+
+    Returns:
+        str: Текст элемента
+    """
+    return element.text_content()
+
+
+def _child_nodes(element):
+    """
+    Перебирает дочерние узлы элемента так же, как element.children в BeautifulSoup:
+    текстовые узлы возвращаются строками, теги - элементами.
+
+    Args:
+        element (HtmlElement): Элемент документа
+
+    Yields:
+        str | HtmlElement: Дочерние узлы по порядку
+    """
+    if element.text:
+        yield element.text
+
+    for child in element:
+        yield child
+        if child.tail:
+            yield child.tail
+
+
+def _node_str(node):
+    """
+    Возвращает строковое представление узла (аналог str() для узла BeautifulSoup).
+
+    Args:
+        node (str | HtmlElement): Узел документа или None
+
+    Returns:
+        str: Текст узла, разметка тега или 'None'
+    """
+    if node is None or isinstance(node, str):
+        return str(node)
+    return lxml.html.tostring(node, encoding='unicode', with_tail=False)
+
+
+def _tag_name(node):
+    """
+    Возвращает имя тега узла или None для текстовых узлов и комментариев.
+
+    Args:
+        node (str | HtmlElement): Узел документа
+
+    Returns:
+        str: Имя тега или None
+    """
+    if isinstance(node, str) or not isinstance(node.tag, str):
+        return None
+    return node.tag
+
+
+def _find_search_sections(root):
+    """
+    Находит заголовки разделов серий, авторов и книг за один проход по тексту страницы.
+
+    Args:
+        root (HtmlElement): Корневой элемент документа
+
+    Returns:
+        dict: Словарь вида {'series': текстовый узел заголовка, ...}
+    """
+    sections = {}
+
+    for text in root.xpath('//text()'):
+        for section, header in SEARCH_SECTION_HEADERS.items():
+            if section not in sections and header in text:
+                sections[section] = text
+
+        if len(sections) == len(SEARCH_SECTION_HEADERS):
+            break
+
+    return sections
+
+
+def _section_items(header):
+    """
+    Возвращает элементы <li> списка, следующего за заголовком раздела.
+
+    Args:
+        header (_ElementUnicodeResult): Текстовый узел заголовка или None
+
+    Returns:
+        list: Список элементов <li>
+    """
+    if header is None:
+        return []
+
+    # Ищем первый <ul> после текстового узла в порядке документа
+    parent = header.getparent()
+    if header.is_tail:
+        section_ul = parent.xpath('following::ul[1]')
+    else:
+        section_ul = parent.xpath('(descendant::ul | following::ul)[1]')
+
+    if not section_ul:
+        return []
+
+    return section_ul[0].findall('.//li')
+
+
+def _parse_series_items(series_items):
+    """
+    Извлекает информацию о сериях из элементов списка.
+
+    Args:
+        series_items (list): Элементы <li> раздела серий
+
+    Returns:
+        list: Список словарей с информацией о сериях
+    """
+    series_list = []
+
+    for item in series_items:
+        series_link = item.find('.//a')
+        if series_link is not None:
+            series_info = {
+                'url': flibusta_records.FLIBUSTA_URL + series_link.attrib['href'],
+                'name': _text(series_link).strip()
+            }
+
+            books_count_match = re.search(r'\((\d+) книг', _text(item))
+            if books_count_match:
+                series_info['books_count'] = int(books_count_match.group(1))
+
+            series_list.append(series_info)
+
+    return series_list
+
+
+def _parse_author_items(author_items):
+    """
+    Извлекает информацию об авторах из элементов списка.
+
+    Args:
+        author_items (list): Элементы <li> раздела авторов
+
+    Returns:
+        list: Список словарей с информацией об авторах
+    """
+    authors_list = []
+
+    for item in author_items:
+        author_link = item.find('.//a')
+        if author_link is not None:
+            author_info = {
+                'url': flibusta_records.FLIBUSTA_URL + author_link.attrib['href'],
+                'name': _text(author_link).strip()
+            }
+
+            books_count_match = re.search(r'\((\d+) книг', _text(item))
+            if books_count_match:
+                author_info['books_count'] = int(books_count_match.group(1))
+
+            authors_list.append(author_info)
+
+    return authors_list
+
+
+def _parse_book_items(book_items):
+    """
+    Извлекает информацию о книгах из элементов списка.
+
+    Args:
+        book_items (list): Элементы <li> раздела книг
+
+    Returns:
+        list: Список словарей с информацией о книгах
+    """
+    books_list = []
+
+    for item in book_items:
+        links = item.findall('.//a')
+        if links:
+            book_link = links[0]
+            book_info = {
+                'url': flibusta_records.FLIBUSTA_URL + book_link.attrib['href'],
+                'title': _text(book_link).strip(),
+                'authors': [
+                    {
+                        'name': _text(author_link).strip(),
+                        'url': flibusta_records.FLIBUSTA_URL + author_link.attrib['href']
+                    }
+                    for author_link in links[1:]
+                ]
+            }
+            books_list.append(book_info)
+
+    return books_list
+
+
+def parse_series(html_content):
+    """
+    Извлекает информацию о сериях книг из HTML-кода страницы.
+
+    Args:
+        html_content (str): HTML-код страницы
+
+    Returns:
+        list: Список словарей с информацией о сериях
+    """
+    sections = _find_search_sections(_make_tree(html_content))
+    return _parse_series_items(_section_items(sections.get('series')))
+
+
+def parse_authors(html_content):
+    """
+    Извлекает информацию об авторах из HTML-кода страницы.
+
+    Args:
+        html_content (str): HTML-код страницы
+
+    Returns:
+        list: Список словарей с информацией об авторах
+    """
+    sections = _find_search_sections(_make_tree(html_content))
+    return _parse_author_items(_section_items(sections.get('authors')))
+
+
+def parse_books(html_content):
+    """
+    Извлекает информацию о книгах из HTML-кода страницы.
+
+    Args:
+        html_content (str): HTML-код страницы
+
+    Returns:
+        list: Список словарей с информацией о книгах
+    """
+    sections = _find_search_sections(_make_tree(html_content))
+    return _parse_book_items(_section_items(sections.get('books')))
+
+
+def parse_search_page(html_content):
+    """
+    Разбирает страницу результатов поиска за один проход.
+
+    Args:
+        html_content (str): HTML-код страницы результатов поиска
+
+    Returns:
+        dict: Словарь с ключами 'series', 'authors', 'books' и 'total_pages'
+    """
+    root = _make_tree(html_content)
+    sections = _find_search_sections(root)
+
+    return {
+        'series': _parse_series_items(_section_items(sections.get('series'))),
+        'authors': _parse_author_items(_section_items(sections.get('authors'))),
+        'books': _parse_book_items(_section_items(sections.get('books'))),
+        'total_pages': get_total_pages(html_content)
+    }
+
+
+def _parse_book_rows(root, icon_tags, icon_per_row, with_authors):
+    """
+    Извлекает книги со страницы серии или автора за один проход по строкам списка,
+    разделенным тегами <br>.
+
+    Args:
+        root (HtmlElement): Корневой элемент документа
+        icon_tags (tuple): Теги значка книги, который должен предшествовать ссылке
+        icon_per_row (bool): True - значок ищется только в текущей строке,
+                             False - в любом месте блока до ссылки
+        with_authors (bool): Собирать ли авторов книги (ссылки /a/ в строке)
+
+    Returns:
+        list: Список словарей с информацией о книгах
+    """
+    books_list = []
+
+    # Блоки, в которых лежат ссылки на книги, в порядке их появления на странице
+    containers = {}
+    for book_link in root.iter('a'):
+        if book_link.get('href', '').startswith('/b/'):
+            parent = book_link.getparent()
+            containers.setdefault(parent, parent)
+
+    for container in containers:
+        icon_found = False
+        book_info = None
+        prev_node = None
+
+        for node in _child_nodes(container):
+            name = _tag_name(node)
+
+            if name == 'br':
+                book_info = None
+                if icon_per_row:
+                    icon_found = False
+            elif name in icon_tags:
+                icon_found = True
+            elif name == 'a':
+                href = node.get('href', '')
+
+                if book_info is None:
+                    if icon_found and href.startswith('/b/'):
+                        book_info = {
+                            'title': _text(node).strip(),
+                            'url': flibusta_records.FLIBUSTA_URL + href
+                        }
+                        if with_authors:
+                            book_info['authors'] = []
+                        book_info['download_links'] = []
+                        books_list.append(book_info)
+                else:
+                    if with_authors and href.startswith('/a/'):
+                        book_info['authors'].append({
+                            'name': _text(node).strip(),
+                            'url': flibusta_records.FLIBUSTA_URL + href
+                        })
+
+                    if 'скачать' in _node_str(prev_node):
+                        format_match = re.search(r'\((.*?)\)', _text(node))
+                        if format_match:
+                            book_info['download_links'].append({
+                                'format': format_match.group(1),
+                                'url': flibusta_records.FLIBUSTA_URL + href
+                            })
+
+            prev_node = node
+
+    return books_list
+
+
+def parse_series_books(html_content):
+    """
+    Извлекает информацию о книгах из страницы серии.
+
+    Args:
+        html_content (str): HTML-код страницы серии
+
+    Returns:
+        dict: Словарь с информацией о серии и список книг
+    """
+    root = _make_tree(html_content)
+    series_info = {}
+
+    title = _find_by_class(root, 'h1', 'title')
+    if title is not None:
+        series_info['name'] = _text(title).strip()
+
+    series_table = root.find('.//table[@style="width: auto"]')
+    if series_table is not None:
+        for row in series_table.findall('.//tr'):
+            cells = row.findall('.//td')
+            if len(cells) >= 2:
+                key = _text(cells[0]).strip().replace(':', '')
+                series_info[key] = _text(cells[1]).strip()
+
+    books_list = _parse_book_rows(root, icon_tags=('img',), icon_per_row=True, with_authors=True)
+
+    series_info['total_pages'] = get_total_pages(html_content)
+
+    return {
+        'series_info': series_info,
+        'books': books_list
+    }
+
+
+def parse_author_books(html_content):
+    """
+    Извлекает информацию о книгах из страницы автора.
+
+    Args:
+        html_content (str): HTML-код страницы автора
+
+    Returns:
+        dict: Словарь с информацией об авторе и список книг
+    """
+    root = _make_tree(html_content)
+    author_info = {}
+
+    title = _find_by_class(root, 'h1', 'title')
+    if title is not None:
+        author_info['name'] = _text(title).strip()
+
+    genre_p = _find_by_class(root, 'p', 'genre')
+    if genre_p is not None:
+        genre_links = genre_p.xpath(
+            'descendant::a[contains(concat(" ", normalize-space(@class), " "), " genre ")]'
+        )
+        author_info['genres'] = [
+            {
+                'name': _text(genre_link).strip(),
+                'url': flibusta_records.FLIBUSTA_URL + genre_link.attrib['href']
+            }
+            for genre_link in genre_links
+        ]
+
+    books_list = _parse_book_rows(root, icon_tags=('img', 'svg'), icon_per_row=False, with_authors=False)
+
+    author_info['total_pages'] = get_total_pages(html_content)
+
+    return {
+        'author_info': author_info,
+        'books': books_list
+    }
+
+
+def parse_book_page(html_content):
+    """
+    Извлекает информацию о книге из страницы книги (/b/<id>).
+
+    Args:
+        html_content (str): HTML-код страницы книги
+
+    Returns:
+        dict: Словарь книги в том же виде, что и flibusta_online_scraper.parse_book_page
+    """
+    root = _make_tree(html_content)
+    main = root.get_element_by_id('main', None)
+    if main is None:
+        main = root
+    book_info = {'title': None}
+
+    title = _find_by_class(main, 'h1', 'title')
+    if title is not None:
+        book_info['title'] = BOOK_TITLE_FORMAT_PATTERN.sub('', _text(title)).strip()
+
+    annotation_header = next((header for header in main.iter('h2') if 'Аннотация' in _text(header)), None)
+
+    authors = []
+    series = []
+    download_links = []
+    header_text = [main.text or '']
+
+    # Обход в порядке документа до заголовка аннотации
+    for node in main.iterdescendants():
+        if node is annotation_header:
+            break
+
+        header_text.append(node.text or '')
+        header_text.append(node.tail or '')
+
+        if _tag_name(node) != 'a':
+            continue
+
+        href = node.get('href', '')
+        if href.startswith('/a/'):
+            authors.append({
+                'name': _text(node).strip(),
+                'url': flibusta_records.FLIBUSTA_URL + href
+            })
+        elif href.startswith('/s/'):
+            number_match = SERIES_NUMBER_PATTERN.match(node.tail or '')
+            series.append({
+                'name': _text(node).strip(),
+                'url': flibusta_records.FLIBUSTA_URL + href,
+                'number': int(number_match.group(1)) if number_match else None
+            })
+        else:
+            download_match = BOOK_DOWNLOAD_PATTERN.match(href)
+            if download_match:
+                format_match = re.search(r'\((.*?)\)', _text(node))
+                download_links.append({
+                    'format': format_match.group(1) if format_match else download_match.group(1),
+                    'url': flibusta_records.FLIBUSTA_URL + href
+                })
+
+    book_info['authors'] = authors
+
+    genre_p = _find_by_class(main, 'p', 'genre')
+    book_info['genres'] = [] if genre_p is None else [
+        {
+            'name': _text(genre_link).strip(),
+            'url': flibusta_records.FLIBUSTA_URL + genre_link.attrib['href']
+        }
+        for genre_link in genre_p.xpath(
+            'descendant::a[contains(concat(" ", normalize-space(@class), " "), " genre ")]'
+        )
+    ]
+
+    book_info['series'] = series
+
+    book_info['annotation'] = None
+    if annotation_header is not None:
+        paragraphs = []
+        for sibling in annotation_header.itersiblings():
+            if _tag_name(sibling) != 'p':
+                break
+            paragraphs.append(_text(sibling).strip())
+        book_info['annotation'] = '\n'.join(paragraph for paragraph in paragraphs if paragraph) or None
+
+    text = ' '.join(header_text)
+    for key, pattern, numeric in BOOK_TEXT_FIELDS:
+        match = pattern.search(text)
+        if match is None:
+            book_info[key] = None
+        else:
+            book_info[key] = int(match.group(1)) if numeric else match.group(1)
+
+    book_info['download_links'] = download_links
+
+    return book_info
@@ -0,0 +1,36 @@
+"""
+Признаки разметки страниц Flibusta, общие для всех движков разбора.
+
+Функции parse_* из flibusta_online_scraper (BeautifulSoup) и flibusta_lxml_parser
+(нативный lxml) должны возвращать одинаковые результаты, поэтому заголовки
+разделов и регулярные выражения для текста страниц определены только здесь:
+исправление под изменившуюся разметку сайта сразу действует на все движки.
+"""
+import re
+
+
+# Заголовки разделов на странице результатов поиска
+SEARCH_SECTION_HEADERS = {
+    'series': 'Найденные серии',
+    'authors': 'Найденные писатели',
+    'books': 'Найденные книги',
+}
+
+SEARCH_SECTION_PATTERN = re.compile('|'.join(SEARCH_SECTION_HEADERS.values()))
+
+# Сведения о файле книги, извлекаемые из текста над аннотацией: (ключ, шаблон, числовое значение)
+BOOK_TEXT_FIELDS = (
+    ('size_kb', re.compile(r'Размер:\s*(\d+)\s*[KК]'), True),
+    ('pages', re.compile(r'(\d+)\s*с\.'), True),
+    ('year', re.compile(r'(?:издано в|Год издания:?)\s*(\d{4})'), True),
+    ('language', re.compile(r'Язык:\s*([^\W\d_]+)'), False),
+)
+
+# Формат файла в конце заголовка страницы книги: "Название (fb2)"
+BOOK_TITLE_FORMAT_PATTERN = re.compile(r'\s*\([a-z0-9, ]+\)\s*$')
+
+# Ссылки на скачивание книги: /b/<id>/<формат>, кроме ссылки на чтение
+BOOK_DOWNLOAD_PATTERN = re.compile(r'^/b/\d+/(?!read$)([\w.]+)$')
+
+# Номер книги в серии в тексте после ссылки на серию: "(Серия - 3)"
+SERIES_NUMBER_PATTERN = re.compile(r'^\s*-\s*(\d+)')
@@ -0,0 +1,300 @@
+"""
+Метрики обхода Flibusta: время и объем запросов, коды ответов, попадания в кэш,
+ожидание ограничителя частоты и время разбора страниц по движкам.
+
+Все запросы через flibusta_http.fetch и AsyncCrawler.fetch и все вызовы функций
+parse_* записываются в общий объект CrawlMetrics (get_metrics()). Сводку можно
+получить словарем для JSON (summary), текстом в формате Prometheus (to_prometheus)
+или короткой строкой для вывода (report).
+
+requests не дает отдельно измерить разрешение имени и установку соединения,
+поэтому для каждого запроса записывается время до получения заголовков ответа
+(ttfb, включает соединение, если оно новое), время загрузки тела (download)
+и общее время (total). Разбор, выполняемый в пуле процессов ParsePipeline,
+учитывается только в процессах-обработчиках и в сводку не попадает.
+"""
+import json
+import re
+import threading
+from collections import Counter, defaultdict
+
+
+# Типы страниц для разбивки метрик запросов: (шаблон пути URL, тип)
+URL_KINDS = [
+    (re.compile(r'^/booksearch'), 'search'),
+    (re.compile(r'^/s/\d+'), 'series'),
+    (re.compile(r'^/a/\d+'), 'author'),
+    (re.compile(r'^/b/\d+/'), 'download'),
+    (re.compile(r'^/b/\d+'), 'book'),
+]
+
+
+def url_kind(url):
+    """
+    Определяет тип страницы по URL.
+
+    Args:
+        url (str): URL страницы
+
+    Returns:
+        str: Тип страницы ('search', 'series', 'author', 'book', 'download' или 'other')
+    """
+    path = re.sub(r'^[a-z]+://[^/]+', '', url)
+
+    for pattern, kind in URL_KINDS:
+        if pattern.search(path):
+            return kind
+
+    return 'other'
+
+
+class _Timing:
+    """
+    Накопитель времени: количество, сумма и максимум.
+    """
+    __slots__ = ('count', 'total', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sum': round(self.total, 6),
+            'avg': round(self.total / self.count, 6) if self.count else 0.0,
+            'max': round(self.max, 6),
+        }
+
+
+class CrawlMetrics:
+    """
+    Потокобезопасный сборщик метрик обхода.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Обнуляет все метрики.
+        """
+        with self._lock:
+            # (тип страницы, код ответа) -> количество запросов
+            self._requests = Counter()
+            # тип страницы -> загружено байт
+            self._bytes = Counter()
+            # (тип страницы, фаза) -> время; фазы: ttfb, download, total
+            self._fetch_times = defaultdict(_Timing)
+            # hit / miss / revalidated -> количество
+            self._cache = Counter()
+            self._limiter_wait = _Timing()
+            # (функция, движок) -> время и объем разобранного HTML
+            self._parse_times = defaultdict(_Timing)
+            self._parse_bytes = Counter()
+
+    def record_fetch(self, url, status, total, ttfb=None, size=0):
+        """
+        Записывает сетевой запрос.
+
+        Args:
+            url (str): URL страницы
+            status (int | str): HTTP-код ответа или 'error', если ответ не получен
+            total (float): Общее время запроса в секундах
+            ttfb (float, optional): Время до получения заголовков ответа в секундах
+            size (int, optional): Размер тела ответа в байтах
+        """
+        kind = url_kind(url)
+
+        with self._lock:
+            self._requests[(kind, str(status))] += 1
+            self._bytes[kind] += size
+            self._fetch_times[(kind, 'total')].add(total)
+            if ttfb is not None:
+                self._fetch_times[(kind, 'ttfb')].add(ttfb)
+                self._fetch_times[(kind, 'download')].add(max(0.0, total - ttfb))
+
+    def record_cache(self, result):
+        """
+        Записывает обращение к кэшу ответов.
+
+        Args:
+            result (str): 'hit' - свежая запись, 'miss' - записи нет или страница изменилась,
+                          'revalidated' - сервер подтвердил устаревшую запись ответом 304
+        """
+        with self._lock:
+            self._cache[result] += 1
+
+    def record_wait(self, seconds):
+        """
+        Записывает время ожидания ограничителя частоты запросов.
+
+        Args:
+            seconds (float): Время ожидания в секундах
+        """
+        with self._lock:
+            self._limiter_wait.add(seconds)
+
+    def record_parse(self, parser, backend, seconds, size):
+        """
+        Записывает разбор страницы.
+
+        Args:
+            parser (str): Имя функции разбора
+            backend (str): Движок разбора HTML
+            seconds (float): Время разбора в секундах
+            size (int): Длина HTML-кода страницы
+        """
+        with self._lock:
+            self._parse_times[(parser, backend)].add(seconds)
+            self._parse_bytes[(parser, backend)] += size
+
+    def request_count(self):
+        """
+        Возвращает количество записанных сетевых запросов.
+
+        Returns:
+            int: Количество запросов с момента создания или обнуления метрик
+        """
+        with self._lock:
+            return sum(self._requests.values())
+
+    def summary(self):
+        """
+        Возвращает сводку метрик.
+
+        Returns:
+            dict: Сводка, пригодная для сохранения в JSON
+        """
+        with self._lock:
+            by_kind = {}
+            for (kind, status), count in sorted(self._requests.items()):
+                kind_info = by_kind.setdefault(kind, {'requests': 0, 'by_status': {}, 'bytes': self._bytes[kind]})
+                kind_info['requests'] += count
+                kind_info['by_status'][status] = count
+
+            for (kind, phase), timing in self._fetch_times.items():
+                by_kind[kind][phase] = timing.to_dict()
+
+            return {
+                'fetch': {
+                    'requests': sum(self._requests.values()),
+                    'bytes': sum(self._bytes.values()),
+                    'seconds': round(sum(timing.total for (_, phase), timing in self._fetch_times.items()
+                                         if phase == 'total'), 6),
+                    'by_kind': by_kind,
+                },
+                'cache': dict(self._cache),
+                'rate_limiter_wait': self._limiter_wait.to_dict(),
+                'parse': {
+                    f"{parser}/{backend}": {**timing.to_dict(), 'bytes': self._parse_bytes[(parser, backend)]}
+                    for (parser, backend), timing in sorted(self._parse_times.items())
+                },
+            }
+
+    def to_prometheus(self):
+        """
+        Возвращает метрики в текстовом формате Prometheus.
+
+        Returns:
+            str: Текст метрик
+        """
+        lines = []
+
+        def metric(name, metric_type, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{label}"' for key, label in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+        with self._lock:
+            metric('flibusta_fetch_requests_total', 'counter', 'HTTP requests by page kind and status',
+                   [({'kind': kind, 'status': status}, count)
+                    for (kind, status), count in sorted(self._requests.items())])
+            metric('flibusta_fetch_bytes_total', 'counter', 'Response body bytes by page kind',
+                   [({'kind': kind}, size) for kind, size in sorted(self._bytes.items())])
+
+            lines.append('# HELP flibusta_fetch_seconds Request time by page kind and phase')
+            lines.append('# TYPE flibusta_fetch_seconds summary')
+            for (kind, phase), timing in sorted(self._fetch_times.items()):
+                lines.append(f'flibusta_fetch_seconds_sum{{kind="{kind}",phase="{phase}"}} {timing.total:.6f}')
+                lines.append(f'flibusta_fetch_seconds_count{{kind="{kind}",phase="{phase}"}} {timing.count}')
+
+            metric('flibusta_cache_requests_total', 'counter', 'Response cache lookups by result',
+                   [({'result': result}, count) for result, count in sorted(self._cache.items())])
+
+            lines.append('# HELP flibusta_rate_limiter_wait_seconds Time spent waiting for the rate limiter')
+            lines.append('# TYPE flibusta_rate_limiter_wait_seconds summary')
+            lines.append(f'flibusta_rate_limiter_wait_seconds_sum {self._limiter_wait.total:.6f}')
+            lines.append(f'flibusta_rate_limiter_wait_seconds_count {self._limiter_wait.count}')
+
+            lines.append('# HELP flibusta_parse_seconds Parse time by parser function and backend')
+            lines.append('# TYPE flibusta_parse_seconds summary')
+            for (parser, backend), timing in sorted(self._parse_times.items()):
+                labels = f'parser="{parser}",backend="{backend}"'
+                lines.append(f'flibusta_parse_seconds_sum{{{labels}}} {timing.total:.6f}')
+                lines.append(f'flibusta_parse_seconds_count{{{labels}}} {timing.count}')
+
+            metric('flibusta_parse_bytes_total', 'counter', 'Parsed HTML size by parser function and backend',
+                   [({'parser': parser, 'backend': backend}, size)
+                    for (parser, backend), size in sorted(self._parse_bytes.items())])
+
+        return '\n'.join(lines) + '\n'
+
+    def report(self):
+        """
+        Возвращает краткую сводку для вывода в консоль.
+
+        Returns:
+            str: Строка со сводкой
+        """
+        summary = self.summary()
+        fetch = summary['fetch']
+        errors = sum(count for kind_info in fetch['by_kind'].values()
+                     for status, count in kind_info['by_status'].items() if status != '200' and status != '304')
+        parse_seconds = sum(parse_info['sum'] for parse_info in summary['parse'].values())
+        cache = summary['cache']
+
+        return (
+            f"Запросов: {fetch['requests']} (ошибок: {errors}), "
+            f"загружено: {fetch['bytes'] / 1024 / 1024:.1f} МБ за {fetch['seconds']:.1f} с; "
+            f"кэш: {cache.get('hit', 0)} попаданий, {cache.get('miss', 0)} промахов, "
+            f"{cache.get('revalidated', 0)} перепроверено; "
+            f"ожидание ограничителя: {summary['rate_limiter_wait']['sum']:.1f} с; "
+            f"разбор: {parse_seconds:.1f} с"
+        )
+
+    def save(self, filename):
+        """
+        Сохраняет метрики в файл: в формате Prometheus, если имя оканчивается на .prom,
+        иначе сводку в JSON.
+
+        Args:
+            filename (str): Имя файла
+        """
+        with open(filename, 'w', encoding='utf-8') as f:
+            if filename.endswith('.prom'):
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+
+
+_metrics = CrawlMetrics()
+
+
+def get_metrics():
+    """
+    Возвращает общий сборщик метрик.
+
+    Returns:
+        CrawlMetrics: Сборщик, в который пишут flibusta_http, flibusta_async и функции parse_*
+    """
+    return _metrics
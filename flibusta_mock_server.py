@@ -0,0 +1,545 @@
+"""
+Локальный сервер-заглушка, имитирующий Flibusta, для нагрузочной проверки обхода без сети.
+
+Сервер отвечает на /booksearch?page=N&ask=..., /s/<id> и /a/<id> (с пагинацией
+?page=N) и /b/<id> сгенерированными страницами в разметке сайта, а на /b/<id>/<формат> -
+файлами книг (fb2 и epub в zip-архиве) с поддержкой заголовка Range. Количество результатов,
+размер страницы, задержка ответа, доля ошибок и ответов 429 настраиваются.
+Счетчики запросов доступны по адресу /stats.
+
+Запуск и обход через заглушку:
+
+    python flibusta_mock_server.py --port 8080 --latency 0.05 --throttle-rate 0.05
+    FLIBUSTA_BASE_URL=http://127.0.0.1:8080 python flibusta_online_scraper.py
+
+или из кода:
+
+    with MockFlibustaServer(books_count=1000, latency=0.02) as server:
+        flibusta_http.configure_base_url(server.base_url)
+        results = parse_all_pages('мир')
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import urllib.parse
+import zipfile
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+
+# Количество книг на одной странице поиска, серии или автора
+DEFAULT_PAGE_SIZE = 50
+
+
+def _pager(path, last_page, query=None):
+    """
+    Строит блок пагинации сайта.
+
+    Args:
+        path (str): Путь страницы, например /s/101
+        last_page (int): Номер последней страницы (нумерация с 0)
+        query (str, optional): Параметр ask для страниц поиска
+
+    Returns:
+        str: HTML-код блока пагинации
+    """
+    suffix = f'&amp;ask={query}' if query else ''
+    items = ['<li class="pager-current first">1</li>']
+    for page in range(1, min(last_page, 8) + 1):
+        items.append(f'<li class="pager-item"><a href="{path}?page={page}{suffix}">{page + 1}</a></li>')
+    items.append(f'<li class="pager-next"><a href="{path}?page=1{suffix}">следующая ›</a></li>')
+    items.append(f'<li class="pager-last last"><a href="{path}?page={last_page}{suffix}">последняя »</a></li>')
+    return '<div class="item-list"><ul class="pager">' + '\n'.join(items) + '</ul></div>'
+
+
+def search_page(series_count, authors_count, books_count, last_page=0, query='%D0%BC%D0%B8%D1%80',
+                first_book=0, total_authors=None):
+    """
+    Строит страницу результатов поиска.
+
+    Args:
+        series_count (int): Количество найденных серий
+        authors_count (int): Количество найденных авторов
+        books_count (int): Количество книг на странице
+        last_page (int, optional): Номер последней страницы результатов (0 - без пагинации)
+        query (str, optional): Закодированный поисковый запрос
+        first_book (int, optional): Номер первой книги страницы
+        total_authors (int, optional): Количество авторов, на которых ссылаются книги.
+                                       По умолчанию authors_count.
+
+    Returns:
+        str: HTML-код страницы
+    """
+    total_authors = max(total_authors or authors_count, 1)
+    parts = ['<html><head><title>Поиск</title></head><body>', '<div id="main">', '<h1 class="title">Поиск книг</h1>']
+
+    if series_count:
+        parts.append(f'<h3>Найденные серии ({series_count}):</h3>')
+        parts.append('<ul>')
+        for i in range(series_count):
+            parts.append(f'<li><a href="/s/{1000 + i}">Серия <b>{i}</b></a> ({i % 40 + 1} книг)</li>')
+        parts.append('</ul>')
+
+    if authors_count:
+        parts.append(f'<h3>Найденные писатели ({authors_count}):</h3>')
+        parts.append('<ul>')
+        for i in range(authors_count):
+            parts.append(f'<li><a href="/a/{2000 + i}">Писатель {i}</a> ({i % 200 + 1} книг)</li>')
+        parts.append('</ul>')
+
+    if books_count:
+        parts.append(f'<h3>Найденные книги ({books_count}):</h3>')
+        parts.append('<ul>')
+        for i in range(first_book, first_book + books_count):
+            authors = ', '.join(f'<a href="/a/{2000 + (i + k) % total_authors}">Писатель {k}</a>'
+                                for k in range(i % 3 + 1))
+            parts.append(f'<li><a href="/b/{30000 + i}">Книга <span style="background-color: #FFFCBB">{i}</span></a> - {authors}</li>')
+        parts.append('</ul>')
+
+    if last_page:
+        parts.append(_pager('/booksearch', last_page, query))
+
+    parts.append('</div></body></html>')
+    return '\n'.join(parts)
+
+
+def series_page(series_id, books_count, last_page=0, first_book=0):
+    """
+    Строит страницу серии: строки книг со значком img, разделенные <br>.
+
+    Args:
+        series_id (int): Идентификатор серии
+        books_count (int): Количество книг на странице
+        last_page (int, optional): Номер последней страницы серии (0 - без пагинации)
+        first_book (int, optional): Номер первой книги страницы
+
+    Returns:
+        str: HTML-код страницы
+    """
+    parts = ['<html><head><title>Серия</title></head><body>', '<div id="main">',
+             f'<h1 class="title">Серия {series_id}</h1>',
+             '<table style="width: auto"><tr><td>Жанр:</td><td>Фантастика</td></tr>'
+             f'<tr><td>Книг:</td><td>{books_count * (last_page + 1)}</td></tr></table>',
+             '<form name="bk" action="/mass/download">']
+
+    for i in range(first_book, first_book + books_count):
+        book_id = series_id * 100 + i
+        parts.append(
+            f'<img src="/img/znak.gif" border="0"> {i + 1}. <a href="/b/{book_id}">Книга {i}</a> - '
+            f'<a href="/a/{2000 + i % 7}">Писатель {i % 7}</a> и <a href="/a/{2100 + i % 5}">Соавтор {i % 5}</a> '
+            f'(скачать <a href="/b/{book_id}/fb2">(fb2)</a>) <span>(скачать <a href="/b/{book_id}/epub">(epub)</a>)</span><br>'
+        )
+
+    parts.append('</form>')
+    parts.append(_pager(f'/s/{series_id}', last_page) if last_page else '<div class="item-list"></div>')
+    parts.append('</div></body></html>')
+    return '\n'.join(parts)
+
+
+def author_page(author_id, books_count, last_page=0, first_book=0):
+    """
+    Строит страницу автора: строки книг со значком svg и флажком, разделенные <br>.
+
+    Args:
+        author_id (int): Идентификатор автора
+        books_count (int): Количество книг на странице
+        last_page (int, optional): Номер последней страницы автора (0 - без пагинации)
+        first_book (int, optional): Номер первой книги страницы
+
+    Returns:
+        str: HTML-код страницы
+    """
+    parts = ['<html><head><title>Автор</title></head><body>', '<div id="main">',
+             f'<h1 class="title">Писатель {author_id}</h1>',
+             '<p class="genre"><a class="genre" href="/g/sf_social">Социальная фантастика</a>, '
+             '<a class="genre" href="/g/sf">Научная фантастика</a></p>',
+             '<form method="POST" action="/mass/download">']
+
+    for i in range(first_book, first_book + books_count):
+        book_id = author_id * 1000 + i
+        if i % 25 == 0:
+            parts.append(f'<h4>Серия {i // 25}</h4>')
+        parts.append(
+            f'<svg width="10" height="10"><rect width="10" height="10"/></svg>'
+            f'<input type="checkbox" name="bchk{book_id}"> - <a href="/b/{book_id}">Книга {i}</a> '
+            f'<span style="size">{350 + i % 900}K</span> (скачать <a href="/b/{book_id}/fb2">(fb2)</a>) '
+            f'(скачать <a href="/b/{book_id}/epub">(epub)</a>) (скачать <a href="/b/{book_id}/mobi">(mobi)</a>)<br>'
+        )
+
+    parts.append('</form>')
+    parts.append(_pager(f'/a/{author_id}', last_page) if last_page else '<div class="item-list"></div>')
+    parts.append('</div></body></html>')
+    return '\n'.join(parts)
+
+
+def book_page(book_id):
+    """
+    Строит страницу книги: название, авторы, жанры, серия с номером, размер,
+    год издания, язык, ссылки на скачивание и аннотация.
+
+    Args:
+        book_id (int): Идентификатор книги
+
+    Returns:
+        str: HTML-код страницы
+    """
+    author_id = book_id // 1000 or 1
+    series_id = 100 + book_id % 50
+    authors = f'<a href="/a/{author_id}">Писатель {author_id}</a>'
+    if book_id % 3 == 0:
+        authors += f', <a href="/a/{author_id + 1}">Писатель {author_id + 1}</a>'
+
+    parts = ['<html><head><title>Книга (fb2) | Флибуста</title></head><body>', '<div id="main">',
+             f'<h1 class="title">Книга {book_id} (fb2) </h1>',
+             authors,
+             '<p class="genre"><a class="genre" name="sf_social" href="/g/sf_social">Социальная фантастика</a>, '
+             '<a class="genre" name="sf" href="/g/sf">Научная фантастика</a></p>',
+             f'(<a href="/s/{series_id}">Серия {series_id}</a> - {book_id % 25 + 1})<br>',
+             f'<span style="size">Размер: {350 + book_id % 900} Кб, {100 + book_id % 400} с.</span><br>',
+             f'издано в {1960 + book_id % 60} г.<br>',
+             'Язык: русский<br>',
+             'Добавлена: 01.01.2020<br>',
+             f'(<a href="/b/{book_id}/read">читать</a>) (скачать <a href="/b/{book_id}/fb2">(fb2)</a>) '
+             f'(скачать <a href="/b/{book_id}/epub">(epub)</a>) (скачать <a href="/b/{book_id}/mobi">(mobi)</a>)<br>',
+             '<h2>Аннотация</h2>',
+             f'<p>Аннотация к книге {book_id}: <i>приключения</i> героев в далеком будущем.</p>',
+             '<p>Второй абзац аннотации.</p>',
+             '<hr>',
+             f'<h3>Другие книги автора</h3><ul><li><a href="/b/{book_id + 1}">Книга {book_id + 1}</a> - '
+             f'<a href="/a/{author_id + 7}">Писатель {author_id + 7}</a></li></ul>',
+             '</div></body></html>']
+    return '\n'.join(parts)
+
+
+def book_file(book_id, book_format):
+    """
+    Строит файл книги для скачивания. Содержимое зависит только от аргументов,
+    поэтому докачка по частям дает тот же файл.
+
+    Args:
+        book_id (int): Идентификатор книги
+        book_format (str): Формат ('fb2', 'epub', 'mobi' и т.п.)
+
+    Returns:
+        bytes: fb2 и epub - zip-архив, остальные форматы - содержимое файла
+    """
+    text = ''.join(f'<p>Книга {book_id}, абзац {i}.</p>\n' for i in range(200 + book_id % 300))
+    content = f'<?xml version="1.0" encoding="utf-8"?>\n<FictionBook><body>\n{text}</body></FictionBook>\n'
+
+    if book_format not in ('fb2', 'epub'):
+        return content.encode('utf-8')
+
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        # Постоянная дата в заголовке, иначе архив менялся бы между запросами
+        info = zipfile.ZipInfo(f'{book_id}.{book_format}', date_time=(2020, 1, 1, 0, 0, 0))
+        info.compress_type = zipfile.ZIP_DEFLATED
+        archive.writestr(info, content)
+    return buffer.getvalue()
+
+
+def _page_slice(total, page, page_size):
+    """
+    Вычисляет диапазон книг страницы и номер последней страницы.
+
+    Args:
+        total (int): Общее количество книг
+        page (int): Номер страницы (с 0)
+        page_size (int): Книг на странице
+
+    Returns:
+        tuple: (номер первой книги, количество книг на странице, номер последней страницы)
+    """
+    last_page = max(0, (total - 1) // page_size)
+    first = page * page_size
+    return first, max(0, min(page_size, total - first)), last_page
+
+
+class MockFlibustaServer:
+    """
+    Многопоточный HTTP-сервер, отдающий сгенерированные страницы Flibusta.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, series_count=20, authors_count=20, books_count=500,
+                 series_books=120, author_books=300, page_size=DEFAULT_PAGE_SIZE, latency=0.0,
+                 latency_jitter=0.0, error_rate=0.0, throttle_rate=0.0, max_rate=None, retry_after=1,
+                 seed=None):
+        """
+        Args:
+            host (str, optional): Адрес, на котором слушает сервер
+            port (int, optional): Порт. 0 - выбрать свободный.
+            series_count (int, optional): Количество серий в результатах поиска
+            authors_count (int, optional): Количество авторов в результатах поиска
+            books_count (int, optional): Количество книг в результатах поиска
+            series_books (int, optional): Количество книг в каждой серии
+            author_books (int, optional): Количество книг у каждого автора
+            page_size (int, optional): Книг на одной странице
+            latency (float, optional): Задержка перед ответом в секундах
+            latency_jitter (float, optional): Случайная добавка к задержке в секундах
+            error_rate (float, optional): Доля запросов, на которые отвечает 500
+            throttle_rate (float, optional): Доля запросов, на которые отвечает 429
+            max_rate (float, optional): Допустимое количество запросов в секунду;
+                                        сверх него сервер отвечает 429
+            retry_after (int, optional): Значение заголовка Retry-After в ответах 429
+            seed (int, optional): Начальное значение генератора случайных чисел
+        """
+        self.series_count = series_count
+        self.authors_count = authors_count
+        self.books_count = books_count
+        self.series_books = series_books
+        self.author_books = author_books
+        self.page_size = page_size
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.max_rate = max_rate
+        self.retry_after = retry_after
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._recent = deque()
+        self._stats = Counter()
+
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """
+        Запускает сервер в фоновом потоке.
+
+        Returns:
+            str: Адрес сервера для flibusta_http.configure_base_url
+        """
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        """
+        Останавливает сервер.
+        """
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def serve_forever(self):
+        """
+        Обслуживает запросы в текущем потоке до прерывания.
+        """
+        self._server.serve_forever()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def stats(self):
+        """
+        Возвращает счетчики обслуженных запросов.
+
+        Returns:
+            dict: Количество запросов, ответов по кодам и отданных байт
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def _fault(self):
+        """
+        Решает, нужно ли ответить на запрос ошибкой.
+
+        Returns:
+            int: Код ответа 429 или 500, либо None для обычного ответа
+        """
+        with self._lock:
+            if self.max_rate:
+                now = time.monotonic()
+                while self._recent and now - self._recent[0] > 1.0:
+                    self._recent.popleft()
+                if len(self._recent) >= self.max_rate:
+                    return 429
+                self._recent.append(now)
+
+            roll = self._random.random()
+
+        if roll < self.throttle_rate:
+            return 429
+        if roll < self.throttle_rate + self.error_rate:
+            return 500
+        return None
+
+    def render(self, path, params):
+        """
+        Строит страницу по пути запроса.
+
+        Args:
+            path (str): Путь запроса без параметров
+            params (dict): Параметры запроса
+
+        Returns:
+            str: HTML-код страницы или None, если путь не поддерживается
+        """
+        page = int(params.get('page', ['0'])[0] or 0)
+
+        if path == '/booksearch':
+            first, count, last_page = _page_slice(self.books_count, page, self.page_size)
+            query = urllib.parse.quote(params.get('ask', [''])[0])
+            return search_page(
+                self.series_count if page == 0 else 0,
+                self.authors_count if page == 0 else 0,
+                count, last_page=last_page, query=query, first_book=first,
+                total_authors=self.authors_count
+            )
+
+        match = re.fullmatch(r'/([abs])/(\d+)', path)
+        if not match:
+            return None
+
+        entity_id = int(match.group(2))
+        if match.group(1) == 'b':
+            return book_page(entity_id)
+
+        if match.group(1) == 's':
+            first, count, last_page = _page_slice(self.series_books, page, self.page_size)
+            return series_page(entity_id, count, last_page=last_page, first_book=first)
+
+        first, count, last_page = _page_slice(self.author_books, page, self.page_size)
+        return author_page(entity_id, count, last_page=last_page, first_book=first)
+
+    def _make_handler(self):
+        """
+        Создает класс обработчика запросов, связанный с этим сервером.
+
+        Returns:
+            type: Класс обработчика для ThreadingHTTPServer
+        """
+        mock = self
+
+        class MockHandler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Заголовки и тело пишутся отдельно; без этого ответ задерживается на время отложенного ACK
+            disable_nagle_algorithm = True
+
+            def _send(self, status, body, content_type='text/html; charset=utf-8', headers=None):
+                data = body if isinstance(body, bytes) else body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+                with mock._lock:
+                    mock._stats['requests'] += 1
+                    mock._stats[f'status_{status}'] += 1
+                    mock._stats['bytes'] += len(data)
+
+            def do_GET(self):
+                url = urllib.parse.urlsplit(self.path)
+
+                if url.path == '/stats':
+                    self._send(200, json.dumps(mock.stats()), content_type='application/json')
+                    return
+
+                delay = mock.latency + mock._random.random() * mock.latency_jitter
+                if delay > 0:
+                    time.sleep(delay)
+
+                fault = mock._fault()
+                if fault == 429:
+                    self._send(429, 'Too Many Requests', headers={'Retry-After': str(mock.retry_after)})
+                    return
+                if fault == 500:
+                    self._send(500, 'Internal Server Error')
+                    return
+
+                download = re.fullmatch(r'/b/(\d+)/(\w+)', url.path)
+                if download:
+                    self._send_book(int(download.group(1)), download.group(2))
+                    return
+
+                body = mock.render(url.path, urllib.parse.parse_qs(url.query))
+                if body is None:
+                    self._send(404, 'Not Found')
+                else:
+                    self._send(200, body)
+
+            def _send_book(self, book_id, book_format):
+                data = book_file(book_id, book_format)
+                content_type = 'application/zip' if book_format in ('fb2', 'epub') else 'application/octet-stream'
+                headers = {'Accept-Ranges': 'bytes'}
+
+                # Поддерживается один диапазон вида bytes=N-
+                range_match = re.fullmatch(r'bytes=(\d+)-', self.headers.get('Range', ''))
+                if not range_match:
+                    self._send(200, data, content_type=content_type, headers=headers)
+                    return
+
+                start = int(range_match.group(1))
+                if start >= len(data):
+                    headers['Content-Range'] = f'bytes */{len(data)}'
+                    self._send(416, b'', content_type=content_type, headers=headers)
+                    return
+
+                headers['Content-Range'] = f'bytes {start}-{len(data) - 1}/{len(data)}'
+                self._send(206, data[start:], content_type=content_type, headers=headers)
+
+            def log_message(self, format, *args):
+                pass
+
+        return MockHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальный сервер-заглушка Flibusta")
+    parser.add_argument('--host', default='127.0.0.1', help="Адрес сервера")
+    parser.add_argument('--port', type=int, default=8080, help="Порт сервера")
+    parser.add_argument('--series', type=int, default=20, help="Количество серий в результатах поиска")
+    parser.add_argument('--authors', type=int, default=20, help="Количество авторов в результатах поиска")
+    parser.add_argument('--books', type=int, default=500, help="Количество книг в результатах поиска")
+    parser.add_argument('--series-books', type=int, default=120, help="Количество книг в серии")
+    parser.add_argument('--author-books', type=int, default=300, help="Количество книг у автора")
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE, help="Книг на странице")
+    parser.add_argument('--latency', type=float, default=0.0, help="Задержка ответа в секундах")
+    parser.add_argument('--latency-jitter', type=float, default=0.0, help="Случайная добавка к задержке")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Доля ответов 500")
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="Доля ответов 429")
+    parser.add_argument('--max-rate', type=float, default=None, help="Запросов в секунду до ответов 429")
+    parser.add_argument('--retry-after', type=int, default=1, help="Значение Retry-After в ответах 429")
+    parser.add_argument('--seed', type=int, default=None, help="Начальное значение генератора случайных чисел")
+    args = parser.parse_args()
+
+    server = MockFlibustaServer(
+        host=args.host, port=args.port, series_count=args.series, authors_count=args.authors,
+        books_count=args.books, series_books=args.series_books, author_books=args.author_books,
+        page_size=args.page_size, latency=args.latency, latency_jitter=args.latency_jitter,
+        error_rate=args.error_rate, throttle_rate=args.throttle_rate, max_rate=args.max_rate,
+        retry_after=args.retry_after, seed=args.seed
+    )
+
+    print(f"Сервер-заглушка запущен: {server.base_url}")
+    print(f"Для обхода через заглушку: FLIBUSTA_BASE_URL={server.base_url} python flibusta_online_scraper.py")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\nСтатистика: {server.stats()}")
+
+
+if __name__ == '__main__':
+    main()
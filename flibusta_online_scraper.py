@@ -1,10 +1,36 @@
+import argparse
 import urllib.parse
 import re
-import requests
 from bs4 import BeautifulSoup
-import time
-import random
+import functools
 import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import flibusta_http
+import flibusta_metrics
+import flibusta_records
+from flibusta_checkpoint import CrawlCheckpoint
+from flibusta_entities import EntityStore
+from flibusta_index import SearchIndex
+from flibusta_markup import (
+    BOOK_DOWNLOAD_PATTERN,
+    BOOK_TEXT_FIELDS,
+    BOOK_TITLE_FORMAT_PATTERN,
+    SEARCH_SECTION_HEADERS,
+    SEARCH_SECTION_PATTERN,
+    SERIES_NUMBER_PATTERN,
+)
+from flibusta_output import OUTPUT_FORMATS, LegacyJsonWriter, open_writer, output_format_for
+from flibusta_pagination import get_total_pages
+from flibusta_records import entity_id, parse_entity_id
+
+try:
+    import flibusta_lxml_parser
+except ImportError:  # lxml не установлен, нативный парсер недоступен
+    flibusta_lxml_parser = None
 
 
 def build_search_url(query, page=0):
@@ -28,11 +54,24 @@ def build_search_url(query, page=0):
     formatted_query = '+'.join(encoded_words)
 
     # Формируем URL для поиска
-    url = f"https://flibusta.is/booksearch?page={page}&ask={formatted_query}"
+    url = f"{flibusta_records.FLIBUSTA_URL}/booksearch?page={page}&ask={formatted_query}"
 
     return url
 
 
+def query_slug(query):
+    """
+    Преобразует поисковый запрос в часть имени файла.
+
+    Args:
+        query (str): Поисковый запрос
+
+    Returns:
+        str: Запрос, в котором пробелы и символы, недопустимые в именах файлов, заменены на '_'
+    """
+    return re.sub(r'[^\w-]+', '_', query).strip('_') or 'query'
+
+
 def get_max_page_number(html_content):
     """
     Извлекает максимальный номер страницы из HTML-кода страницы результатов поиска.
@@ -43,18 +82,7 @@ def get_max_page_number(html_content):
     Returns:
         int: Максимальный номер страницы или 1, если не найдено
     """
-    # Используем регулярные выражения для поиска ссылок на страницы
-    page_links_pattern = r'booksearch\?page=(\d+)&amp;ask='
-    matches = re.findall(page_links_pattern, html_content)
-
-    max_page = 0
-    if matches:
-        # Преобразуем найденные номера страниц в целые числа
-        page_numbers = [int(page) + 1 for page in matches]  # page=0 соответствует странице 1
-        max_page = max(page_numbers)
-
-    # Если ничего не найдено, возвращаем 1 (текущая страница)
-    return max_page if max_page > 0 else 1
+    return get_total_pages(html_content)
 
 
 def get_search_results_page(query, page=0):
@@ -70,204 +98,568 @@ def get_search_results_page(query, page=0):
     """
     url = build_search_url(query, page)
 
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'Accept-Language': 'ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
-        'Connection': 'keep-alive',
-        'Referer': 'https://flibusta.is/'
-    }
-
-    try:
-        response = requests.get(url, headers=headers)
-
-        if response.status_code == 200:
-            return response.text
-        else:
-            print(f"Ошибка при запросе: {response.status_code}")
-            return None
-    except Exception as e:
-        print(f"Ошибка при выполнении запроса: {e}")
-        return None
+    return flibusta_http.fetch(url)
 
 
-def make_request(url):
+def make_request(url, revalidate=False):
     """
     Выполняет HTTP-запрос и возвращает HTML-код страницы.
 
     Args:
         url (str): URL страницы
+        revalidate (bool, optional): Перепроверять запись кэша у сервера, даже если она свежая
 
     Returns:
         str: HTML-код страницы или None в случае ошибки
     """
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'Accept-Language': 'ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
-        'Connection': 'keep-alive',
-        'Referer': 'https://flibusta.is/'
-    }
+    return flibusta_http.fetch(url, revalidate=revalidate)
 
-    try:
-        response = requests.get(url, headers=headers)
 
-        if response.status_code == 200:
-            return response.text
-        else:
-            print(f"Ошибка при запросе: {response.status_code}")
-            return None
-    except Exception as e:
-        print(f"Ошибка при выполнении запроса: {e}")
+def fetch_and_parse(url, parser, checkpoint=None, revalidate=False):
+    """
+    Загружает страницу и разбирает ее. Если передана контрольная точка, уже
+    обработанные страницы берутся из нее, а новые результаты в нее записываются.
+
+    Args:
+        url (str): URL страницы
+        parser (callable): Функция разбора HTML-кода страницы
+        checkpoint (CrawlCheckpoint, optional): Контрольная точка обхода
+        revalidate (bool, optional): Перепроверять запись кэша у сервера, даже если она свежая
+
+    Returns:
+        dict: Результат разбора страницы или None в случае ошибки
+    """
+    if checkpoint is not None:
+        result = checkpoint.get(url)
+        if result is not None:
+            return result
+
+    html_content = make_request(url, revalidate)
+
+    if not html_content:
         return None
 
+    result = parser(html_content)
 
-def parse_series(html_content):
+    if checkpoint is not None:
+        checkpoint.put(url, result)
+
+    return result
+
+
+# Количество страниц пагинации, загружаемых одновременно. Частоту запросов
+# по-прежнему ограничивает общий RateLimiter из flibusta_http.
+DEFAULT_PAGE_WORKERS = 4
+
+
+def set_page_workers(workers):
     """
-    Извлекает информацию о сериях книг из HTML-кода страницы.
+    Устанавливает количество страниц пагинации, загружаемых одновременно.
 
     Args:
-        html_content (str): HTML-код страницы
+        workers (int): Количество потоков загрузки страниц одной сущности или запроса
+    """
+    global DEFAULT_PAGE_WORKERS
+    DEFAULT_PAGE_WORKERS = max(1, workers)
+
+
+def paginated_url(url, page):
+    """
+    Строит URL страницы пагинации: заменяет параметр page или добавляет его.
+
+    Args:
+        url (str): URL первой страницы, например https://flibusta.is/s/123
+        page (int): Номер страницы (с 0)
 
     Returns:
-        list: Список словарей с информацией о сериях
+        str: URL страницы; для страницы 0 без параметра page возвращается исходный URL
     """
-    soup = BeautifulSoup(html_content, 'html.parser')
-    series_list = []
+    if re.search(r'[?&]page=\d+', url):
+        return re.sub(r'([?&])page=\d+', rf'\g<1>page={page}', url, count=1)
+
+    if page == 0:
+        return url
+
+    return f"{url}{'&' if '?' in url else '?'}page={page}"
+
+
+def iter_paginated(url, parser, total_pages, checkpoint=None, url_builder=None, workers=None, revalidate=False):
+    """
+    Загружает и разбирает страницы 1..total_pages-1 параллельно и отдает результаты
+    строго по порядку страниц. Первая страница (0) не загружается: по ней вызывающий
+    код уже узнал количество страниц.
+
+    Args:
+        url (str): URL первой страницы
+        parser (callable): Функция разбора HTML-кода страницы
+        total_pages (int): Общее количество страниц
+        checkpoint (CrawlCheckpoint, optional): Контрольная точка обхода
+        url_builder (callable, optional): Функция url_builder(page), возвращающая URL страницы.
+                                          По умолчанию paginated_url(url, page).
+        workers (int, optional): Количество одновременно загружаемых страниц.
+                                 По умолчанию DEFAULT_PAGE_WORKERS.
+        revalidate (bool, optional): Перепроверять записи кэша у сервера, даже если они свежие
+
+    Yields:
+        tuple: (номер страницы с 0, результат разбора или None, если страницу не удалось получить)
+    """
+    if total_pages <= 1:
+        return
+
+    executor, futures = _submit_pages(url, parser, total_pages, checkpoint, url_builder, workers, revalidate)
+    try:
+        for page, future in enumerate(futures, start=1):
+            yield page, future.result()
+    finally:
+        # Если потребитель прекратил перебор, оставшиеся страницы не загружаются
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _submit_pages(url, parser, total_pages, checkpoint=None, url_builder=None, workers=None, revalidate=False):
+    """
+    Ставит загрузку и разбор страниц 1..total_pages-1 в очередь пула потоков.
+
+    Args:
+        url (str): URL первой страницы
+        parser (callable): Функция разбора HTML-кода страницы
+        total_pages (int): Общее количество страниц (больше 1)
+        checkpoint (CrawlCheckpoint, optional): Контрольная точка обхода
+        url_builder (callable, optional): Функция url_builder(page), возвращающая URL страницы
+        workers (int, optional): Количество одновременно загружаемых страниц
+        revalidate (bool, optional): Перепроверять записи кэша у сервера, даже если они свежие
+
+    Returns:
+        tuple: (ThreadPoolExecutor, список Future по порядку страниц)
+    """
+    if url_builder is None:
+        url_builder = functools.partial(paginated_url, url)
+
+    executor = ThreadPoolExecutor(max_workers=min(workers or DEFAULT_PAGE_WORKERS, total_pages - 1))
+    futures = [
+        executor.submit(fetch_and_parse, url_builder(page), parser, checkpoint, revalidate)
+        for page in range(1, total_pages)
+    ]
+    return executor, futures
+
+
+def _result_total_pages(result):
+    """
+    Возвращает количество страниц из результата разбора первой страницы.
+
+    Args:
+        result (dict): Результат parse_search_page, parse_series_books или parse_author_books
+
+    Returns:
+        int: Количество страниц
+    """
+    if 'total_pages' in result:
+        return result['total_pages']
+
+    for info_key in ('series_info', 'author_info'):
+        if info_key in result:
+            return result[info_key].get('total_pages', 1)
+
+    return 1
+
+
+def iter_pages(url, parser, checkpoint=None, url_builder=None, max_pages=None, workers=None):
+    """
+    Загружает первую страницу и все страницы пагинации, отдавая результаты по порядку.
+
+    Количество страниц определяется регулярным выражением по HTML-коду первой
+    страницы (get_total_pages), поэтому загрузка остальных страниц начинается
+    до разбора первой, а не после него.
+
+    Args:
+        url (str): URL первой страницы
+        parser (callable): Функция разбора HTML-кода страницы
+        checkpoint (CrawlCheckpoint, optional): Контрольная точка обхода
+        url_builder (callable, optional): Функция url_builder(page), возвращающая URL страницы.
+                                          По умолчанию paginated_url(url, page).
+        max_pages (int, optional): Максимальное количество страниц
+        workers (int, optional): Количество одновременно загружаемых страниц
+
+    Yields:
+        tuple: (номер страницы с 0, количество страниц, результат разбора или None).
+               Если первую страницу получить не удалось, отдается только (0, 0, None).
+    """
+    first_url = url_builder(0) if url_builder is not None else url
+
+    first_result = checkpoint.get(first_url) if checkpoint is not None else None
+    html_content = None
+
+    if first_result is not None:
+        total_pages = _result_total_pages(first_result)
+    else:
+        html_content = make_request(first_url)
+        if not html_content:
+            yield 0, 0, None
+            return
+        total_pages = get_total_pages(html_content)
+
+    if max_pages is not None and max_pages < total_pages:
+        total_pages = max_pages
+
+    if total_pages <= 1:
+        executor, futures = None, []
+    else:
+        executor, futures = _submit_pages(url, parser, total_pages, checkpoint, url_builder, workers)
 
-    # Ищем заголовок раздела серий
-    series_header = soup.find(string=lambda text: isinstance(text, str) and 'Найденные серии' in text)
+    try:
+        # Первая страница разбирается, пока остальные уже загружаются
+        if first_result is None:
+            first_result = parser(html_content)
+            if checkpoint is not None:
+                checkpoint.put(first_url, first_result)
+
+        yield 0, total_pages, first_result
 
-    if series_header:
-        # Получаем следующий после заголовка элемент <ul>, который содержит список серий
-        series_ul = series_header.find_next('ul')
+        for page, future in enumerate(futures, start=1):
+            yield page, total_pages, future.result()
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
 
-        if series_ul:
-            series_items = series_ul.find_all('li')
 
-            for item in series_items:
-                series_info = {}
+def fetch_paginated(url, parser, total_pages, checkpoint=None, url_builder=None, workers=None):
+    """
+    Загружает и разбирает страницы 1..total_pages-1 параллельно, см. iter_paginated.
 
-                # Находим ссылку на серию
-                series_link = item.find('a')
-                if series_link:
-                    # Получаем URL серии
-                    series_info['url'] = 'https://flibusta.is' + series_link['href']
+    Args:
+        url (str): URL первой страницы
+        parser (callable): Функция разбора HTML-кода страницы
+        total_pages (int): Общее количество страниц
+        checkpoint (CrawlCheckpoint, optional): Контрольная точка обхода
+        url_builder (callable, optional): Функция url_builder(page), возвращающая URL страницы
+        workers (int, optional): Количество одновременно загружаемых страниц
+
+    Returns:
+        list: Результаты разбора страниц 1..total_pages-1 по порядку (None для неполученных)
+    """
+    return [result for _, result in iter_paginated(url, parser, total_pages, checkpoint, url_builder, workers)]
+
+
+# Доступные движки разбора HTML:
+#   'html.parser' - BeautifulSoup со встроенным парсером Python
+#   'lxml'        - BeautifulSoup с построителем дерева lxml
+#   'lxml-native' - разбор средствами lxml без BeautifulSoup
+PARSER_BACKENDS = ('html.parser', 'lxml', 'lxml-native')
+
+DEFAULT_PARSER_BACKEND = 'html.parser'
+
+
+def set_default_parser_backend(backend):
+    """
+    Устанавливает движок разбора HTML, используемый по умолчанию всеми функциями parse_*.
+
+    Args:
+        backend (str): Имя движка из PARSER_BACKENDS
+    """
+    global DEFAULT_PARSER_BACKEND
+    DEFAULT_PARSER_BACKEND = _resolve_parser_backend(backend)
+
+
+def _resolve_parser_backend(backend=None):
+    """
+    Проверяет имя движка разбора HTML и подставляет движок по умолчанию.
+
+    Args:
+        backend (str, optional): Имя движка или None
+
+    Returns:
+        str: Имя движка
+
+    Raises:
+        ValueError: Если движок неизвестен или для него не установлен lxml
+    """
+    if backend is None:
+        backend = DEFAULT_PARSER_BACKEND
 
-                    # Получаем название серии
-                    series_name = series_link.get_text().strip()
-                    series_info['name'] = series_name
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(f"Неизвестный движок разбора HTML: {backend}")
 
-                    # Пытаемся извлечь количество книг в серии
-                    series_text = item.get_text()
-                    books_count_match = re.search(r'\((\d+) книг', series_text)
-                    if books_count_match:
-                        series_info['books_count'] = int(books_count_match.group(1))
+    if backend != 'html.parser' and flibusta_lxml_parser is None:
+        raise ValueError(f"Для движка {backend} требуется установить lxml")
 
-                    series_list.append(series_info)
+    return backend
+
+
+def _timed_parser(parser):
+    """
+    Декоратор функций parse_*: записывает время разбора и движок в метрики обхода.
+
+    Args:
+        parser (callable): Функция parse_*(html_content, backend=None)
+
+    Returns:
+        callable: Функция с той же сигнатурой
+    """
+    @functools.wraps(parser)
+    def wrapper(html_content, backend=None):
+        backend = _resolve_parser_backend(backend)
+        start = time.perf_counter()
+        result = parser(html_content, backend)
+        flibusta_metrics.get_metrics().record_parse(parser.__name__, backend, time.perf_counter() - start,
+                                                    len(html_content))
+        return result
+
+    return wrapper
+
+
+def _find_search_sections(soup):
+    """
+    Находит заголовки разделов серий, авторов и книг за один проход по тексту страницы.
+
+    Args:
+        soup (BeautifulSoup): Разобранная страница результатов поиска
+
+    Returns:
+        dict: Словарь вида {'series': заголовок, 'authors': ..., 'books': ...};
+              отсутствующие разделы не попадают в словарь
+    """
+    sections = {}
+
+    for text in soup.find_all(string=SEARCH_SECTION_PATTERN):
+        for section, header in SEARCH_SECTION_HEADERS.items():
+            # Учитываем только первое вхождение каждого заголовка
+            if section not in sections and header in text:
+                sections[section] = text
+
+        if len(sections) == len(SEARCH_SECTION_HEADERS):
+            break
+
+    return sections
+
+
+def _section_items(header):
+    """
+    Возвращает элементы <li> списка, следующего за заголовком раздела.
+
+    Args:
+        header (NavigableString): Текст заголовка раздела или None
+
+    Returns:
+        list: Список элементов <li>
+    """
+    if not header:
+        return []
+
+    # Получаем следующий после заголовка элемент <ul>, который содержит список
+    section_ul = header.find_next('ul')
+
+    if not section_ul:
+        return []
+
+    return section_ul.find_all('li')
+
+
+def _parse_series_items(series_items):
+    """
+    Извлекает информацию о сериях из элементов списка.
+
+    Args:
+        series_items (list): Элементы <li> раздела серий
+
+    Returns:
+        list: Список словарей с информацией о сериях
+    """
+    series_list = []
+
+    for item in series_items:
+        series_info = {}
+
+        # Находим ссылку на серию
+        series_link = item.find('a')
+        if series_link:
+            # Получаем URL серии
+            series_info['url'] = flibusta_records.FLIBUSTA_URL + series_link['href']
+
+            # Получаем название серии
+            series_name = series_link.get_text().strip()
+            series_info['name'] = series_name
+
+            # Пытаемся извлечь количество книг в серии
+            series_text = item.get_text()
+            books_count_match = re.search(r'\((\d+) книг', series_text)
+            if books_count_match:
+                series_info['books_count'] = int(books_count_match.group(1))
+
+            series_list.append(series_info)
 
     return series_list
 
 
-def parse_authors(html_content):
+def _parse_author_items(author_items):
     """
-    Извлекает информацию об авторах из HTML-кода страницы.
+    Извлекает информацию об авторах из элементов списка.
 
     Args:
-        html_content (str): HTML-код страницы
+        author_items (list): Элементы <li> раздела авторов
 
     Returns:
         list: Список словарей с информацией об авторах
     """
-    soup = BeautifulSoup(html_content, 'html.parser')
     authors_list = []
 
-    # Ищем заголовок раздела авторов
-    authors_header = soup.find(string=lambda text: isinstance(text, str) and 'Найденные писатели' in text)
+    for item in author_items:
+        author_info = {}
 
-    if authors_header:
-        # Получаем следующий после заголовка элемент <ul>, который содержит список авторов
-        authors_ul = authors_header.find_next('ul')
+        # Находим ссылку на автора
+        author_link = item.find('a')
+        if author_link:
+            # Получаем URL автора
+            author_info['url'] = flibusta_records.FLIBUSTA_URL + author_link['href']
 
-        if authors_ul:
-            author_items = authors_ul.find_all('li')
+            # Получаем имя автора
+            author_name = author_link.get_text().strip()
+            author_info['name'] = author_name
 
-            for item in author_items:
-                author_info = {}
+            # Пытаемся извлечь количество книг автора
+            author_text = item.get_text()
+            books_count_match = re.search(r'\((\d+) книг', author_text)
+            if books_count_match:
+                author_info['books_count'] = int(books_count_match.group(1))
 
-                # Находим ссылку на автора
-                author_link = item.find('a')
-                if author_link:
-                    # Получаем URL автора
-                    author_info['url'] = 'https://flibusta.is' + author_link['href']
+            authors_list.append(author_info)
 
-                    # Получаем имя автора
-                    author_name = author_link.get_text().strip()
-                    author_info['name'] = author_name
+    return authors_list
 
-                    # Пытаемся извлечь количество книг автора
-                    author_text = item.get_text()
-                    books_count_match = re.search(r'\((\d+) книг', author_text)
-                    if books_count_match:
-                        author_info['books_count'] = int(books_count_match.group(1))
 
-                    authors_list.append(author_info)
+def _parse_book_items(book_items):
+    """
+    Извлекает информацию о книгах из элементов списка.
 
-    return authors_list
+    Args:
+        book_items (list): Элементы <li> раздела книг
+
+    Returns:
+        list: Список словарей с информацией о книгах
+    """
+    books_list = []
+
+    for item in book_items:
+        book_info = {}
+
+        # Находим ссылку на книгу (первая ссылка в элементе)
+        book_link = item.find('a')
+        if book_link:
+            # Получаем URL книги
+            book_info['url'] = flibusta_records.FLIBUSTA_URL + book_link['href']
+
+            # Получаем название книги
+            book_title = book_link.get_text().strip()
+            book_info['title'] = book_title
 
+            # Находим всех авторов книги (все ссылки после первой)
+            author_links = item.find_all('a')[1:]
+            authors = []
+
+            for author_link in author_links:
+                author_info = {
+                    'name': author_link.get_text().strip(),
+                    'url': flibusta_records.FLIBUSTA_URL + author_link['href']
+                }
+                authors.append(author_info)
+
+            book_info['authors'] = authors
+
+            books_list.append(book_info)
 
-def parse_books(html_content):
+    return books_list
+
+
+@_timed_parser
+def parse_series(html_content, backend=None):
     """
-    Извлекает информацию о книгах из HTML-кода страницы.
+    Извлекает информацию о сериях книг из HTML-кода страницы.
 
     Args:
         html_content (str): HTML-код страницы
+        backend (str, optional): Движок разбора HTML. По умолчанию DEFAULT_PARSER_BACKEND
 
     Returns:
-        list: Список словарей с информацией о книгах
+        list: Список словарей с информацией о сериях
     """
-    soup = BeautifulSoup(html_content, 'html.parser')
-    books_list = []
+    backend = _resolve_parser_backend(backend)
+    if backend == 'lxml-native':
+        return flibusta_lxml_parser.parse_series(html_content)
 
-    # Ищем заголовок раздела книг
-    books_header = soup.find(string=lambda text: isinstance(text, str) and 'Найденные книги' in text)
+    soup = BeautifulSoup(html_content, backend)
+    sections = _find_search_sections(soup)
 
-    if books_header:
-        # Получаем следующий после заголовка элемент <ul>, который содержит список книг
-        books_ul = books_header.find_next('ul')
+    return _parse_series_items(_section_items(sections.get('series')))
 
-        if books_ul:
-            book_items = books_ul.find_all('li')
 
-            for item in book_items:
-                book_info = {}
+@_timed_parser
+def parse_authors(html_content, backend=None):
+    """
+    Извлекает информацию об авторах из HTML-кода страницы.
 
-                # Находим ссылку на книгу (первая ссылка в элементе)
-                book_link = item.find('a')
-                if book_link:
-                    # Получаем URL книги
-                    book_info['url'] = 'https://flibusta.is' + book_link['href']
+    Args:
+        html_content (str): HTML-код страницы
+        backend (str, optional): Движок разбора HTML. По умолчанию DEFAULT_PARSER_BACKEND
 
-                    # Получаем название книги
-                    book_title = book_link.get_text().strip()
-                    book_info['title'] = book_title
+    Returns:
+        list: Список словарей с информацией об авторах
+    """
+    backend = _resolve_parser_backend(backend)
+    if backend == 'lxml-native':
+        return flibusta_lxml_parser.parse_authors(html_content)
 
-                    # Находим всех авторов книги (все ссылки после первой)
-                    author_links = item.find_all('a')[1:]
-                    authors = []
+    soup = BeautifulSoup(html_content, backend)
+    sections = _find_search_sections(soup)
 
-                    for author_link in author_links:
-                        author_info = {
-                            'name': author_link.get_text().strip(),
-                            'url': 'https://flibusta.is' + author_link['href']
-                        }
-                        authors.append(author_info)
+    return _parse_author_items(_section_items(sections.get('authors')))
 
-                    book_info['authors'] = authors
 
-                    books_list.append(book_info)
+@_timed_parser
+def parse_books(html_content, backend=None):
+    """
+    Извлекает информацию о книгах из HTML-кода страницы.
 
-    return books_list
+    Args:
+        html_content (str): HTML-код страницы
+        backend (str, optional): Движок разбора HTML. По умолчанию DEFAULT_PARSER_BACKEND
+
+    Returns:
+        list: Список словарей с информацией о книгах
+    """
+    backend = _resolve_parser_backend(backend)
+    if backend == 'lxml-native':
+        return flibusta_lxml_parser.parse_books(html_content)
+
+    soup = BeautifulSoup(html_content, backend)
+    sections = _find_search_sections(soup)
+
+    return _parse_book_items(_section_items(sections.get('books')))
+
+
+@_timed_parser
+def parse_search_page(html_content, backend=None):
+    """
+    Разбирает страницу результатов поиска за один проход: строит одно DOM-дерево
+    и извлекает из него серии, авторов, книги и количество страниц.
+
+    Args:
+        html_content (str): HTML-код страницы результатов поиска
+        backend (str, optional): Движок разбора HTML. По умолчанию DEFAULT_PARSER_BACKEND
+
+    Returns:
+        dict: Словарь с ключами 'series', 'authors', 'books' и 'total_pages'
+    """
+    backend = _resolve_parser_backend(backend)
+    if backend == 'lxml-native':
+        return flibusta_lxml_parser.parse_search_page(html_content)
+
+    soup = BeautifulSoup(html_content, backend)
+    sections = _find_search_sections(soup)
+
+    return {
+        'series': _parse_series_items(_section_items(sections.get('series'))),
+        'authors': _parse_author_items(_section_items(sections.get('authors'))),
+        'books': _parse_book_items(_section_items(sections.get('books'))),
+        'total_pages': get_total_pages(html_content)
+    }
 
 
 def get_max_page_number_from_url(html_content, base_url_pattern):
@@ -294,19 +686,98 @@ def get_max_page_number_from_url(html_content, base_url_pattern):
     return max_page + 1  # +1 потому что нумерация начинается с 0
 
 
-def parse_series_books(html_content):
+def _parse_book_rows(soup, icon_tags, icon_per_row, with_authors):
+    """
+    Извлекает книги со страницы серии или автора за один проход по строкам списка.
+
+    Список книг - это последовательность узлов внутри одного блока, разделенная на строки
+    тегами <br>. Каждый блок, содержащий ссылки /b/, просматривается один раз слева направо:
+    первая подходящая ссылка /b/ в строке становится книгой, а следующие за ней в той же
+    строке ссылки дают авторов и форматы для скачивания.
+
+    Args:
+        soup (BeautifulSoup): Разобранная страница
+        icon_tags (tuple): Теги значка книги, который должен предшествовать ссылке
+        icon_per_row (bool): True - значок ищется только в текущей строке,
+                             False - в любом месте блока до ссылки
+        with_authors (bool): Собирать ли авторов книги (ссылки /a/ в строке)
+
+    Returns:
+        list: Список словарей с информацией о книгах
+    """
+    books_list = []
+
+    # Блоки, в которых лежат ссылки на книги, в порядке их появления на странице
+    containers = {}
+    for book_link in soup.find_all('a', href=lambda href: href and href.startswith('/b/')):
+        containers.setdefault(id(book_link.parent), book_link.parent)
+
+    for container in containers.values():
+        icon_found = False
+        book_info = None
+        prev_node = None
+
+        for node in container.children:
+            if node.name == 'br':
+                # Конец строки
+                book_info = None
+                if icon_per_row:
+                    icon_found = False
+            elif node.name in icon_tags:
+                icon_found = True
+            elif node.name == 'a':
+                href = node.get('href', '')
+
+                if book_info is None:
+                    if icon_found and href.startswith('/b/'):
+                        book_info = {
+                            'title': node.get_text().strip(),
+                            'url': flibusta_records.FLIBUSTA_URL + href
+                        }
+                        if with_authors:
+                            book_info['authors'] = []
+                        book_info['download_links'] = []
+                        books_list.append(book_info)
+                else:
+                    # Ссылки /a/ после названия - авторы книги
+                    if with_authors and href.startswith('/a/'):
+                        book_info['authors'].append({
+                            'name': node.get_text().strip(),
+                            'url': flibusta_records.FLIBUSTA_URL + href
+                        })
+
+                    # Ссылки после слова "скачать" - форматы для скачивания
+                    if 'скачать' in str(prev_node):
+                        format_match = re.search(r'\((.*?)\)', node.get_text())
+                        if format_match:
+                            book_info['download_links'].append({
+                                'format': format_match.group(1),
+                                'url': flibusta_records.FLIBUSTA_URL + href
+                            })
+
+            prev_node = node
+
+    return books_list
+
+
+@_timed_parser
+def parse_series_books(html_content, backend=None):
     """
     Извлекает информацию о книгах из страницы серии.
 
     Args:
         html_content (str): HTML-код страницы серии
+        backend (str, optional): Движок разбора HTML. По умолчанию DEFAULT_PARSER_BACKEND
 
     Returns:
         dict: Словарь с информацией о серии и список книг
     """
-    soup = BeautifulSoup(html_content, 'html.parser')
+    backend = _resolve_parser_backend(backend)
+    if backend == 'lxml-native':
+        return flibusta_lxml_parser.parse_series_books(html_content)
+
+    soup = BeautifulSoup(html_content, backend)
     series_info = {}
-    books_list = []
 
     # Получаем название серии
     title = soup.find('h1', class_='title')
@@ -325,74 +796,12 @@ def parse_series_books(html_content):
                 series_info[key] = value
 
     # Получаем список книг
-    # На странице серии книги представлены не в ul/li, а просто строками, разделенными <br>
-    # Ищем все ссылки на книги, которые идут после тега img и перед тегом <br>
-    book_links = soup.find_all('a', href=lambda href: href and href.startswith('/b/'))
-
-    for book_link in book_links:
-        # Проверяем, что перед ссылкой идет img (значок книги)
-        prev_elem = book_link.previous_sibling
-        while prev_elem and prev_elem.name != 'img' and prev_elem.name != 'br':
-            prev_elem = prev_elem.previous_sibling
-
-        if prev_elem and prev_elem.name == 'img':
-            book_info = {
-                'title': book_link.get_text().strip(),
-                'url': 'https://flibusta.is' + book_link['href']
-            }
-
-            # Ищем авторов книги
-            next_elem = book_link.next_sibling
-            authors = []
-
-            # Ищем следующий тег <a> с href, начинающимся с /a/ (авторы)
-            while next_elem and not (hasattr(next_elem, 'name') and next_elem.name == 'br'):
-                if hasattr(next_elem, 'name') and next_elem.name == 'a' and next_elem.get('href', '').startswith('/a/'):
-                    author_info = {
-                        'name': next_elem.get_text().strip(),
-                        'url': 'https://flibusta.is' + next_elem['href']
-                    }
-                    authors.append(author_info)
-                next_elem = next_elem.next_sibling
-
-            book_info['authors'] = authors
-
-            # Ищем форматы для скачивания
-            download_links = []
-            next_elem = book_link.next_sibling
-            while next_elem and not (hasattr(next_elem, 'name') and next_elem.name == 'br'):
-                if hasattr(next_elem, 'name') and next_elem.name == 'a' and 'скачать' in str(
-                        next_elem.previous_sibling):
-                    format_match = re.search(r'\((.*?)\)', next_elem.get_text())
-                    if format_match:
-                        download_info = {
-                            'format': format_match.group(1),
-                            'url': 'https://flibusta.is' + next_elem['href']
-                        }
-                        download_links.append(download_info)
-                next_elem = next_elem.next_sibling
-
-            book_info['download_links'] = download_links
-
-            books_list.append(book_info)
+    # На странице серии книги представлены не в ul/li, а просто строками, разделенными <br>;
+    # книга засчитывается, если в той же строке перед ссылкой на нее стоит img (значок книги)
+    books_list = _parse_book_rows(soup, icon_tags=('img',), icon_per_row=True, with_authors=True)
 
-    # Проверяем наличие пагинации
-    pager = soup.find('div', class_='item-list').find('ul', class_='pager')
-    if pager:
-        # Находим максимальный номер страницы
-        max_page = 0
-
-        # Ищем ссылку на последнюю страницу
-        last_page_link = pager.find('li', class_='pager-last')
-        if last_page_link and last_page_link.find('a'):
-            last_page_url = last_page_link.find('a')['href']
-            page_match = re.search(r'page=(\d+)', last_page_url)
-            if page_match:
-                max_page = int(page_match.group(1)) + 1  # +1 потому что нумерация начинается с 0
-
-        series_info['total_pages'] = max_page + 1  # +1 для учета текущей страницы
-    else:
-        series_info['total_pages'] = 1
+    # Количество страниц определяется по HTML-коду блока пагинации
+    series_info['total_pages'] = get_total_pages(html_content)
 
     return {
         'series_info': series_info,
@@ -400,19 +809,24 @@ def parse_series_books(html_content):
     }
 
 
-def parse_author_books(html_content):
+@_timed_parser
+def parse_author_books(html_content, backend=None):
     """
     Извлекает информацию о книгах из страницы автора.
 
     Args:
         html_content (str): HTML-код страницы автора
+        backend (str, optional): Движок разбора HTML. По умолчанию DEFAULT_PARSER_BACKEND
 
     Returns:
         dict: Словарь с информацией об авторе и список книг
     """
-    soup = BeautifulSoup(html_content, 'html.parser')
+    backend = _resolve_parser_backend(backend)
+    if backend == 'lxml-native':
+        return flibusta_lxml_parser.parse_author_books(html_content)
+
+    soup = BeautifulSoup(html_content, backend)
     author_info = {}
-    books_list = []
 
     # Получаем имя автора
     title = soup.find('h1', class_='title')
@@ -427,68 +841,18 @@ def parse_author_books(html_content):
         for genre_link in genre_links:
             genre_info = {
                 'name': genre_link.get_text().strip(),
-                'url': 'https://flibusta.is' + genre_link['href']
+                'url': flibusta_records.FLIBUSTA_URL + genre_link['href']
             }
             genres.append(genre_info)
         author_info['genres'] = genres
 
     # Получаем список книг
-    book_links = soup.find_all('a', href=lambda href: href and href.startswith('/b/'))
-
-    for book_link in book_links:
-        # Проверяем, что перед ссылкой идет img (значок книги) или текст с оценкой
-        prev_elem = book_link.previous_sibling
-        img_found = False
-
-        while prev_elem and not img_found:
-            if hasattr(prev_elem, 'name') and prev_elem.name == 'img':
-                img_found = True
-            elif hasattr(prev_elem, 'name') and prev_elem.name == 'svg':
-                img_found = True
-            prev_elem = prev_elem.previous_sibling
-
-        if img_found:
-            book_info = {
-                'title': book_link.get_text().strip(),
-                'url': 'https://flibusta.is' + book_link['href']
-            }
-
-            # Ищем форматы для скачивания
-            download_links = []
-            next_elem = book_link.next_sibling
-            while next_elem and not (hasattr(next_elem, 'name') and next_elem.name == 'br'):
-                if hasattr(next_elem, 'name') and next_elem.name == 'a' and 'скачать' in str(
-                        next_elem.previous_sibling):
-                    format_match = re.search(r'\((.*?)\)', next_elem.get_text())
-                    if format_match:
-                        download_info = {
-                            'format': format_match.group(1),
-                            'url': 'https://flibusta.is' + next_elem['href']
-                        }
-                        download_links.append(download_info)
-                next_elem = next_elem.next_sibling
+    # Книга засчитывается, если перед ссылкой на нее в том же блоке уже встречался
+    # img или svg (значок книги)
+    books_list = _parse_book_rows(soup, icon_tags=('img', 'svg'), icon_per_row=False, with_authors=False)
 
-            book_info['download_links'] = download_links
-
-            books_list.append(book_info)
-
-    # Проверяем наличие пагинации
-    pager = soup.find('div', class_='item-list')
-    if pager and pager.find('ul', class_='pager'):
-        # Находим максимальный номер страницы
-        max_page = 0
-
-        # Ищем ссылку на последнюю страницу
-        last_page_link = pager.find('li', class_='pager-last')
-        if last_page_link and last_page_link.find('a'):
-            last_page_url = last_page_link.find('a')['href']
-            page_match = re.search(r'page=(\d+)', last_page_url)
-            if page_match:
-                max_page = int(page_match.group(1)) + 1  # +1 потому что нумерация начинается с 0
-
-        author_info['total_pages'] = max_page + 1  # +1 для учета текущей страницы
-    else:
-        author_info['total_pages'] = 1
+    # Количество страниц определяется по HTML-коду блока пагинации
+    author_info['total_pages'] = get_total_pages(html_content)
 
     return {
         'author_info': author_info,
@@ -496,158 +860,366 @@ def parse_author_books(html_content):
     }
 
 
-def get_series_books(series_url):
+def _book_text_fields(text):
     """
-    Получает информацию о книгах из серии, включая все страницы пагинации.
+    Извлекает размер файла, количество страниц, год издания и язык из текста страницы книги.
 
     Args:
-        series_url (str): URL страницы серии
+        text (str): Текст страницы книги над аннотацией
 
     Returns:
-        dict: Словарь с информацией о серии и полный список книг
+        dict: Значения полей из BOOK_TEXT_FIELDS; None для ненайденных
     """
-    # Получаем HTML первой страницы
-    html_content = make_request(series_url)
+    fields = {}
+    for key, pattern, numeric in BOOK_TEXT_FIELDS:
+        match = pattern.search(text)
+        if match is None:
+            fields[key] = None
+        else:
+            fields[key] = int(match.group(1)) if numeric else match.group(1)
+    return fields
 
-    if not html_content:
-        print(f"Не удалось получить страницу серии: {series_url}")
-        return None
 
-    # Парсим первую страницу
-    result = parse_series_books(html_content)
+@_timed_parser
+def parse_book_page(html_content, backend=None):
+    """
+    Извлекает информацию о книге из страницы книги (/b/<id>).
+
+    Args:
+        html_content (str): HTML-код страницы книги
+        backend (str, optional): Движок разбора HTML. По умолчанию DEFAULT_PARSER_BACKEND
+
+    Returns:
+        dict: Словарь книги: 'title', 'authors', 'genres', 'series' (список с номером книги
+              в серии), 'annotation', 'size_kb', 'pages', 'year', 'language' и 'download_links'
+    """
+    backend = _resolve_parser_backend(backend)
+    if backend == 'lxml-native':
+        return flibusta_lxml_parser.parse_book_page(html_content)
+
+    soup = BeautifulSoup(html_content, backend)
+    main = soup.find('div', id='main') or soup
+    book_info = {'title': None}
+
+    # Получаем название книги без формата файла в конце
+    title = main.find('h1', class_='title')
+    if title:
+        book_info['title'] = BOOK_TITLE_FORMAT_PATTERN.sub('', title.get_text()).strip()
+
+    # Авторы, серии, сведения о файле и ссылки на скачивание стоят над заголовком аннотации;
+    # под ним - аннотация, отзывы и другие книги, ссылки из которых не относятся к этой книге
+    annotation_header = main.find('h2', string=re.compile('Аннотация'))
+
+    authors = []
+    series = []
+    download_links = []
+    header_text = []
+
+    for node in main.descendants:
+        if node is annotation_header:
+            break
+
+        if node.name is None:
+            header_text.append(str(node))
+            continue
+
+        if node.name != 'a':
+            continue
+
+        href = node.get('href', '')
+        if href.startswith('/a/'):
+            authors.append({
+                'name': node.get_text().strip(),
+                'url': flibusta_records.FLIBUSTA_URL + href
+            })
+        elif href.startswith('/s/'):
+            number_match = SERIES_NUMBER_PATTERN.match(str(node.next_sibling or ''))
+            series.append({
+                'name': node.get_text().strip(),
+                'url': flibusta_records.FLIBUSTA_URL + href,
+                'number': int(number_match.group(1)) if number_match else None
+            })
+        else:
+            download_match = BOOK_DOWNLOAD_PATTERN.match(href)
+            if download_match:
+                format_match = re.search(r'\((.*?)\)', node.get_text())
+                download_links.append({
+                    'format': format_match.group(1) if format_match else download_match.group(1),
+                    'url': flibusta_records.FLIBUSTA_URL + href
+                })
+
+    book_info['authors'] = authors
+
+    # Получаем жанры книги
+    genres = []
+    genre_p = main.find('p', class_='genre')
+    if genre_p:
+        for genre_link in genre_p.find_all('a', class_='genre'):
+            genres.append({
+                'name': genre_link.get_text().strip(),
+                'url': flibusta_records.FLIBUSTA_URL + genre_link['href']
+            })
+    book_info['genres'] = genres
 
-    # Если есть дополнительные страницы, парсим их
-    total_pages = result['series_info'].get('total_pages', 1)
+    book_info['series'] = series
 
-    if total_pages > 1:
-        all_books = result['books']
+    # Аннотация - абзацы сразу после заголовка
+    book_info['annotation'] = None
+    if annotation_header:
+        paragraphs = []
+        for sibling in annotation_header.find_next_siblings():
+            if sibling.name != 'p':
+                break
+            paragraphs.append(sibling.get_text().strip())
+        book_info['annotation'] = '\n'.join(paragraph for paragraph in paragraphs if paragraph) or None
 
-        for page in range(1, total_pages):
-            page_url = f"{series_url}?page={page}"
-            time.sleep(1 + random.random() * 2)  # Добавляем случайную задержку
+    book_info.update(_book_text_fields(' '.join(header_text)))
+    book_info['download_links'] = download_links
 
-            html_content = make_request(page_url)
+    return book_info
 
-            if html_content:
-                page_result = parse_series_books(html_content)
-                all_books.extend(page_result['books'])
-            else:
-                print(f"Не удалось получить страницу {page + 1} серии")
 
-        result['books'] = all_books
+def get_series_books(series_url, checkpoint=None):
+    """
+    Получает информацию о книгах из серии, включая все страницы пагинации.
+
+    Args:
+        series_url (str): URL страницы серии
+        checkpoint (CrawlCheckpoint, optional): Контрольная точка обхода. Уже обработанные
+                                                страницы берутся из нее без запроса к сайту.
+
+    Returns:
+        dict: Словарь с информацией о серии и полный список книг
+    """
+    result = None
+
+    # Первая страница отдается первой; остальные загружаются параллельно и добавляются в порядке страниц
+    for page, total_pages, page_result in iter_pages(series_url, parse_series_books, checkpoint):
+        if page == 0:
+            if not page_result:
+                print(f"Не удалось получить страницу серии: {series_url}")
+                return None
+            result = page_result
+        elif page_result:
+            result['books'].extend(page_result['books'])
+        else:
+            print(f"Не удалось получить страницу {page + 1} серии")
 
     return result
 
 
-def get_author_books(author_url):
+def get_author_books(author_url, checkpoint=None):
     """
     Получает информацию о книгах автора, включая все страницы пагинации.
 
     Args:
         author_url (str): URL страницы автора
+        checkpoint (CrawlCheckpoint, optional): Контрольная точка обхода. Уже обработанные
+                                                страницы берутся из нее без запроса к сайту.
 
     Returns:
         dict: Словарь с информацией об авторе и полный список книг
     """
-    # Получаем HTML первой страницы
-    html_content = make_request(author_url)
+    result = None
+
+    # Первая страница отдается первой; остальные загружаются параллельно и добавляются в порядке страниц
+    for page, total_pages, page_result in iter_pages(author_url, parse_author_books, checkpoint):
+        if page == 0:
+            if not page_result:
+                print(f"Не удалось получить страницу автора: {author_url}")
+                return None
+            result = page_result
+        elif page_result:
+            result['books'].extend(page_result['books'])
+        else:
+            print(f"Не удалось получить страницу {page + 1} автора")
 
-    if not html_content:
-        print(f"Не удалось получить страницу автора: {author_url}")
-        return None
+    return result
+
+
+def get_book_details(book_url, checkpoint=None):
+    """
+    Получает информацию о книге со страницы книги.
 
-    # Парсим первую страницу
-    result = parse_author_books(html_content)
+    Args:
+        book_url (str): URL страницы книги
+        checkpoint (CrawlCheckpoint, optional): Контрольная точка обхода. Уже обработанная
+                                                страница берется из нее без запроса к сайту.
 
-    # Если есть дополнительные страницы, парсим их
-    total_pages = result['author_info'].get('total_pages', 1)
+    Returns:
+        dict: Результат parse_book_page с дополнительным полем 'url' или None в случае ошибки
+    """
+    book_info = fetch_and_parse(book_url, parse_book_page, checkpoint)
+    if not book_info:
+        print(f"Не удалось получить страницу книги: {book_url}")
+        return None
 
-    if total_pages > 1:
-        all_books = result['books']
+    return {'url': book_url, **book_info}
 
-        for page in range(1, total_pages):
-            page_url = f"{author_url}?page={page}"
-            time.sleep(1 + random.random() * 2)  # Добавляем случайную задержку
 
-            html_content = make_request(page_url)
+def get_books_details(book_ids, checkpoint=None, workers=None):
+    """
+    Получает информацию о нескольких книгах, загружая их страницы параллельно.
+    Частоту запросов ограничивает общий RateLimiter из flibusta_http.
 
-            if html_content:
-                page_result = parse_author_books(html_content)
-                all_books.extend(page_result['books'])
-            else:
-                print(f"Не удалось получить страницу {page + 1} автора")
+    Args:
+        book_ids (iterable): Идентификаторы книг (int или строка из цифр) или URL их страниц /b/<id>.
+                             Значения, из которых не удается извлечь идентификатор книги, пропускаются.
+        checkpoint (CrawlCheckpoint, optional): Контрольная точка обхода
+        workers (int, optional): Количество одновременно загружаемых страниц.
+                                 По умолчанию DEFAULT_PAGE_WORKERS.
 
-        result['books'] = all_books
+    Returns:
+        dict: Результаты get_book_details по идентификаторам книг в порядке book_ids;
+              книги, страницы которых не удалось получить, пропускаются
+    """
+    # Идентификатор книги -> URL ее страницы; повторы одной книги загружаются один раз
+    urls = {}
+    for book_id in book_ids:
+        if isinstance(book_id, str) and not book_id.isdigit():
+            url, book_id = book_id, entity_id(book_id, 'book')
+            if book_id is None:
+                print(f"Пропускаем ссылку, не ведущую на страницу книги: {url}")
+                continue
+        else:
+            book_id = int(book_id)
+            url = f"{flibusta_records.FLIBUSTA_URL}/b/{book_id}"
+        urls.setdefault(book_id, url)
 
-    return result
+    with ThreadPoolExecutor(max_workers=workers or DEFAULT_PAGE_WORKERS) as executor:
+        results = executor.map(lambda url: get_book_details(url, checkpoint), urls.values())
+        return {book_id: details for book_id, details in zip(urls, results) if details}
 
 
-def parse_all_pages(query, max_pages=None):
+def iter_search_pages(query, max_pages=None, checkpoint=None):
     """
-    Проходит по всем страницам результатов поиска и собирает информацию.
+    Проходит по страницам результатов поиска и отдает результат разбора каждой
+    страницы сразу после ее загрузки.
 
     Args:
         query (str): Поисковый запрос пользователя
         max_pages (int, optional): Максимальное количество страниц для обработки
                                   Если None, обрабатываются все найденные страницы
+        checkpoint (CrawlCheckpoint, optional): Контрольная точка обхода. Уже обработанные
+                                                страницы берутся из нее без запроса к сайту.
 
-    Returns:
-        dict: Словарь с собранной информацией о сериях, авторах и книгах
+    Yields:
+        dict: Словарь с ключами 'page' (номер страницы, начиная с 1), 'total_pages',
+              'series', 'authors' и 'books'
     """
-    # Получаем HTML-код первой страницы
-    html_content = get_search_results_page(query)
+    # Количество страниц определяется по первой странице; остальные страницы
+    # загружаются параллельно, а отдаются по порядку
+    pages = iter_pages(build_search_url(query), parse_search_page, checkpoint,
+                       url_builder=functools.partial(build_search_url, query), max_pages=max_pages)
+
+    for page, total_pages, page_result in pages:
+        if page == 0:
+            if not page_result:
+                print("Не удалось получить результаты поиска.")
+                return
+
+            print(f"Всего страниц с результатами: {total_pages}")
+        else:
+            print(f"Обработка страницы {page + 1}...")
 
-    if not html_content:
-        print("Не удалось получить результаты поиска.")
-        return None
+            if not page_result:
+                print(f"Не удалось получить страницу {page + 1}")
+                continue
 
-    # Определяем количество страниц с результатами
-    total_pages = get_max_page_number(html_content)
+        print(f"Страница {page + 1}: найдено {len(page_result['series'])} серий, "
+              f"{len(page_result['authors'])} авторов, {len(page_result['books'])} книг")
 
-    if max_pages is not None and max_pages < total_pages:
-        total_pages = max_pages
+        yield {
+            'page': page + 1,
+            'total_pages': total_pages,
+            'series': page_result['series'],
+            'authors': page_result['authors'],
+            'books': page_result['books']
+        }
 
-    print(f"Всего страниц с результатами: {total_pages}")
 
-    # Инициализируем структуры данных для хранения результатов
-    all_series = []
-    all_authors = []
-    all_books = []
+def iter_search_records(query, max_pages=None, checkpoint=None, store=None, seen=None):
+    """
+    Отдает найденные серии, авторов и книги по одной записи по мере разбора страниц.
+
+    Args:
+        query (str): Поисковый запрос пользователя
+        max_pages (int, optional): Максимальное количество страниц для обработки
+        checkpoint (CrawlCheckpoint, optional): Контрольная точка обхода
+        store (EntityStore, optional): Хранилище, в которое добавляются найденные сущности
+        seen (set, optional): Множество уже отданных сущностей. Если передано, сущности,
+                              встретившиеся на нескольких страницах, отдаются один раз.
+
+    Yields:
+        dict: Запись с полями 'type' ('series', 'author' или 'book'), 'query', 'page'
+              и полями самой сущности
+    """
+    for page_result in iter_search_pages(query, max_pages, checkpoint):
+        if store is not None:
+            store.add_search_results(page_result['series'], page_result['authors'], page_result['books'])
 
-    # Обрабатываем первую страницу
-    series = parse_series(html_content)
-    authors = parse_authors(html_content)
-    books = parse_books(html_content)
+        for record_type, key in (('series', 'series'), ('author', 'authors'), ('book', 'books')):
+            items = page_result[key] if seen is None else _unique_entities(page_result[key], seen)
+            for item in items:
+                yield {'type': record_type, 'query': query, 'page': page_result['page'], **item}
 
-    all_series.extend(series)
-    all_authors.extend(authors)
-    all_books.extend(books)
 
-    print(f"Страница 1: найдено {len(series)} серий, {len(authors)} авторов, {len(books)} книг")
+def _unique_entities(items, seen):
+    """
+    Отбрасывает сущности, уже встречавшиеся ранее (по идентификатору из URL).
+
+    Args:
+        items (list): Словари сущностей с ключом 'url'
+        seen (set): Множество уже встреченных идентификаторов, пополняется
 
-    # Обрабатываем остальные страницы
-    for page in range(1, total_pages):
-        print(f"Обработка страницы {page + 1}...")
+    Returns:
+        list: Сущности, которых еще не было в seen
+    """
+    unique = []
 
-        # Добавляем случайную задержку перед запросом для имитации человеческого поведения
-        time.sleep(1 + random.random() * 2)
+    for item in items:
+        key = parse_entity_id(item.get('url')) or item.get('url')
+        if key not in seen:
+            seen.add(key)
+            unique.append(item)
 
-        # Получаем HTML-код текущей страницы
-        html_content = get_search_results_page(query, page)
+    return unique
 
-        if html_content:
-            # Парсим данные с текущей страницы
-            series = parse_series(html_content)
-            authors = parse_authors(html_content)
-            books = parse_books(html_content)
 
-            all_series.extend(series)
-            all_authors.extend(authors)
-            all_books.extend(books)
+def parse_all_pages(query, max_pages=None, checkpoint=None, store=None):
+    """
+    Проходит по всем страницам результатов поиска и собирает информацию.
 
-            print(f"Страница {page + 1}: найдено {len(series)} серий, {len(authors)} авторов, {len(books)} книг")
-        else:
-            print(f"Не удалось получить страницу {page + 1}")
+    Args:
+        query (str): Поисковый запрос пользователя
+        max_pages (int, optional): Максимальное количество страниц для обработки
+                                  Если None, обрабатываются все найденные страницы
+        checkpoint (CrawlCheckpoint, optional): Контрольная точка обхода. Уже обработанные
+                                                страницы берутся из нее без запроса к сайту.
+        store (EntityStore, optional): Хранилище, в которое добавляются найденные сущности
+
+    Returns:
+        dict: Словарь с собранной информацией о сериях, авторах и книгах.
+              Сущности, встретившиеся на нескольких страницах, включаются один раз.
+    """
+    # Инициализируем структуры данных для хранения результатов
+    total_pages = None
+    all_series = []
+    all_authors = []
+    all_books = []
+    seen = set()
+
+    for page_result in iter_search_pages(query, max_pages, checkpoint):
+        total_pages = page_result['total_pages']
+        all_series.extend(_unique_entities(page_result['series'], seen))
+        all_authors.extend(_unique_entities(page_result['authors'], seen))
+        all_books.extend(_unique_entities(page_result['books'], seen))
+
+        if store is not None:
+            store.add_search_results(page_result['series'], page_result['authors'], page_result['books'])
+
+    if total_pages is None:
+        return None
 
     # Формируем итоговый результат
     results = {
@@ -666,6 +1238,53 @@ def parse_all_pages(query, max_pages=None):
     return results
 
 
+def iter_details(results, checkpoint=None, store=None):
+    """
+    Собирает подробную информацию о сериях и авторах из результатов поиска
+    и отдает ее по одной сущности сразу после загрузки. Страница каждой серии
+    и каждого автора загружается не более одного раза за запуск.
+
+    Args:
+        results (dict): Результаты parse_all_pages
+        checkpoint (CrawlCheckpoint, optional): Контрольная точка обхода
+        store (EntityStore, optional): Хранилище сущностей. В него добавляются загруженные
+                                       серии, авторы и книги, а уже загруженные в этом запуске
+                                       страницы пропускаются.
+
+    Yields:
+        dict: Результат get_series_books или get_author_books с дополнительными
+              полями 'type' ('series_details' или 'author_details') и 'url'
+    """
+    if store is None:
+        store = EntityStore()
+
+    # Собираем информацию о сериях
+    if results['series']:
+        print("\nСбор информации о сериях...")
+        for i, series in enumerate(results['series']):
+            if not store.claim(series['url']):
+                continue
+
+            print(f"Обрабатываем серию {i + 1}/{len(results['series'])}: {series['name']}")
+            series_details = get_series_books(series['url'], checkpoint)
+            if series_details:
+                store.add_series_details(series['url'], series_details)
+                yield {'type': 'series_details', 'url': series['url'], **series_details}
+
+    # Собираем информацию об авторах
+    if results['authors']:
+        print("\nСбор информации об авторах...")
+        for i, author in enumerate(results['authors']):
+            if not store.claim(author['url']):
+                continue
+
+            print(f"Обрабатываем автора {i + 1}/{len(results['authors'])}: {author['name']}")
+            author_details = get_author_books(author['url'], checkpoint)
+            if author_details:
+                store.add_author_details(author['url'], author_details)
+                yield {'type': 'author_details', 'url': author['url'], **author_details}
+
+
 def save_results_to_json(results, filename):
     """
     Сохраняет результаты поиска в JSON-файл.
@@ -680,70 +1299,212 @@ def save_results_to_json(results, filename):
     print(f"Результаты сохранены в файл: {filename}")
 
 
-def main():
-    # Получаем поисковый запрос от пользователя
-    search_query = input("Введите поисковый запрос: ")
+def save_results_to_jsonl(records, filename, append=True):
+    """
+    Записывает записи в JSONL-файл по одной строке по мере их поступления.
+    После каждой записи файл сбрасывается на диск, поэтому при падении обхода
+    уже собранные данные сохраняются, а файл можно читать во время работы.
 
-    # Формируем URL для поиска
-    search_url = build_search_url(search_query)
+    Args:
+        records (iterable): Итерируемый объект со словарями, например iter_search_records(...)
+        filename (str): Имя файла для сохранения
+        append (bool, optional): Дописывать в существующий файл. По умолчанию True.
 
-    # Выводим базовую ссылку для поиска
-    print("\nСформированная ссылка для поиска:")
-    print(search_url)
+    Returns:
+        int: Количество записанных записей
+    """
+    count = 0
 
-    # Запускаем процесс сбора данных со всех страниц
-    print("\nНачинаем обработку результатов поиска...")
-    results = parse_all_pages(search_query)
+    with open(filename, 'a' if append else 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write('\n')
+            f.flush()
+            count += 1
+
+    print(f"Записей сохранено в файл {filename}: {count}")
+
+    return count
+
+
+# Суффикс временного файла результатов до завершения поиска
+PARTIAL_SUFFIX = '.part'
+
+# Глубина сбора подробностей: какие страницы загружаются после поиска
+DETAIL_DEPTHS = {
+    'search': (),
+    'series': ('series',),
+    'authors': ('authors',),
+    'books': ('books',),
+    'all': ('series', 'authors', 'books'),
+}
+
+
+def parse_args(argv=None):
+    """
+    Разбирает аргументы командной строки.
+
+    Args:
+        argv (list, optional): Аргументы. По умолчанию sys.argv[1:].
 
-    if results:
-        # Выводим статистику
-        print("\nСбор данных завершен.")
-        print(f"Всего найдено серий: {results['stats']['series_count']}")
-        print(f"Всего найдено авторов: {results['stats']['authors_count']}")
-        print(f"Всего найдено книг: {results['stats']['books_count']}")
+    Returns:
+        argparse.Namespace: Разобранные аргументы
+    """
+    parser = argparse.ArgumentParser(description="Поиск серий, авторов и книг на Flibusta")
+    parser.add_argument('query', nargs='?', help="Поисковый запрос. Если не задан, запрашивается с клавиатуры.")
+    parser.add_argument('--max-pages', type=int, default=None, help="Максимум страниц результатов поиска")
+    parser.add_argument('--depth', choices=list(DETAIL_DEPTHS), default='search',
+                        help="Подробности после поиска: search - только поиск, series - страницы серий, "
+                             "authors - страницы авторов, books - страницы найденных книг, "
+                             "all - серии, авторы и книги")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default=None,
+                        help="Формат вывода: поток записей по одной на сущность. По умолчанию - по "
+                             "расширению --output. Если не заданы ни --format, ни --output, результаты "
+                             "сохраняются в прежнем виде: flibusta_search_<запрос>.json и "
+                             "flibusta_detailed_<запрос>.json.")
+    parser.add_argument('--output', default=None, help="Файл результатов. По умолчанию flibusta_<запрос>.<формат>")
+    parser.add_argument('--page-workers', type=int, default=DEFAULT_PAGE_WORKERS,
+                        help="Количество одновременно загружаемых страниц пагинации")
+    parser.add_argument('--pool-size', type=int, default=flibusta_http.DEFAULT_POOL_SIZE,
+                        help="Размер пула HTTP-соединений")
+    parser.add_argument('--rate', type=float, default=flibusta_http.DEFAULT_RATE,
+                        help="Ограничение частоты запросов (в секунду)")
+    parser.add_argument('--cache-dir', default=None, help="Каталог кэша ответов на диске")
+    parser.add_argument('--backend', choices=PARSER_BACKENDS, default=None, help="Движок разбора HTML")
+    parser.add_argument('--archive', default=None,
+                        help="Файл архива загруженных страниц для повторного разбора без сети "
+                             "(flibusta_archive.py). По умолчанию страницы не архивируются.")
+    parser.add_argument('--index', default=None,
+                        help="Файл локального поискового индекса (flibusta_index.py), в который "
+                             "добавляются результаты. По умолчанию индекс не ведется.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # Запрос с клавиатуры нужен только при интерактивном запуске без аргументов
+    search_query = args.query or input("Введите поисковый запрос: ")
+    slug = query_slug(search_query)
+
+    flibusta_http.configure_session(pool_size=args.pool_size)
+    flibusta_http.configure_rate_limit(rate=args.rate, burst=flibusta_http.burst_for_rate(args.rate))
+    set_page_workers(args.page_workers)
+    if args.cache_dir:
+        flibusta_http.configure_cache(args.cache_dir)
+    if args.backend:
+        set_default_parser_backend(args.backend)
+
+    # Без --format и --output результаты сохраняются в прежнем виде, как до появления потоковых форматов
+    legacy_output = args.format is None and args.output is None
+    output_format = args.format or (args.output and output_format_for(args.output)) or 'json'
+    output_filename = f"flibusta_search_{slug}.json" if legacy_output else args.output or f"flibusta_{slug}.{output_format}"
 
-        # Сохраняем результаты в JSON-файл
-        filename = f"flibusta_search_{search_query.replace(' ', '_')}.json"
-        save_results_to_json(results, filename)
+    # Выводим базовую ссылку для поиска
+    print("\nСформированная ссылка для поиска:")
+    print(build_search_url(search_query))
+
+    # Открываем контрольную точку: если предыдущий запуск с этим запросом прервался,
+    # уже обработанные страницы будут взяты из нее
+    checkpoint_filename = f"flibusta_checkpoint_{slug}.sqlite"
+    checkpoint = CrawlCheckpoint(checkpoint_filename)
+    if len(checkpoint):
+        print(f"\nПродолжаем прерванный обход: уже обработано страниц: {len(checkpoint)}")
+
+    # Сохраняем загруженные страницы в архив, чтобы их можно было разобрать повторно без сети
+    if args.archive:
+        flibusta_http.configure_archive(args.archive)
+
+    # Все найденные сущности собираются в одно хранилище без дубликатов
+    store = EntityStore()
+    found = {'series': [], 'authors': [], 'books': []}
+    counts = {'series': 0, 'author': 0, 'book': 0}
+
+    # Записи выводятся по мере разбора страниц во временные файлы, которые заменяют
+    # результаты прошлого запуска только после успешного поиска
+    print("\nНачинаем обработку результатов поиска...")
+    if legacy_output:
+        detailed_filename = f"flibusta_detailed_{slug}.json"
+        writer = LegacyJsonWriter(output_filename + PARTIAL_SUFFIX, detailed_filename + PARTIAL_SUFFIX)
+        outputs = {output_filename: writer.filename, detailed_filename: writer.detailed_filename}
+    else:
+        writer = open_writer(output_filename + PARTIAL_SUFFIX, output_format)
+        outputs = {output_filename: writer.filename}
+
+    with writer:
+        for record in iter_search_records(search_query, args.max_pages, checkpoint, store=store, seen=set()):
+            writer.write(record)
+            counts[record['type']] += 1
+            if record['type'] == 'series':
+                found['series'].append(record)
+            elif record['type'] == 'author':
+                found['authors'].append(record)
+            else:
+                found['books'].append(record)
 
-        # Спрашиваем, нужно ли собрать подробную информацию о сериях и авторах
-        get_details = input("\nСобрать подробную информацию о сериях и авторах? (y/n): ")
+        # Первая страница поиска попадает в контрольную точку, только если ее удалось получить и разобрать
+        searched = build_search_url(search_query) in checkpoint
 
-        if get_details.lower() == 'y':
-            detailed_results = {
+        depth = DETAIL_DEPTHS[args.depth]
+        if searched and depth:
+            results = {
                 'query': search_query,
-                'series_details': [],
-                'authors_details': []
+                'series': found['series'] if 'series' in depth else [],
+                'authors': found['authors'] if 'authors' in depth else [],
             }
+            if results['series'] or results['authors']:
+                for details in iter_details(results, checkpoint, store):
+                    writer.write({'query': search_query, **details})
+
+            if 'books' in depth and found['books']:
+                print(f"\nСобираем информацию о {len(found['books'])} книгах...")
+                book_urls = [book['url'] for book in found['books'] if store.claim(book['url'])]
+                for book_details in get_books_details(book_urls, checkpoint).values():
+                    store.add_book_details(book_details['url'], book_details)
+                    writer.write({'type': 'book_details', 'query': search_query, **book_details})
+
+    for filename, partial_filename in outputs.items():
+        if not os.path.exists(partial_filename):
+            continue
+        if searched:
+            os.replace(partial_filename, filename)
+        else:
+            os.remove(partial_filename)
 
-            # Собираем информацию о сериях
-            if results['series']:
-                print("\nСбор информации о сериях...")
-                for i, series in enumerate(results['series']):
-                    print(f"Обрабатываем серию {i + 1}/{len(results['series'])}: {series['name']}")
-                    series_details = get_series_books(series['url'])
-                    if series_details:
-                        detailed_results['series_details'].append(series_details)
-                    # Добавляем задержку между запросами
-                    time.sleep(2 + random.random() * 3)
-
-            # Собираем информацию об авторах
-            if results['authors']:
-                print("\nСбор информации об авторах...")
-                for i, author in enumerate(results['authors']):
-                    print(f"Обрабатываем автора {i + 1}/{len(results['authors'])}: {author['name']}")
-                    author_details = get_author_books(author['url'])
-                    if author_details:
-                        detailed_results['authors_details'].append(author_details)
-                    # Добавляем задержку между запросами
-                    time.sleep(2 + random.random() * 3)
-
-            # Сохраняем подробные результаты в JSON-файл
-            detailed_filename = f"flibusta_detailed_{search_query.replace(' ', '_')}.json"
-            save_results_to_json(detailed_results, detailed_filename)
-            print(f"\nПодробные результаты сохранены в файл: {detailed_filename}")
-    else:
+    if not searched:
+        checkpoint.close()
         print("\nНе удалось собрать данные.")
+        sys.exit(1)
+
+    # Выводим статистику
+    print("\nСбор данных завершен.")
+    print(f"Всего найдено серий: {counts['series']}")
+    print(f"Всего найдено авторов: {counts['author']}")
+    print(f"Всего найдено книг: {counts['book']}")
+    print(f"Результаты сохранены в файл: {output_filename} (записей: {writer.count})")
+    if legacy_output and any(writer.details.values()):
+        print(f"Подробные результаты сохранены в файл: {detailed_filename}")
+
+    if depth:
+        # Сохраняем нормализованный список всех сущностей со связями по идентификаторам
+        save_results_to_json(store.to_dict(), f"flibusta_entities_{slug}.json")
+
+    # Добавляем найденные сущности в локальный поисковый индекс для повторных запросов без сети
+    if args.index:
+        with SearchIndex(args.index) as index:
+            index.add_store(store)
+            print(f"Локальный индекс обновлен: {args.index}, книг в индексе: {len(index)}")
+
+    # Сохраняем метрики обхода: сводку в JSON и текст для Prometheus
+    print(f"\nМетрики: {flibusta_metrics.get_metrics().report()}")
+    metrics_filename = f"flibusta_metrics_{slug}"
+    flibusta_metrics.get_metrics().save(metrics_filename + '.json')
+    flibusta_metrics.get_metrics().save(metrics_filename + '.prom')
+    print(f"Метрики обхода сохранены в файлы: {metrics_filename}.json, {metrics_filename}.prom")
+
+    # Обход завершен, контрольная точка больше не нужна
+    checkpoint.close()
+    os.remove(checkpoint_filename)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,382 @@
+"""
+Потоковая запись результатов обхода Flibusta в JSON, JSONL, CSV и Parquet.
+
+Записи пишутся по одной по мере поступления и не накапливаются в памяти
+(для Parquet - накапливаются пачками по PARQUET_BATCH_SIZE строк, каждая
+пачка становится отдельной группой строк файла). JSON и JSONL сохраняют
+вложенную структуру записей, а CSV и Parquet получают плоские строки с
+постоянным набором столбцов FLAT_COLUMNS, пригодные для загрузки в
+табличные инструменты без преобразования: подробности о серии или авторе
+раскладываются на строку самой сущности и по строке на каждую ее книгу.
+
+LegacyJsonWriter сохраняет прежний формат вывода сценария - словарь результатов
+поиска и отдельный файл подробностей; он накапливает записи в памяти.
+
+    with open_writer('flibusta_мир.parquet') as writer:
+        for record in iter_search_records('мир'):
+            writer.write(record)
+"""
+import csv
+import json
+import os
+from abc import ABC, abstractmethod
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pyarrow нужен только для записи в Parquet
+    pyarrow = None
+
+
+OUTPUT_FORMATS = ('json', 'jsonl', 'csv', 'parquet')
+
+# Столбцы плоского представления записей для CSV и Parquet
+FLAT_COLUMNS = [
+    'type', 'query', 'page', 'source', 'url', 'title', 'name', 'books_count',
+    'authors', 'author_urls', 'formats', 'genres', 'series', 'series_number',
+    'year', 'language', 'size_kb', 'pages', 'annotation',
+]
+
+# Числовые столбцы; остальные столбцы строковые
+INTEGER_COLUMNS = ('page', 'books_count', 'series_number', 'year', 'size_kb', 'pages')
+
+# Разделитель значений в столбцах со списками
+LIST_SEPARATOR = '; '
+
+PARQUET_BATCH_SIZE = 10000
+
+
+def _join(values):
+    values = [value for value in values if value]
+    return LIST_SEPARATOR.join(values) if values else None
+
+
+def _flat_row(record, record_type, source=None):
+    """
+    Строит плоскую строку для одной сущности.
+
+    Args:
+        record (dict): Словарь сущности
+        record_type (str): Тип строки ('series', 'author' или 'book')
+        source (str, optional): URL серии или автора, на странице которого найдена книга
+
+    Returns:
+        dict: Строка со столбцами FLAT_COLUMNS
+    """
+    authors = record.get('authors') or []
+    links = record.get('download_links') or []
+    genres = record.get('genres') or []
+    series = record.get('series') if isinstance(record.get('series'), list) else []
+
+    books_count = record.get('books_count')
+    if isinstance(books_count, str):
+        books_count = int(books_count) if books_count.isdigit() else None
+
+    return {
+        'type': record_type,
+        'query': record.get('query'),
+        'page': record.get('page'),
+        'source': source,
+        'url': record.get('url'),
+        'title': record.get('title'),
+        'name': record.get('name'),
+        'books_count': books_count,
+        'authors': _join(author.get('name') for author in authors),
+        'author_urls': _join(author.get('url') for author in authors),
+        'formats': _join(link.get('format') for link in links),
+        'genres': _join(genre.get('name') for genre in genres),
+        'series': _join(series_info.get('name') for series_info in series),
+        'series_number': series[0].get('number') if series else None,
+        'year': record.get('year'),
+        'language': record.get('language'),
+        'size_kb': record.get('size_kb'),
+        'pages': record.get('pages'),
+        'annotation': record.get('annotation'),
+    }
+
+
+def flatten_record(record):
+    """
+    Раскладывает запись на плоские строки.
+
+    Args:
+        record (dict): Запись iter_search_records, запись подробностей с полями 'type'
+                       ('series_details' или 'author_details'), 'url' и результатом get_*_books
+                       или запись 'book_details' с результатом get_book_details
+
+    Returns:
+        list: Строки со столбцами FLAT_COLUMNS
+    """
+    record_type = record.get('type')
+
+    if record_type in ('series_details', 'author_details'):
+        info_key, entity_type = (('series_info', 'series') if record_type == 'series_details'
+                                 else ('author_info', 'author'))
+        info = dict(record.get(info_key, {}))
+        info.pop('total_pages', None)
+        # Количество книг на странице серии хранится в таблице под ключом 'Книг'
+        info.setdefault('books_count', info.get('Книг'))
+
+        rows = [_flat_row({**info, 'url': record.get('url'), 'query': record.get('query')},
+                          entity_type)]
+        rows.extend(_flat_row({**book, 'query': record.get('query')}, 'book', source=record.get('url'))
+                    for book in record.get('books', []))
+        return rows
+
+    if record_type == 'book_details':
+        return [_flat_row(record, 'book')]
+
+    return [_flat_row(record, record_type)]
+
+
+class _Writer(ABC):
+    """
+    Общая часть потоковых записывающих объектов.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write(self, record):
+        """
+        Записывает запись.
+
+        Args:
+            record (dict): Запись результата обхода
+        """
+        self._write(record)
+        self.count += 1
+
+    def write_all(self, records):
+        """
+        Записывает все записи из итерируемого объекта.
+
+        Args:
+            records (iterable): Записи результата обхода
+
+        Returns:
+            int: Количество записанных записей
+        """
+        for record in records:
+            self.write(record)
+        return self.count
+
+    @abstractmethod
+    def _write(self, record):
+        """
+        Записывает одну запись в файл.
+        """
+
+    @abstractmethod
+    def close(self):
+        """
+        Дописывает и закрывает файл.
+        """
+
+
+class JsonWriter(_Writer):
+    """
+    Записывает JSON-массив, выводя элементы по мере поступления.
+    """
+
+    def __init__(self, filename):
+        super().__init__(filename)
+        self._file = open(filename, 'w', encoding='utf-8')
+        self._file.write('[')
+
+    def _write(self, record):
+        self._file.write('\n' if self.count == 0 else ',\n')
+        self._file.write(json.dumps(record, ensure_ascii=False))
+
+    def close(self):
+        if not self._file.closed:
+            self._file.write('\n]\n' if self.count else ']\n')
+            self._file.close()
+
+
+class JsonlWriter(_Writer):
+    """
+    Записывает JSONL: по одной записи в строке, со сбросом на диск после каждой записи.
+    """
+
+    def __init__(self, filename):
+        super().__init__(filename)
+        self._file = open(filename, 'w', encoding='utf-8')
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False))
+        self._file.write('\n')
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class CsvWriter(_Writer):
+    """
+    Записывает плоские строки в CSV со столбцами FLAT_COLUMNS.
+    """
+
+    def __init__(self, filename):
+        super().__init__(filename)
+        # utf-8-sig, чтобы кириллица читалась табличными редакторами без выбора кодировки
+        self._file = open(filename, 'w', encoding='utf-8-sig', newline='')
+        self._writer = csv.DictWriter(self._file, fieldnames=FLAT_COLUMNS)
+        self._writer.writeheader()
+
+    def _write(self, record):
+        self._writer.writerows(flatten_record(record))
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetWriter(_Writer):
+    """
+    Записывает плоские строки в Parquet пачками по PARQUET_BATCH_SIZE строк.
+    """
+
+    def __init__(self, filename, batch_size=PARQUET_BATCH_SIZE):
+        super().__init__(filename)
+        if pyarrow is None:
+            raise ValueError("Для записи в Parquet требуется установить pyarrow")
+
+        self.batch_size = batch_size
+        self._schema = pyarrow.schema([
+            (column, pyarrow.int64() if column in INTEGER_COLUMNS else pyarrow.string())
+            for column in FLAT_COLUMNS
+        ])
+        self._writer = pyarrow.parquet.ParquetWriter(filename, self._schema)
+        self._rows = []
+        self._closed = False
+
+    def _write(self, record):
+        self._rows.extend(flatten_record(record))
+        if len(self._rows) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        if self._rows:
+            self._writer.write_table(pyarrow.Table.from_pylist(self._rows, schema=self._schema))
+            self._rows = []
+
+    def close(self):
+        if not self._closed:
+            self._flush()
+            self._writer.close()
+            self._closed = True
+
+
+class LegacyJsonWriter(_Writer):
+    """
+    Собирает записи в прежний формат вывода в виде двух JSON-документов:
+    результаты поиска ('query', 'total_pages', 'series', 'authors', 'books', 'stats')
+    в filename и подробности ('query', 'series_details', 'authors_details', а при
+    загрузке страниц книг - 'books_details') в detailed_filename. В отличие от
+    потоковых форматов записи накапливаются в памяти и записываются при закрытии;
+    файл подробностей создается, только если подробности собирались.
+    """
+
+    # Тип записи -> ключ списка в результатах поиска или в подробностях
+    SEARCH_KEYS = {'series': 'series', 'author': 'authors', 'book': 'books'}
+    DETAILS_KEYS = {'series_details': 'series_details', 'author_details': 'authors_details',
+                    'book_details': 'books_details'}
+
+    def __init__(self, filename, detailed_filename=None):
+        super().__init__(filename)
+        if detailed_filename is None:
+            root, extension = os.path.splitext(filename)
+            detailed_filename = f"{root}_detailed{extension or '.json'}"
+        self.detailed_filename = detailed_filename
+        self.results = {'query': None, 'total_pages': 0, 'series': [], 'authors': [], 'books': []}
+        self.details = {'series_details': [], 'authors_details': [], 'books_details': []}
+        self._closed = False
+
+    def _write(self, record):
+        record = dict(record)
+        record_type = record.pop('type', None)
+        query = record.pop('query', None)
+        if self.results['query'] is None:
+            self.results['query'] = query
+
+        if record_type in self.SEARCH_KEYS:
+            self.results['total_pages'] = max(self.results['total_pages'], record.pop('page', None) or 0)
+            self.results[self.SEARCH_KEYS[record_type]].append(record)
+        elif record_type in self.DETAILS_KEYS:
+            self.details[self.DETAILS_KEYS[record_type]].append(record)
+        else:
+            raise ValueError(f"Неизвестный тип записи: {record_type}")
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+
+        self.results['stats'] = {
+            'series_count': len(self.results['series']),
+            'authors_count': len(self.results['authors']),
+            'books_count': len(self.results['books'])
+        }
+        with open(self.filename, 'w', encoding='utf-8') as f:
+            json.dump(self.results, f, ensure_ascii=False, indent=2)
+
+        if any(self.details.values()):
+            detailed = {'query': self.results['query'],
+                        'series_details': self.details['series_details'],
+                        'authors_details': self.details['authors_details']}
+            if self.details['books_details']:
+                detailed['books_details'] = self.details['books_details']
+            with open(self.detailed_filename, 'w', encoding='utf-8') as f:
+                json.dump(detailed, f, ensure_ascii=False, indent=2)
+
+
+WRITERS = {
+    'json': JsonWriter,
+    'jsonl': JsonlWriter,
+    'csv': CsvWriter,
+    'parquet': ParquetWriter,
+}
+
+
+def output_format_for(filename):
+    """
+    Определяет формат вывода по расширению файла.
+
+    Args:
+        filename (str): Имя файла
+
+    Returns:
+        str: Формат из OUTPUT_FORMATS или None, если расширение не распознано
+    """
+    extension = os.path.splitext(filename)[1].lstrip('.').lower()
+    return extension if extension in OUTPUT_FORMATS else None
+
+
+def open_writer(filename, output_format=None):
+    """
+    Открывает потоковый записывающий объект.
+
+    Args:
+        filename (str): Имя файла
+        output_format (str, optional): Формат из OUTPUT_FORMATS. По умолчанию - по расширению
+                                       файла, а если оно не распознано - json.
+
+    Returns:
+        _Writer: Объект с методами write(record) и close(); поддерживает with
+
+    Raises:
+        ValueError: Если формат неизвестен или для Parquet не установлен pyarrow
+    """
+    output_format = output_format or output_format_for(filename) or 'json'
+
+    if output_format not in WRITERS:
+        raise ValueError(f"Неизвестный формат вывода: {output_format}")
+
+    return WRITERS[output_format](filename)
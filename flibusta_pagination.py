@@ -0,0 +1,47 @@
+"""
+Определение количества страниц по HTML-коду страницы Flibusta без построения дерева.
+
+Блок пагинации сайта - это <ul class="pager"> со ссылками вида ?page=N
+(нумерация с 0) и элементом pager-current с номером текущей страницы
+(нумерация с 1). Регулярное выражение находит этот блок и разбирает только
+его, поэтому количество страниц известно сразу после загрузки страницы,
+до разбора книг, и параллельная загрузка остальных страниц может начаться
+немедленно.
+"""
+import re
+
+
+PAGER_PATTERN = re.compile(r'<ul[^>]*\bclass="[^"]*\bpager\b[^"]*"[^>]*>(.*?)</ul>', re.S)
+
+PAGER_LINK_PATTERN = re.compile(r'href="[^"]*[?&](?:amp;)?page=(\d+)')
+
+PAGER_CURRENT_PATTERN = re.compile(r'class="[^"]*\bpager-current\b[^"]*"[^>]*>\s*(\d+)')
+
+
+def get_total_pages(html_content):
+    """
+    Определяет количество страниц по блоку пагинации.
+
+    Args:
+        html_content (str): HTML-код страницы поиска, серии или автора
+
+    Returns:
+        int: Количество страниц; 1, если пагинации нет
+    """
+    if not html_content:
+        return 1
+
+    pager_match = PAGER_PATTERN.search(html_content)
+    if not pager_match:
+        return 1
+
+    pager = pager_match.group(1)
+
+    # Ссылка page=N ведет на страницу N + 1; текущая страница ссылкой не является
+    pages = [int(page) + 1 for page in PAGER_LINK_PATTERN.findall(pager)]
+
+    current_match = PAGER_CURRENT_PATTERN.search(pager)
+    if current_match:
+        pages.append(int(current_match.group(1)))
+
+    return max(pages, default=1)
@@ -0,0 +1,233 @@
+"""
+Конвейер обхода Flibusta с разбором страниц в пуле процессов.
+
+Загрузка и разбор страниц разделены на стадии:
+    1. потоки-загрузчики получают HTML (через flibusta_http.fetch или другую функцию,
+       например чтение из кэша) и кладут его в ограниченную очередь;
+    2. пул процессов ProcessPoolExecutor выполняет функции parse_* над HTML;
+    3. стадия записи получает результаты в основном потоке.
+
+Размер очереди задает обратное давление: если разбор не успевает, загрузчики
+ждут, а не накапливают HTML в памяти. Результаты страниц одной сущности
+передаются на запись строго в порядке их добавления.
+"""
+import os
+import queue
+import threading
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import flibusta_http
+import flibusta_records
+from flibusta_online_scraper import paginated_url, parse_author_books, parse_series_books
+
+
+# Количество потоков, загружающих страницы
+DEFAULT_FETCH_WORKERS = 4
+
+# Максимальное количество загруженных, но еще не разобранных страниц
+DEFAULT_QUEUE_SIZE = 32
+
+
+class ParsePipeline:
+    """
+    Конвейер "загрузка - разбор в пуле процессов - запись".
+
+    Использование:
+        pipeline = ParsePipeline()
+        pipeline.submit('author-1', 'https://flibusta.is/a/1', parse_author_books)
+        pipeline.run(lambda key, url, result: print(key, url, len(result['books'])))
+    """
+
+    def __init__(self, fetch=None, fetch_workers=DEFAULT_FETCH_WORKERS, parse_workers=None,
+                 queue_size=DEFAULT_QUEUE_SIZE):
+        """
+        Args:
+            fetch (callable, optional): Функция получения HTML по URL. По умолчанию flibusta_http.fetch.
+            fetch_workers (int, optional): Количество потоков-загрузчиков
+            parse_workers (int, optional): Количество процессов разбора. По умолчанию число ядер.
+            queue_size (int, optional): Размер очереди между загрузкой и разбором
+        """
+        self.fetch = fetch or flibusta_http.fetch
+        self.fetch_workers = fetch_workers
+        self.parse_workers = parse_workers or os.cpu_count()
+        self.queue_size = queue_size
+
+        self._tasks = queue.Queue()
+        self._pages = queue.Queue(maxsize=queue_size)
+        self._next_seq = defaultdict(int)
+        self._outstanding = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def submit(self, key, url, parser):
+        """
+        Добавляет страницу в конвейер. Можно вызывать и из функции записи во время run().
+
+        Args:
+            key (hashable): Ключ сущности; результаты с одним ключом записываются в порядке добавления
+            url (str): URL страницы
+            parser (callable): Функция разбора уровня модуля (должна сериализоваться pickle)
+        """
+        with self._lock:
+            seq = self._next_seq[key]
+            self._next_seq[key] += 1
+            self._outstanding += 1
+
+        self._tasks.put((key, seq, url, parser))
+
+    def _fetcher(self):
+        """
+        Загружает страницы из очереди задач и передает HTML на разбор.
+        """
+        while not self._stop.is_set():
+            try:
+                key, seq, url, parser = self._tasks.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            # Ошибка загрузки не должна останавливать поток: страница передается на запись с результатом None
+            try:
+                html_content = self.fetch(url)
+            except Exception as e:
+                print(f"Ошибка при загрузке страницы {url}: {e}")
+                html_content = None
+            self._pages.put((key, seq, url, parser, html_content))
+
+    def run(self, writer):
+        """
+        Выполняет все добавленные страницы и возвращает управление, когда они обработаны.
+
+        Args:
+            writer (callable): Функция writer(key, url, result), вызываемая в основном потоке.
+                               result равен None, если страницу не удалось загрузить или разобрать.
+        """
+        fetchers = [threading.Thread(target=self._fetcher, daemon=True) for _ in range(self.fetch_workers)]
+        for fetcher in fetchers:
+            fetcher.start()
+
+        # Результаты, пришедшие раньше предыдущих страниц той же сущности
+        buffered = defaultdict(dict)
+        next_to_write = defaultdict(int)
+        in_flight = {}
+
+        def deliver(key, seq, url, result):
+            buffered[key][seq] = (url, result)
+            while next_to_write[key] in buffered[key]:
+                page_url, page_result = buffered[key].pop(next_to_write[key])
+                next_to_write[key] += 1
+                with self._lock:
+                    self._outstanding -= 1
+                writer(key, page_url, page_result)
+
+        try:
+            # Процессы разбора получают тот же адрес сайта, даже если запускаются не через fork
+            with ProcessPoolExecutor(max_workers=self.parse_workers, initializer=flibusta_records.set_base_url,
+                                     initargs=(flibusta_records.FLIBUSTA_URL,)) as pool:
+                while True:
+                    with self._lock:
+                        if self._outstanding == 0:
+                            break
+
+                    # Забираем загруженные страницы, пока в пуле есть место
+                    while len(in_flight) < self.queue_size:
+                        try:
+                            item = self._pages.get(block=not in_flight, timeout=0.1)
+                        except queue.Empty:
+                            break
+
+                        key, seq, url, parser, html_content = item
+                        if html_content is None:
+                            deliver(key, seq, url, None)
+                        else:
+                            in_flight[pool.submit(parser, html_content)] = (key, seq, url)
+
+                    if not in_flight:
+                        continue
+
+                    done, _ = wait(in_flight, timeout=0.05, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        key, seq, url = in_flight.pop(future)
+                        try:
+                            result = future.result()
+                        except Exception as e:
+                            print(f"Ошибка при разборе страницы {url}: {e}")
+                            result = None
+                        deliver(key, seq, url, result)
+        finally:
+            self._stop.set()
+            for fetcher in fetchers:
+                fetcher.join()
+            self._stop.clear()
+
+
+def get_details_parallel(results, writer=None, **pipeline_options):
+    """
+    Собирает подробную информацию о сериях и авторах из результатов поиска,
+    загружая страницы в потоках и разбирая их в пуле процессов.
+
+    Args:
+        results (dict): Результаты parse_all_pages
+        writer (callable, optional): Функция, вызываемая для каждой полностью собранной
+                                     сущности с тем же словарем, что отдает iter_details
+        **pipeline_options: Параметры ParsePipeline
+
+    Returns:
+        dict: Словарь с подробной информацией о сериях и авторах
+    """
+    pipeline = ParsePipeline(**pipeline_options)
+    detailed_results = {
+        'query': results['query'],
+        'series_details': [],
+        'authors_details': []
+    }
+
+    # Состояние сборки каждой сущности: первая страница, число страниц и полученные страницы
+    entities = {}
+
+    for series in results['series']:
+        key = ('series', series['url'])
+        entities[key] = {'url': series['url'], 'parser': parse_series_books, 'info_key': 'series_info'}
+        pipeline.submit(key, series['url'], parse_series_books)
+
+    for author in results['authors']:
+        key = ('author', author['url'])
+        entities[key] = {'url': author['url'], 'parser': parse_author_books, 'info_key': 'author_info'}
+        pipeline.submit(key, author['url'], parse_author_books)
+
+    def collect(key, url, page_result):
+        entity = entities[key]
+
+        if 'result' not in entity:
+            # Первая страница: по ней узнаем количество страниц и ставим остальные в очередь
+            if page_result is None:
+                print(f"Не удалось получить страницу: {url}")
+                del entities[key]
+                return
+
+            entity['result'] = page_result
+            entity['pending'] = page_result[entity['info_key']].get('total_pages', 1) - 1
+            for page in range(1, entity['pending'] + 1):
+                pipeline.submit(key, paginated_url(entity['url'], page), entity['parser'])
+        else:
+            entity['pending'] -= 1
+            if page_result is not None:
+                entity['result']['books'].extend(page_result['books'])
+            else:
+                print(f"Не удалось получить страницу: {url}")
+
+        if entity['pending'] == 0:
+            details = entities.pop(key)['result']
+            if key[0] == 'series':
+                detailed_results['series_details'].append(details)
+                record = {'type': 'series_details', 'url': key[1], **details}
+            else:
+                detailed_results['authors_details'].append(details)
+                record = {'type': 'author_details', 'url': key[1], **details}
+
+            if writer is not None:
+                writer(record)
+
+    pipeline.run(collect)
+
+    return detailed_results
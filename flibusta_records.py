@@ -0,0 +1,220 @@
+"""
+Компактные типы записей для книг, авторов, серий, жанров и ссылок на скачивание.
+
+Записи хранят числовые идентификаторы вместо полных URL, а строки форматов
+интернируются, поэтому на обходах с сотнями тысяч книг они занимают в разы
+меньше памяти, чем вложенные словари. Полный URL вычисляется свойством url
+при обращении, метод to_dict() возвращает словарь для сохранения в JSON.
+"""
+import os
+import re
+import sys
+from dataclasses import dataclass, field
+
+
+# Адрес сайта без завершающего '/'. Переменная окружения FLIBUSTA_BASE_URL или
+# set_base_url позволяют направить обход на зеркало или локальный сервер-заглушку
+FLIBUSTA_URL = os.environ.get('FLIBUSTA_BASE_URL', 'https://flibusta.is').rstrip('/')
+
+ENTITY_URL_PATTERN = re.compile(r'/([abs])/(\d+)(?=[/?#]|$)')
+
+# Соответствие буквы в URL и типа сущности
+ENTITY_KINDS = {'a': 'author', 'b': 'book', 's': 'series'}
+
+
+def set_base_url(base_url):
+    """
+    Задает адрес сайта, от которого строятся все URL.
+
+    Args:
+        base_url (str): Адрес вида https://flibusta.is или http://127.0.0.1:8080
+    """
+    global FLIBUSTA_URL
+    FLIBUSTA_URL = base_url.rstrip('/')
+
+
+def parse_entity_id(url):
+    """
+    Извлекает тип и числовой идентификатор сущности из URL.
+
+    Args:
+        url (str): URL или путь вида /a/123, /b/456/fb2, /s/789?page=1
+
+    Returns:
+        tuple: Пара (тип сущности, идентификатор), например ('book', 456), или None
+    """
+    match = ENTITY_URL_PATTERN.search(url or '')
+    if not match:
+        return None
+    return ENTITY_KINDS[match.group(1)], int(match.group(2))
+
+
+def entity_id(url, kind):
+    """
+    Извлекает числовой идентификатор сущности заданного типа из URL.
+
+    Args:
+        url (str): URL сущности
+        kind (str): Ожидаемый тип ('author', 'book' или 'series')
+
+    Returns:
+        int: Идентификатор или None, если URL не относится к сущности этого типа
+    """
+    parsed = parse_entity_id(url)
+    if not parsed or parsed[0] != kind:
+        return None
+    return parsed[1]
+
+
+@dataclass(slots=True)
+class Genre:
+    """
+    Жанр: код из ссылки /g/<code> и название.
+    """
+    code: str
+    name: str = None
+
+    @property
+    def url(self):
+        return f"{FLIBUSTA_URL}/g/{self.code}"
+
+    def to_dict(self):
+        return {'name': self.name, 'url': self.url}
+
+    @classmethod
+    def from_dict(cls, genre_info):
+        """
+        Создает запись из словаря вида {'name': ..., 'url': ...}.
+
+        Args:
+            genre_info (dict): Словарь жанра
+
+        Returns:
+            Genre: Запись жанра
+        """
+        code = genre_info['url'].rstrip('/').rsplit('/g/', 1)[-1]
+        return cls(sys.intern(code), genre_info.get('name'))
+
+
+@dataclass(slots=True)
+class DownloadLink:
+    """
+    Ссылка на скачивание книги в одном формате.
+    """
+    book_id: int
+    format: str
+    # Путь или полный URL хранится, только если ссылка не имеет стандартного вида /b/<id>/<format>
+    path: str = None
+
+    @property
+    def url(self):
+        if self.path and '://' in self.path:
+            return self.path
+        return FLIBUSTA_URL + (self.path or f"/b/{self.book_id}/{self.format}")
+
+    def to_dict(self):
+        return {'format': self.format, 'url': self.url}
+
+    @classmethod
+    def from_dict(cls, book_id, link_info):
+        """
+        Создает запись из словаря вида {'format': ..., 'url': ...}.
+
+        Args:
+            book_id (int): Идентификатор книги
+            link_info (dict): Словарь ссылки на скачивание
+
+        Returns:
+            DownloadLink: Запись ссылки
+        """
+        link_format = sys.intern(link_info['format'])
+        path = link_info['url'][len(FLIBUSTA_URL):] if link_info['url'].startswith(FLIBUSTA_URL) else link_info['url']
+        if path == f"/b/{book_id}/{link_format}":
+            path = None
+        return cls(book_id, link_format, path)
+
+
+@dataclass(slots=True)
+class Author:
+    """
+    Автор и идентификаторы его книг.
+    """
+    id: int
+    name: str = None
+    books_count: int = None
+    genres: list = field(default_factory=list)
+    book_ids: list = field(default_factory=list)
+
+    @property
+    def url(self):
+        return f"{FLIBUSTA_URL}/a/{self.id}"
+
+    def to_dict(self):
+        author_info = {'id': self.id, 'url': self.url, 'name': self.name}
+        if self.books_count is not None:
+            author_info['books_count'] = self.books_count
+        if self.genres:
+            author_info['genres'] = [genre.to_dict() for genre in self.genres]
+        author_info['book_ids'] = list(self.book_ids)
+        return author_info
+
+
+@dataclass(slots=True)
+class Series:
+    """
+    Серия и идентификаторы ее книг.
+    """
+    id: int
+    name: str = None
+    books_count: int = None
+    # Дополнительные поля из таблицы на странице серии
+    extra: dict = None
+    book_ids: list = field(default_factory=list)
+
+    @property
+    def url(self):
+        return f"{FLIBUSTA_URL}/s/{self.id}"
+
+    def to_dict(self):
+        series_info = {'id': self.id, 'url': self.url, 'name': self.name}
+        if self.books_count is not None:
+            series_info['books_count'] = self.books_count
+        if self.extra:
+            series_info.update(self.extra)
+        series_info['book_ids'] = list(self.book_ids)
+        return series_info
+
+
+@dataclass(slots=True)
+class Book:
+    """
+    Книга со ссылками на записи авторов, идентификаторами серий и ссылками на скачивание.
+    """
+    id: int
+    title: str = None
+    authors: list = field(default_factory=list)
+    series_ids: list = field(default_factory=list)
+    download_links: list = field(default_factory=list)
+    genres: list = field(default_factory=list)
+    # Дополнительные поля со страницы книги: аннотация, год, язык, размер, номера в сериях
+    extra: dict = None
+
+    @property
+    def url(self):
+        return f"{FLIBUSTA_URL}/b/{self.id}"
+
+    def to_dict(self):
+        book_info = {
+            'id': self.id,
+            'url': self.url,
+            'title': self.title,
+            'authors': [{'id': author.id, 'name': author.name, 'url': author.url} for author in self.authors],
+            'series_ids': list(self.series_ids),
+            'download_links': [link.to_dict() for link in self.download_links]
+        }
+        if self.genres:
+            book_info['genres'] = [genre.to_dict() for genre in self.genres]
+        if self.extra:
+            book_info.update(self.extra)
+        return book_info
+
@@ -0,0 +1,285 @@
+"""
+Инкрементальное обновление серий и авторов Flibusta.
+
+Для каждой сущности в SQLite хранится множество идентификаторов ее книг,
+количество страниц и хэш содержимого первой страницы. При обновлении
+загружается только первая страница; остальные страницы обходятся, лишь
+если изменился хэш первой страницы или количество страниц. Результат -
+список добавленных и удаленных книг по каждой изменившейся сущности.
+
+Хэш считается по результату разбора первой страницы, а не по HTML-коду:
+в HTML меняются счетчики, реклама и другие элементы, не относящиеся к книгам.
+
+    python flibusta_refresh.py refresh_state.sqlite urls.txt changes.jsonl
+"""
+import argparse
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+import flibusta_http
+import flibusta_records
+from flibusta_online_scraper import (
+    iter_paginated,
+    parse_author_books,
+    parse_series_books,
+    save_results_to_jsonl,
+)
+from flibusta_records import entity_id, parse_entity_id
+
+
+# Функция разбора и ключ информации о сущности по типу сущности
+ENTITY_PARSERS = {
+    'series': (parse_series_books, 'series_info'),
+    'author': (parse_author_books, 'author_info'),
+}
+
+
+class RefreshState:
+    """
+    Сохраненное состояние серий и авторов для инкрементального обновления.
+
+    Использование:
+        with RefreshState('refresh_state.sqlite') as state:
+            for change in iter_refresh(urls, state):
+                print(change['url'], len(change['added']), len(change['removed']))
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Путь к файлу базы SQLite
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS entities ('
+            'url TEXT PRIMARY KEY, '
+            'page_hash TEXT NOT NULL, '
+            'total_pages INTEGER NOT NULL, '
+            'books TEXT NOT NULL, '
+            'refreshed_at REAL NOT NULL)'
+        )
+        self._connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(*) FROM entities').fetchone()[0]
+
+    def get(self, url):
+        """
+        Возвращает сохраненное состояние сущности.
+
+        Args:
+            url (str): URL серии или автора
+
+        Returns:
+            dict: Словарь с ключами 'page_hash', 'total_pages', 'books' ({идентификатор: название})
+                  и 'refreshed_at' или None, если сущность еще не обходилась
+        """
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT page_hash, total_pages, books, refreshed_at FROM entities WHERE url = ?', (url,)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        return {
+            'page_hash': row[0],
+            'total_pages': row[1],
+            'books': {int(book_id): title for book_id, title in json.loads(row[2]).items()},
+            'refreshed_at': row[3],
+        }
+
+    def put(self, url, page_hash, total_pages, books):
+        """
+        Сохраняет состояние сущности. Запись сразу фиксируется на диске.
+
+        Args:
+            url (str): URL серии или автора
+            page_hash (str): Хэш содержимого первой страницы
+            total_pages (int): Количество страниц
+            books (dict): Книги сущности {идентификатор: название}
+        """
+        data = json.dumps(books, ensure_ascii=False)
+
+        with self._lock:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO entities (url, page_hash, total_pages, books, refreshed_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (url, page_hash, total_pages, data, time.time())
+            )
+            self._connection.commit()
+
+    def touch(self, url):
+        """
+        Отмечает время проверки неизменившейся сущности.
+
+        Args:
+            url (str): URL серии или автора
+        """
+        with self._lock:
+            self._connection.execute('UPDATE entities SET refreshed_at = ? WHERE url = ?', (time.time(), url))
+            self._connection.commit()
+
+    def close(self):
+        """
+        Закрывает соединение с базой.
+        """
+        with self._lock:
+            self._connection.close()
+
+
+def page_hash(page_result):
+    """
+    Вычисляет хэш содержимого разобранной страницы.
+
+    Args:
+        page_result (dict): Результат parse_series_books или parse_author_books
+
+    Returns:
+        str: Шестнадцатеричный SHA-256
+    """
+    data = json.dumps(page_result, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def refresh_entity(url, state):
+    """
+    Проверяет серию или автора и при изменении обходит все страницы заново.
+
+    Args:
+        url (str): URL серии или автора
+        state (RefreshState): Сохраненное состояние
+
+    Returns:
+        dict: Изменения с ключами 'url', 'type', 'changed' (добавлены или удалены книги
+              у ранее обойденной сущности), 'new' (сущность обходится впервые), 'recrawled'
+              (обойдены все страницы), 'added' (словари добавленных книг) и 'removed'
+              (идентификатор, URL и название удаленных книг) или None, если страницы
+              не удалось получить
+    """
+    parsed = parse_entity_id(url)
+    if parsed is None or parsed[0] not in ENTITY_PARSERS:
+        print(f"Неподдерживаемый URL для обновления: {url}")
+        return None
+
+    kind = parsed[0]
+    parser, info_key = ENTITY_PARSERS[kind]
+
+    # Первая страница всегда перепроверяется у сервера, даже если в кэше есть свежая запись
+    html_content = flibusta_http.fetch(url, revalidate=True)
+    if not html_content:
+        print(f"Не удалось получить страницу: {url}")
+        return None
+
+    first_page = parser(html_content)
+    current_hash = page_hash(first_page)
+    total_pages = first_page[info_key].get('total_pages', 1)
+
+    previous = state.get(url)
+    change = {'url': url, 'type': kind, 'changed': False, 'new': previous is None, 'recrawled': False,
+              'added': [], 'removed': []}
+
+    if previous is not None and previous['page_hash'] == current_hash and previous['total_pages'] == total_pages:
+        state.touch(url)
+        return change
+
+    # Первая страница изменилась: обходим остальные страницы, тоже перепроверяя их у сервера,
+    # иначе изменения считались бы по свежим по сроку, но устаревшим записям кэша
+    change['recrawled'] = True
+    books = list(first_page['books'])
+    for page, page_result in iter_paginated(url, parser, total_pages, revalidate=True):
+        if page_result is None:
+            # Неполный список книг дал бы ложные удаления, поэтому состояние не обновляем
+            print(f"Не удалось получить страницу {page + 1}: {url}")
+            return None
+        books.extend(page_result['books'])
+
+    current_books = {}
+    for book in books:
+        book_id = entity_id(book['url'], 'book')
+        if book_id is not None and book_id not in current_books:
+            current_books[book_id] = book
+
+    previous_books = previous['books'] if previous is not None else {}
+
+    change['added'] = [book for book_id, book in current_books.items() if book_id not in previous_books]
+    change['removed'] = [
+        {'id': book_id, 'url': f"{flibusta_records.FLIBUSTA_URL}/b/{book_id}", 'title': title}
+        for book_id, title in previous_books.items() if book_id not in current_books
+    ]
+    # Книги новой сущности попадают в 'added', но изменением она не считается
+    change['changed'] = previous is not None and bool(change['added'] or change['removed'])
+
+    state.put(url, current_hash, total_pages,
+              {book_id: book.get('title') for book_id, book in current_books.items()})
+
+    return change
+
+
+def iter_refresh(urls, state):
+    """
+    Обновляет серии и авторов по списку URL и отдает изменения по мере проверки.
+
+    Args:
+        urls (iterable): URL серий и авторов
+        state (RefreshState): Сохраненное состояние
+
+    Yields:
+        dict: Результат refresh_entity для каждой сущности, которую удалось проверить
+    """
+    checked = 0
+    changed = 0
+    new = 0
+    recrawled = 0
+
+    for url in urls:
+        change = refresh_entity(url, state)
+        if change is None:
+            continue
+
+        checked += 1
+        if change['changed']:
+            changed += 1
+        if change['new']:
+            new += 1
+        if change['recrawled']:
+            recrawled += 1
+
+        yield change
+
+    print(f"\nПроверено сущностей: {checked}, изменилось: {changed}, новых: {new}, "
+          f"обойдено полностью: {recrawled}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Инкрементальное обновление серий и авторов Flibusta")
+    parser.add_argument('state', help="Файл SQLite с сохраненным состоянием")
+    parser.add_argument('urls', help="Текстовый файл с URL серий и авторов, по одному в строке")
+    parser.add_argument('output', help="Файл JSONL для изменений")
+    parser.add_argument('--all', action='store_true',
+                        help="Записывать и неизменившиеся сущности. По умолчанию записываются "
+                             "изменившиеся и новые.")
+    args = parser.parse_args()
+
+    with open(args.urls, encoding='utf-8') as f:
+        urls = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+    with RefreshState(args.state) as state:
+        changes = (change for change in iter_refresh(urls, state) if args.all or change['changed'] or change['new'])
+        save_results_to_jsonl(changes, args.output, append=False)
+
+
+if __name__ == '__main__':
+    main()
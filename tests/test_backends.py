@@ -0,0 +1,53 @@
+"""
+Проверка движков разбора HTML: все функции parse_* должны возвращать одинаковый
+результат на всех движках из PARSER_BACKENDS для каждой страницы-образца
+из benchmarks/fixtures.
+"""
+import functools
+import glob
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import flibusta_online_scraper as scraper
+
+
+FIXTURES = sorted(glob.glob(os.path.join(ROOT_DIR, 'benchmarks', 'fixtures', '*.html')))
+
+PARSERS = [
+    scraper.parse_series,
+    scraper.parse_authors,
+    scraper.parse_books,
+    scraper.parse_search_page,
+    scraper.parse_series_books,
+    scraper.parse_author_books,
+    scraper.parse_book_page,
+]
+
+REFERENCE_BACKEND = scraper.PARSER_BACKENDS[0]
+
+
+@functools.lru_cache(maxsize=None)
+def load_fixture(path):
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+@functools.lru_cache(maxsize=None)
+def reference_result(parser, path):
+    return parser(load_fixture(path), backend=REFERENCE_BACKEND)
+
+
+@pytest.mark.parametrize('path', FIXTURES, ids=os.path.basename)
+@pytest.mark.parametrize('parser', PARSERS, ids=lambda parser: parser.__name__)
+@pytest.mark.parametrize('backend', scraper.PARSER_BACKENDS[1:])
+def test_backends_agree(parser, path, backend):
+    assert parser(load_fixture(path), backend=backend) == reference_result(parser, path)
+
+
+def test_fixtures_found():
+    assert FIXTURES
@@ -0,0 +1,28 @@
+"""
+Проверка конвейера ParsePipeline.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flibusta_online_scraper import parse_series_books
+from flibusta_pipeline import ParsePipeline
+
+
+def failing_fetch(url):
+    raise RuntimeError("сеть недоступна")
+
+
+def test_failing_fetch_delivers_none():
+    pipeline = ParsePipeline(fetch=failing_fetch, fetch_workers=1, parse_workers=1)
+    pipeline.submit('series-1', 'https://flibusta.is/s/1', parse_series_books)
+    pipeline.submit('series-1', 'https://flibusta.is/s/1?page=1', parse_series_books)
+
+    delivered = []
+    pipeline.run(lambda key, url, result: delivered.append((key, url, result)))
+
+    assert delivered == [
+        ('series-1', 'https://flibusta.is/s/1', None),
+        ('series-1', 'https://flibusta.is/s/1?page=1', None),
+    ]